@@ -4,6 +4,7 @@ import cv2
 import os
 import json
 import uuid
+import hashlib
 import numpy as np
 from collections import Counter, deque
 from datetime import datetime
@@ -14,6 +15,8 @@ import boto3
 BACKEND_URL = os.getenv("BACKEND_URL", "https://bapsim.site")
 DEVICE_CODE = os.getenv("DEVICE_CODE", "CART-DEVICE-001")
 MODEL_PATH = os.getenv("MODEL_PATH", "best.pt")
+# autotune 결과 (ai/inference/autotune.py 로 이 장비에서 생성한 프로파일)
+EXEC_PROFILE_PATH = os.getenv("EXEC_PROFILE_PATH", "exec_profile.json")
 CONF_THRESHOLD = 0.5
 CAMERA_INDEX = 0
 WINDOW_SIZE = 6
@@ -159,10 +162,52 @@ def sync_with_backend_async(inventory):
     
     Thread(target=_sync, daemon=True).start()
 
+def load_exec_profile():
+    """
+    실행 프로파일 적용 (CPU 고정, 스레드 수, imgsz, ONNX 모델 경로) - 모델 로드 전에 호출
+    Returns: (model_path, imgsz)
+    """
+    if not os.path.exists(EXEC_PROFILE_PATH):
+        return MODEL_PATH, 640
+    try:
+        with open(EXEC_PROFILE_PATH, "r", encoding="utf-8") as f:
+            profile = json.load(f)
+    except (OSError, ValueError) as e:
+        print(f"[EDGE] Failed to read exec profile: {e}")
+        return MODEL_PATH, 640
+
+    # autotune 측정 조건과 동일하게 앞에서부터 threads 개 코어에 고정 (ONNX Runtime 스레드 범위 포함)
+    if profile.get("pin_cpus") and profile.get("threads") and hasattr(os, "sched_setaffinity"):
+        os.sched_setaffinity(0, sorted(os.sched_getaffinity(0))[:int(profile["threads"])])
+    if profile.get("threads"):
+        os.environ["OMP_NUM_THREADS"] = str(int(profile["threads"]))
+
+    import torch
+    if profile.get("threads"):
+        torch.set_num_threads(int(profile["threads"]))
+    if profile.get("interop_threads"):
+        try:
+            torch.set_num_interop_threads(int(profile["interop_threads"]))
+        except RuntimeError:
+            pass
+
+    model_path = MODEL_PATH
+    onnx_path = profile.get("model_path")
+    if profile.get("backend") == "onnx" and onnx_path and os.path.exists(onnx_path) and os.path.exists(MODEL_PATH):
+        # 프로파일이 현재 best.pt 로부터 export된 ONNX일 때만 사용
+        with open(MODEL_PATH, "rb") as f:
+            if hashlib.sha256(f.read()).hexdigest() == profile.get("source_sha256"):
+                model_path = onnx_path
+
+    imgsz = int(profile.get("imgsz") or 640)
+    print(f"[EDGE] Exec profile: backend={profile.get('backend')} imgsz={imgsz} threads={profile.get('threads')}")
+    return model_path, imgsz
+
 def run_inference():
+    model_path, imgsz = load_exec_profile()
     try:
-        model = YOLO(MODEL_PATH)
-        print(f"[EDGE] Model loaded: {MODEL_PATH}")
+        model = YOLO(model_path)
+        print(f"[EDGE] Model loaded: {model_path}")
     except:
         model = YOLO("yolov8n.pt")
         print("[EDGE] Failed to load custom model, using yolov8n.pt")
@@ -187,7 +232,7 @@ def run_inference():
                 continue
 
             inf_start = time.time()
-            results = model(frame, conf=CONF_THRESHOLD, verbose=False)
+            results = model(frame, conf=CONF_THRESHOLD, imgsz=imgsz, verbose=False)
             inf_end = time.time()
 
             current_frame_counts = Counter()
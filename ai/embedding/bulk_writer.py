@@ -0,0 +1,83 @@
+"""
+pgvector 벡터 일괄 기록 (Bulk Writer)
+- 행마다 UPDATE ... SET embedding = :emb 를 보내는 대신
+  1. 청크 단위로 임시 테이블에 COPY FROM STDIN (pgvector 텍스트 형식 '[v1,v2,...]')
+  2. UPDATE <table> SET <column> = s.embedding FROM 임시 테이블 한 번으로 반영
+  3. 청크마다 커밋 → 한 청크가 실패해도 앞서 커밋된 청크는 유지, 실패 행만 NULL로 남음
+- 전체 카탈로그(1536차원) 기록 시간이 왕복 횟수가 아니라 전송량에 비례
+"""
+import io
+import os
+import time
+
+EMBEDDING_WRITE_CHUNK = int(os.getenv("EMBEDDING_WRITE_CHUNK", "1000"))
+
+STAGING_TABLE = "_embedding_staging"
+
+
+def vector_literal(values):
+    """pgvector 텍스트 형식. float32 왕복에 충분한 9자리 유효숫자"""
+    return "[" + ",".join(f"{v:.9g}" for v in values) + "]"
+
+
+class WriteStats:
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.rows = 0
+        self.failed = 0
+        self.chunks = 0
+        self.bytes = 0
+
+    def summary(self):
+        elapsed = time.perf_counter() - self.started
+        return {
+            "rows": self.rows,
+            "failed": self.failed,
+            "chunks": self.chunks,
+            "mb": round(self.bytes / 1e6, 2),
+            "elapsed_s": round(elapsed, 2),
+            "rows_per_sec": round(self.rows / elapsed, 1) if elapsed > 0 else None,
+        }
+
+
+def write_vectors(engine, table, id_column, rows, column="embedding", chunk_size=EMBEDDING_WRITE_CHUNK):
+    """
+    rows: [(id, vector), ...]
+    Returns: (기록된 id 목록, WriteStats)
+    """
+    stats = WriteStats()
+    written = []
+    raw = engine.raw_connection()
+    try:
+        cur = raw.cursor()
+        for start in range(0, len(rows), chunk_size):
+            chunk = rows[start:start + chunk_size]
+            buf = io.StringIO()
+            for row_id, vector in chunk:
+                buf.write(f"{row_id}\t{vector_literal(vector)}\n")
+            stats.bytes += buf.tell()
+            buf.seek(0)
+            try:
+                # ON COMMIT DELETE ROWS: 청크 커밋 시 임시 테이블이 비워짐
+                cur.execute(
+                    f"CREATE TEMP TABLE IF NOT EXISTS {STAGING_TABLE} "
+                    f"(id BIGINT PRIMARY KEY, embedding vector) ON COMMIT DELETE ROWS"
+                )
+                cur.copy_expert(f"COPY {STAGING_TABLE} (id, embedding) FROM STDIN", buf)
+                cur.execute(
+                    f"UPDATE {table} t SET {column} = s.embedding "
+                    f"FROM {STAGING_TABLE} s WHERE t.{id_column} = s.id"
+                )
+                raw.commit()
+            except Exception as e:
+                raw.rollback()
+                stats.failed += len(chunk)
+                print(f"❌ {table} 청크 기록 실패 ({len(chunk)}행): {e}")
+                continue
+            written.extend(row_id for row_id, _ in chunk)
+            stats.rows += len(chunk)
+            stats.chunks += 1
+        cur.close()
+    finally:
+        raw.close()
+    return written, stats
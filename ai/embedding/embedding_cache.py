@@ -0,0 +1,115 @@
+"""
+임베딩 캐시 (로컬 SQLite)
+- embeddings: hash(provider 식별자, 정규화 텍스트) → 벡터(float32). 같은 텍스트는 API를 다시 호출하지 않음
+- sources   : (entity, id) → 마지막으로 DB에 기록한 원본 텍스트 해시. --changed-only 모드에서 바뀐 행만 골라냄
+
+reset_embeddings.py 로 DB 컬럼을 NULL로 만들어도 캐시는 유지되므로 재생성 비용이 거의 없음
+"""
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+import unicodedata
+from array import array
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent.parent.parent
+EMBEDDING_CACHE_PATH = os.getenv("EMBEDDING_CACHE_PATH", str(BASE_DIR / "data" / "cache" / "embedding_cache.db"))
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS embeddings (
+    key        TEXT PRIMARY KEY,
+    model      TEXT NOT NULL,
+    dim        INTEGER NOT NULL,
+    vector     BLOB NOT NULL,
+    created_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS sources (
+    entity      TEXT NOT NULL,
+    entity_id   INTEGER NOT NULL,
+    source_hash TEXT NOT NULL,
+    updated_at  REAL NOT NULL,
+    PRIMARY KEY (entity, entity_id)
+);
+"""
+
+# SQLite 한 쿼리의 바인딩 변수 제한(기본 999) 이하로 나눠서 조회
+_LOOKUP_CHUNK = 500
+
+
+def normalize_text(text_content):
+    """유니코드 NFC + 공백 정리 (같은 내용이면 같은 키)"""
+    return " ".join(unicodedata.normalize("NFC", text_content or "").split())
+
+
+def content_hash(model, text_content):
+    # model: provider.identity (remote 는 엔드포인트 포함 → stub 서버 벡터와 실제 모델 벡터가 섞이지 않음)
+    return hashlib.sha256(f"{model}\0{normalize_text(text_content)}".encode("utf-8")).hexdigest()
+
+
+class EmbeddingCache:
+    def __init__(self, path=EMBEDDING_CACHE_PATH):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.executescript(_SCHEMA)
+
+    # ------------------------------
+    # Embeddings
+    # ------------------------------
+    def get_many(self, model, texts):
+        """Returns: {text: vector(list[float])} (캐시에 있는 항목만)"""
+        keys = {content_hash(model, t): t for t in texts}
+        found = {}
+        key_list = list(keys)
+        with self._lock:
+            for i in range(0, len(key_list), _LOOKUP_CHUNK):
+                chunk = key_list[i:i + _LOOKUP_CHUNK]
+                rows = self._conn.execute(
+                    f"SELECT key, vector FROM embeddings WHERE key IN ({','.join('?' * len(chunk))})", chunk
+                ).fetchall()
+                for key, blob in rows:
+                    found[keys[key]] = array("f", blob).tolist()
+        return found
+
+    def put_many(self, model, items):
+        """items: [(text, vector), ...]"""
+        now = time.time()
+        rows = [
+            (content_hash(model, t), model, len(v), array("f", v).tobytes(), now)
+            for t, v in items
+        ]
+        with self._lock, self._conn:
+            self._conn.executemany("INSERT OR REPLACE INTO embeddings VALUES (?, ?, ?, ?, ?)", rows)
+
+    # ------------------------------
+    # Sources (--changed-only)
+    # ------------------------------
+    def get_sources(self, entity):
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT entity_id, source_hash FROM sources WHERE entity = ?", (entity,)
+            ).fetchall()
+        return dict(rows)
+
+    def set_sources(self, entity, hashes):
+        """hashes: {entity_id: source_hash} (DB 기록이 커밋된 뒤 호출)"""
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO sources VALUES (?, ?, ?, ?)",
+                [(entity, entity_id, h, now) for entity_id, h in hashes.items()],
+            )
+
+    def stats(self):
+        with self._lock:
+            (count,) = self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()
+        return {"path": self.path, "embeddings": count}
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
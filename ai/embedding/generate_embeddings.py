@@ -1,98 +1,253 @@
 import os
 import sys
+import argparse
+import time
+import random
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
 import numpy as np
 from sqlalchemy import create_engine, text
 from sqlalchemy.orm import sessionmaker
-from openai import OpenAI
 from dotenv import load_dotenv
 from pathlib import Path
+from embedding_cache import EmbeddingCache, content_hash, normalize_text
+from bulk_writer import EMBEDDING_WRITE_CHUNK, write_vectors
 
 # 프로젝트 루트의 .env 파일 로드
 BASE_DIR = Path(__file__).resolve().parent.parent.parent
 load_dotenv(BASE_DIR / ".env")
 
-# DB 및 GMS API 설정
+# 임베딩 provider는 백엔드와 공유 (backend/app/services/embedding_provider.py)
+# .env 로드 이후에 import 해야 EMBEDDING_PROVIDER / GMS_* 설정이 반영됨
+sys.path.append(str(BASE_DIR / "backend"))
+from app.services.embedding_provider import GMS_BASE_URL, EmbeddingProviderError, get_embedding_provider
+
+# DB 설정
 DATABASE_URL = os.getenv("DATABASE_URL")
-GMS_KEY = os.getenv("GMS_KEY") # Authorization: Bearer $GMS_KEY 에 해당
 
-# GMS 프록시 엔드포인트 설정
-# curl 예시: https://gms.ssafy.io/gmsapi/api.openai.com/v1/embeddings
-GMS_BASE_URL = "https://gms.ssafy.io/gmsapi/api.openai.com/v1"
+# Provider 설정 (EMBEDDING_PROVIDER=remote | local)
+# remote: GMS 프록시. curl 예시: https://gms.ssafy.io/gmsapi/api.openai.com/v1/embeddings
+#         로컬 테스트: GMS_BASE_URL=http://localhost:8090/v1 (embedding/stub_server.py)
+# local : 네트워크 없이 결정적 hashing 임베딩 (오프라인 인덱스 / 부하 테스트용)
+
+# 배치 / 동시성 / 재시도 설정
+EMBEDDING_BATCH_SIZE = int(os.getenv("EMBEDDING_BATCH_SIZE", "256"))  # OpenAI 한 요청 최대 2048개
+EMBEDDING_CONCURRENCY = int(os.getenv("EMBEDDING_CONCURRENCY", "4"))
+EMBEDDING_MAX_RETRIES = int(os.getenv("EMBEDDING_MAX_RETRIES", "6"))
+EMBEDDING_BACKOFF_BASE = float(os.getenv("EMBEDDING_BACKOFF_BASE", "1.0"))
+EMBEDDING_BACKOFF_MAX = 60.0
 
 if not DATABASE_URL:
     print("❌ DATABASE_URL이 .env에 설정되어 있지 않습니다.")
     sys.exit(1)
 
-if not GMS_KEY:
-    print("❌ GMS_KEY가 .env에 설정되어 있지 않습니다.")
+try:
+    provider = get_embedding_provider()
+except ValueError as e:
+    # remote provider에 GMS_KEY가 없는 경우 등
+    print(f"❌ 임베딩 provider 초기화 실패: {e}")
     sys.exit(1)
 
-# GMS 전용 클라이언트 초기화
-client = OpenAI(
-    api_key=GMS_KEY,
-    base_url=GMS_BASE_URL
-)
 
-def get_embedding(text_content, model="text-embedding-3-small"):
+class EmbeddingStats:
+    """처리량 / 실패 / 재시도 집계 (배치 스레드에서 동시에 갱신)"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.started = time.perf_counter()
+        self.texts = 0
+        self.batches = 0
+        self.failed = 0
+        self.retries = 0
+        self.cache_hits = 0
+        self.skipped = 0
+
+    def add(self, **counts):
+        with self._lock:
+            for key, value in counts.items():
+                setattr(self, key, getattr(self, key) + value)
+
+    def summary(self):
+        elapsed = time.perf_counter() - self.started
+        return {
+            "texts": self.texts,
+            "failed": self.failed,
+            "batches": self.batches,
+            "retries": self.retries,
+            "cache_hits": self.cache_hits,
+            "skipped": self.skipped,
+            "elapsed_s": round(elapsed, 2),
+            "texts_per_sec": round(self.texts / elapsed, 1) if elapsed > 0 else None,
+        }
+
+
+def clean_text(text_content):
+    return text_content.replace("\n", " ").strip()
+
+
+def _retry_delay(attempt, error):
+    """서버가 Retry-After를 주면 따르고, 아니면 지수 백오프 + jitter"""
+    if error.retry_after is not None:
+        return min(error.retry_after, EMBEDDING_BACKOFF_MAX)
+    delay = min(EMBEDDING_BACKOFF_MAX, EMBEDDING_BACKOFF_BASE * (2 ** attempt))
+    return delay * random.uniform(0.5, 1.0)
+
+
+def embed_batch(texts, stats=None):
+    """
+    텍스트 목록을 한 번의 provider 호출로 임베딩 (재시도 포함)
+    재시도 횟수를 넘기거나 재시도 대상이 아닌 오류면 예외 발생
     """
-    GMS 프록시를 통해 OpenAI 임베딩을 생성합니다.
+    for attempt in range(EMBEDDING_MAX_RETRIES + 1):
+        try:
+            return provider.embed(texts)
+        except EmbeddingProviderError as e:
+            # 재시도 대상: rate limit(429), 타임아웃 / 연결 오류, 5xx
+            if not e.retryable or attempt == EMBEDDING_MAX_RETRIES:
+                raise
+            delay = _retry_delay(attempt, e)
+            if stats:
+                stats.add(retries=1)
+            print(f"⏳ {e} → {delay:.1f}초 후 재시도 ({attempt + 1}/{EMBEDDING_MAX_RETRIES})")
+            time.sleep(delay)
+
+
+def _embed_or_split(texts, stats):
+    """
+    배치 실패 시 절반으로 나눠 재시도 → 문제 입력(길이 초과 등)만 실패 처리
+    Returns: 입력과 같은 길이의 목록 (실패 항목은 None)
     """
-    if not text_content:
-        return None
-    
-    clean_text = text_content.replace("\n", " ").strip()
     try:
-        response = client.embeddings.create(input=[clean_text], model=model)
-        return response.data[0].embedding
-    except Exception as e:
-        print(f"❌ 임베딩 생성 실패: {e}")
-        return None
+        return embed_batch(texts, stats)
+    except EmbeddingProviderError as e:
+        if e.status != 400:
+            raise
+        if len(texts) == 1:
+            print(f"❌ 임베딩 생성 실패: {e}")
+            return [None]
+        mid = len(texts) // 2
+        return _embed_or_split(texts[:mid], stats) + _embed_or_split(texts[mid:], stats)
 
-def update_product_embeddings():
+
+def embed_texts(texts, batch_size=EMBEDDING_BATCH_SIZE,
+                concurrency=EMBEDDING_CONCURRENCY, stats=None):
+    """
+    텍스트 목록을 batch_size 단위로 묶어 최대 concurrency 개 배치를 동시에 요청
+    Returns: 입력과 같은 순서의 임베딩 목록 (실패 항목은 None)
+    """
+    stats = stats or EmbeddingStats()
+    cleaned = [clean_text(t) if t else "" for t in texts]
+    results = [None] * len(texts)
+    # 빈 텍스트는 API에 보내지 않음
+    indices = [i for i, t in enumerate(cleaned) if t]
+    batches = [indices[i:i + batch_size] for i in range(0, len(indices), batch_size)]
+
+    with ThreadPoolExecutor(max_workers=max(1, concurrency)) as pool:
+        futures = {
+            pool.submit(_embed_or_split, [cleaned[i] for i in batch], stats): batch
+            for batch in batches
+        }
+        for future in as_completed(futures):
+            batch = futures[future]
+            try:
+                embeddings = future.result()
+            except Exception as e:
+                # 재시도를 모두 소진한 배치
+                print(f"❌ 배치 임베딩 실패 ({len(batch)}개): {e}")
+                stats.add(failed=len(batch), batches=1)
+                continue
+            for i, embedding in zip(batch, embeddings):
+                results[i] = embedding
+            done = sum(1 for e in embeddings if e is not None)
+            stats.add(texts=done, failed=len(batch) - done, batches=1)
+    return results
+
+
+def embed_with_cache(contents, stats):
+    """캐시에 있는 텍스트는 재사용하고, 없는 텍스트(중복 제거)만 API 호출 후 캐시에 저장"""
+    model = provider.identity
+    normalized = [normalize_text(c) for c in contents]
+    cached = cache.get_many(model, normalized)
+    missing = list(dict.fromkeys(t for t in normalized if t and t not in cached))
+    stats.add(cache_hits=sum(1 for t in normalized if t in cached))
+
+    new_embeddings = embed_texts(missing, stats=stats)
+    fresh = [(t, e) for t, e in zip(missing, new_embeddings) if e is not None]
+    cache.put_many(model, fresh)
+    cached.update(fresh)
+    return [cached.get(t) for t in normalized]
+
+
+def update_embeddings(entity, rows, changed_only=False):
+    """
+    rows: [(id, content, embedding_is_null), ...]
+    - 기본: embedding IS NULL 인 행만
+    - changed_only: 원본 텍스트 해시가 마지막 기록과 다르거나 NULL 인 행만
+    """
+    stats = EmbeddingStats()
+    if changed_only:
+        stored = cache.get_sources(entity)
+        targets = [
+            (row_id, content) for row_id, content, is_null in rows
+            if is_null or stored.get(row_id) != content_hash(provider.identity, content)
+        ]
+    else:
+        targets = [(row_id, content) for row_id, content, is_null in rows if is_null]
+    stats.add(skipped=len(rows) - len(targets))
+    print(f"🎯 {entity}: 대상 {len(targets)}개 (변경 없음 {len(rows) - len(targets)}개 생략)")
+
+    embeddings = embed_with_cache([content for _, content in targets], stats)
+    vectors = [(row_id, embedding) for (row_id, _), embedding in zip(targets, embeddings) if embedding]
+    written, write_stats = write_vectors(engine, entity, f"{entity}_id", vectors)
+    stats.add(failed=write_stats.failed)
+    print(f"💾 {entity} 기록: {write_stats.summary()}")
+
+    # 커밋된 청크의 행만 기록 (실패 행은 다음 실행에서 다시 대상이 되도록)
+    hashes = {row_id: content_hash(provider.identity, content) for row_id, content in targets}
+    cache.set_sources(entity, {row_id: hashes[row_id] for row_id in written})
+    return stats
+
+def update_product_embeddings(changed_only=False):
     db = SessionLocal()
     try:
-        products = db.execute(text("SELECT product_id, name, product_info FROM product WHERE embedding IS NULL")).fetchall()
-        print(f"📦 상품 임베딩 작업 시작 (대상: {len(products)}개)")
-        
-        for prod in products:
-            product_id, name, info = prod
+        condition = "" if changed_only else " WHERE embedding IS NULL"
+        products = db.execute(text(
+            f"SELECT product_id, name, product_info, embedding IS NULL FROM product{condition}"
+        )).fetchall()
+        print(f"📦 상품 임베딩 작업 시작 (조회: {len(products)}개)")
+
+        rows = []
+        for product_id, name, info, is_null in products:
             display_name = (info or {}).get("display_name", "")
             brand = (info or {}).get("brand", "")
-            content = f"상품명: {name}, 브랜드: {brand}, 표시명: {display_name}"
-            
-            embedding = get_embedding(content)
-            if embedding:
-                # pgvector 컬럼 업데이트를 위해 문자열 형태로 변환
-                db.execute(
-                    text("UPDATE product SET embedding = :emb WHERE product_id = :id"),
-                    {"emb": str(embedding), "id": product_id}
-                )
-                print(f"✅ 상품 ID {product_id} ({name}) 완료")
-        db.commit()
+            rows.append((product_id, f"상품명: {name}, 브랜드: {brand}, 표시명: {display_name}", is_null))
+
+        stats = update_embeddings("product", rows, changed_only)
+        print(f"📊 상품 임베딩: {stats.summary()}")
+        return stats
     except Exception as e:
         print(f"❌ 상품 오류: {e}")
         db.rollback()
     finally:
         db.close()
 
-def update_recipe_embeddings():
+def update_recipe_embeddings(changed_only=False):
     db = SessionLocal()
     try:
-        recipes = db.execute(text("SELECT recipe_id, title, description, instructions FROM recipe WHERE embedding IS NULL")).fetchall()
-        print(f"🍳 레시피 임베딩 작업 시작 (대상: {len(recipes)}개)")
-        
-        for rec in recipes:
-            recipe_id, title, desc, inst = rec
-            content = f"제목: {title}, 설명: {desc or ''}, 조리법: {inst or ''}"
-            
-            embedding = get_embedding(content)
-            if embedding:
-                db.execute(
-                    text("UPDATE recipe SET embedding = :emb WHERE recipe_id = :id"),
-                    {"emb": str(embedding), "id": recipe_id}
-                )
-                print(f"✅ 레시피 ID {recipe_id} ({title}) 완료")
-        db.commit()
+        condition = "" if changed_only else " WHERE embedding IS NULL"
+        recipes = db.execute(text(
+            f"SELECT recipe_id, title, description, instructions, embedding IS NULL FROM recipe{condition}"
+        )).fetchall()
+        print(f"🍳 레시피 임베딩 작업 시작 (조회: {len(recipes)}개)")
+
+        rows = [
+            (recipe_id, f"제목: {title}, 설명: {desc or ''}, 조리법: {inst or ''}", is_null)
+            for recipe_id, title, desc, inst, is_null in recipes
+        ]
+
+        stats = update_embeddings("recipe", rows, changed_only)
+        print(f"📊 레시피 임베딩: {stats.summary()}")
+        return stats
     except Exception as e:
         print(f"❌ 레시피 오류: {e}")
         db.rollback()
@@ -102,10 +257,23 @@ def update_recipe_embeddings():
 # SQLAlchemy 연결 설정 유지
 engine = create_engine(DATABASE_URL)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+cache = EmbeddingCache()
 
 if __name__ == "__main__":
-    print(f"🚀 GMS 엔드포인트를 사용한 임베딩 생성 프로세스 시작")
-    print(f"📍 Endpoint: {GMS_BASE_URL}")
-    update_product_embeddings()
-    update_recipe_embeddings()
+    parser = argparse.ArgumentParser(description="상품 / 레시피 임베딩 생성")
+    parser.add_argument("--changed-only", action="store_true",
+                        help="원본 텍스트가 바뀐 행만 다시 임베딩 (reset 없이 카탈로그 수정 반영)")
+    args = parser.parse_args()
+
+    print(f"🚀 임베딩 생성 프로세스 시작 (provider={provider.name}, model={provider.model})")
+    if provider.name == "remote":
+        print(f"📍 Endpoint: {GMS_BASE_URL}")
+    print(f"⚙️ batch={EMBEDDING_BATCH_SIZE} concurrency={EMBEDDING_CONCURRENCY} "
+          f"write_chunk={EMBEDDING_WRITE_CHUNK}")
+    print(f"💾 Cache: {cache.stats()}")
+    results = [update_product_embeddings(args.changed_only), update_recipe_embeddings(args.changed_only)]
+    failed = sum(stats.failed for stats in results if stats)
+    if failed or None in results:
+        print(f"⚠️ 임베딩 실패 {failed}건 (embedding IS NULL 로 남음, 재실행 시 다시 시도)")
+        sys.exit(1)
     print("✨ 모든 작업이 완료되었습니다.")
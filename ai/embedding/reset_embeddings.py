@@ -15,6 +15,7 @@ def reset():
         conn.execute(text("UPDATE product SET embedding = NULL"))
         conn.execute(text("UPDATE recipe SET embedding = NULL"))
         print("✅ product 및 recipe 테이블의 embedding이 NULL로 초기화되었습니다.")
+        print("ℹ️ 임베딩 캐시(embedding_cache.py)는 유지되므로 재생성 시 바뀐 텍스트만 API를 호출합니다.")
 
 if __name__ == "__main__":
     reset()
@@ -0,0 +1,109 @@
+"""
+로컬 임베딩 API 스텁 서버 (OpenAI /v1/embeddings 호환)
+- 같은 텍스트 → 항상 같은 단위 벡터 (텍스트 해시 seed)
+- 지연(--latency-ms), 주기적 429(--rate-limit-every), 배치 크기 제한(--max-batch)으로
+  generate_embeddings.py 의 배치 / 동시성 / 재시도 동작을 네트워크 없이 확인
+
+실행:
+$ python stub_server.py --port 8090 --rate-limit-every 5
+$ GMS_BASE_URL=http://localhost:8090/v1 GMS_KEY=stub python generate_embeddings.py
+"""
+import argparse
+import hashlib
+import json
+import math
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+DEFAULT_DIM = 1536
+
+
+def stub_vector(text_content, dim=DEFAULT_DIM):
+    rng = random.Random(hashlib.sha256(text_content.encode("utf-8")).digest())
+    vec = [rng.gauss(0.0, 1.0) for _ in range(dim)]
+    norm = math.sqrt(sum(v * v for v in vec)) or 1.0
+    return [v / norm for v in vec]
+
+
+def make_handler(args):
+    state = {"requests": 0}
+    lock = threading.Lock()
+
+    class Handler(BaseHTTPRequestHandler):
+        def _send(self, status, body, headers=None):
+            payload = json.dumps(body).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            for key, value in (headers or {}).items():
+                self.send_header(key, value)
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def do_POST(self):
+            if not self.path.rstrip("/").endswith("/embeddings"):
+                return self._send(404, {"error": {"message": f"Unknown path {self.path}"}})
+
+            with lock:
+                state["requests"] += 1
+                count = state["requests"]
+            if args.rate_limit_every and count % args.rate_limit_every == 0:
+                return self._send(
+                    429,
+                    {"error": {"message": "Rate limit reached (stub)", "type": "rate_limit_error"}},
+                    {"Retry-After": str(args.retry_after)},
+                )
+
+            body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+            inputs = body.get("input")
+            if isinstance(inputs, str):
+                inputs = [inputs]
+            if not inputs:
+                return self._send(400, {"error": {"message": "input is required", "type": "invalid_request_error"}})
+            if len(inputs) > args.max_batch:
+                return self._send(400, {"error": {
+                    "message": f"Too many inputs: {len(inputs)} > {args.max_batch}",
+                    "type": "invalid_request_error",
+                }})
+
+            if args.latency_ms:
+                time.sleep(args.latency_ms / 1000)
+            data = [
+                {"object": "embedding", "index": i, "embedding": stub_vector(t, args.dim)}
+                for i, t in enumerate(inputs)
+            ]
+            tokens = sum(len(t) for t in inputs)
+            self._send(200, {
+                "object": "list",
+                "data": data,
+                "model": body.get("model", "stub"),
+                "usage": {"prompt_tokens": tokens, "total_tokens": tokens},
+            })
+
+        def log_message(self, fmt, *log_args):
+            if args.verbose:
+                super().log_message(fmt, *log_args)
+
+    return Handler
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="OpenAI-compatible embedding stub server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8090)
+    parser.add_argument("--dim", type=int, default=DEFAULT_DIM)
+    parser.add_argument("--latency-ms", type=float, default=50)
+    parser.add_argument("--max-batch", type=int, default=2048)
+    parser.add_argument("--rate-limit-every", type=int, default=0, help="N번째 요청마다 429 응답 (0: 끔)")
+    parser.add_argument("--retry-after", type=float, default=1)
+    parser.add_argument("--verbose", action="store_true")
+    args = parser.parse_args()
+
+    server = ThreadingHTTPServer((args.host, args.port), make_handler(args))
+    print(f"🧪 Embedding stub server: http://{args.host}:{args.port}/v1/embeddings (dim={args.dim})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.server_close()
@@ -0,0 +1,183 @@
+"""
+CPU 실행 프로파일 자동 튜닝 (one-shot)
+- 후보: torch 스레드 수 × inter-op 스레드 수 × imgsz × 백엔드(PyTorch / ONNX Runtime) × batch
+- 각 후보를 별도 프로세스에서 측정 (inference.benchmark.bench_inprocess 재사용)
+- p95 latency SLO를 만족하는 후보 중 throughput 최대인 설정을 프로파일 파일로 저장
+- 추론 서버(inference.main)와 edge/cart_agent.py 가 시작 시 이 프로파일을 읽어 적용
+
+실행 방법 (ai/ 디렉토리 기준):
+$ python -m inference.autotune --model models/best.pt --slo-ms 150
+$ python -m inference.autotune --model models/best.pt --threads 2 4 --imgsz 416 640 --backends torch onnx --out models/exec_profile.json
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+try:
+    from inference.benchmark import BENCH_IMAGE_DIR, bench_inprocess, environment_info, run_isolated
+    from inference.exec_profile import EXEC_PROFILE_PATH, sha256_file
+except ImportError:
+    from ai.inference.benchmark import BENCH_IMAGE_DIR, bench_inprocess, environment_info, run_isolated
+    from ai.inference.exec_profile import EXEC_PROFILE_PATH, sha256_file
+
+DEFAULT_SLO_MS = float(os.getenv("AUTOTUNE_SLO_P95_MS", "200"))
+BACKENDS = ("torch", "onnx")
+
+
+def default_thread_candidates():
+    cpus = os.cpu_count() or 1
+    return sorted({t for t in (1, 2, 4, cpus) if t <= cpus})
+
+
+def export_onnx(model_path, imgsz, out_dir):
+    """
+    imgsz 별 ONNX export (정적 입력 크기, batch 축만 dynamic)
+    파일명에 .pt 의 sha256을 포함 → .pt 가 바뀌면 이전 export 를 재사용하지 않음
+    """
+    from ultralytics import YOLO
+
+    os.makedirs(out_dir, exist_ok=True)
+    stem = os.path.splitext(os.path.basename(model_path))[0]
+    digest = sha256_file(model_path)[:12]
+    target = os.path.join(out_dir, f"{stem}_{digest}_{imgsz}.onnx")
+    if os.path.exists(target):
+        return target
+
+    exported = YOLO(model_path).export(format="onnx", imgsz=imgsz, dynamic=True, simplify=True)
+    os.replace(exported, target)
+    return target
+
+
+def select_best(results, slo_ms):
+    """SLO(p95) 만족 후보 중 throughput 최대. 만족 후보가 없으면 p95 최소 후보"""
+    valid = [r for r in results if "error" not in r and r.get("p95_ms") is not None]
+    if not valid:
+        return None, False
+    within = [r for r in valid if r["p95_ms"] <= slo_ms]
+    if within:
+        return max(within, key=lambda r: r["throughput_ips"]), True
+    return min(valid, key=lambda r: r["p95_ms"]), False
+
+
+def autotune(model_path, threads_list, interop_list, imgsz_list, batch_list, backends,
+             slo_ms=DEFAULT_SLO_MS, image_dir=BENCH_IMAGE_DIR, iters=20, warmup=3,
+             onnx_dir=os.path.join("models", "onnx")):
+    results = []
+    for imgsz in imgsz_list:
+        for backend in backends:
+            if backend == "onnx":
+                try:
+                    candidate_model = run_isolated(export_onnx, model_path, imgsz, onnx_dir)
+                except Exception as e:
+                    print(f"[AUTOTUNE] ONNX export failed (imgsz={imgsz}): {e}")
+                    continue
+                # ONNX Runtime은 inter-op 설정과 무관하므로 1개 값만 측정
+                interops = interop_list[:1]
+            else:
+                candidate_model = model_path
+                interops = interop_list
+
+            for batch in batch_list:
+                for threads in threads_list:
+                    for interop in interops:
+                        print(f"[AUTOTUNE] backend={backend} imgsz={imgsz} batch={batch} "
+                              f"threads={threads} interop={interop}")
+                        try:
+                            result = run_isolated(
+                                bench_inprocess, candidate_model, imgsz, batch, threads,
+                                image_dir=image_dir, warmup=warmup, iters=iters,
+                                interop_threads=interop, pin_cpus=True
+                            )
+                        except Exception as e:
+                            result = {"imgsz": imgsz, "batch": batch, "threads": threads, "error": str(e)}
+                        result["backend"] = backend
+                        result["model_path"] = candidate_model
+                        print(f"[AUTOTUNE] -> {result}")
+                        results.append(result)
+    best, slo_met = select_best(results, slo_ms)
+    return best, slo_met, results
+
+
+def build_profile(best, slo_met, slo_ms, model_path, results):
+    return {
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "hostname": platform.node(),
+        "cpu_count": os.cpu_count(),
+        "source_model": model_path,
+        "source_sha256": sha256_file(model_path) if os.path.exists(model_path) else None,
+        "backend": best["backend"],
+        "model_path": best["model_path"],
+        "imgsz": best["imgsz"],
+        "batch": best["batch"],
+        "threads": best["threads"],
+        "interop_threads": best.get("interop_threads"),
+        # 모든 후보는 bench_inprocess(pin_cpus=True) 로 측정 → 서빙 시 같은 코어 고정 적용
+        "pin_cpus": True,
+        "slo_p95_ms": slo_ms,
+        "slo_met": slo_met,
+        "measured": {
+            k: best.get(k) for k in ("throughput_ips", "p50_ms", "p95_ms", "p99_ms", "peak_rss_mb")
+        },
+        "candidates": len(results),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="CPU execution-profile autotuner")
+    parser.add_argument("--model", default=os.path.join("models", "best.pt"))
+    parser.add_argument("--threads", nargs="+", type=int, default=None)
+    parser.add_argument("--interop", nargs="+", type=int, default=[1, 2])
+    parser.add_argument("--imgsz", nargs="+", type=int, default=[320, 416, 480, 640])
+    parser.add_argument("--batch", nargs="+", type=int, default=[1])
+    parser.add_argument("--backends", nargs="+", choices=BACKENDS, default=list(BACKENDS))
+    parser.add_argument("--slo-ms", type=float, default=DEFAULT_SLO_MS, help="p95 latency SLO (ms)")
+    parser.add_argument("--iters", type=int, default=20)
+    parser.add_argument("--images", default=BENCH_IMAGE_DIR)
+    parser.add_argument("--out", default=EXEC_PROFILE_PATH)
+    parser.add_argument("--report", default=None, help="전체 후보 측정 결과 JSON 경로")
+    args = parser.parse_args(argv)
+
+    if not os.path.exists(args.model):
+        print(f"[AUTOTUNE] {args.model} not found → using yolov8n.pt")
+        args.model = "yolov8n.pt"
+
+    best, slo_met, results = autotune(
+        args.model,
+        args.threads or default_thread_candidates(),
+        args.interop,
+        args.imgsz,
+        args.batch,
+        args.backends,
+        slo_ms=args.slo_ms,
+        image_dir=args.images,
+        iters=args.iters,
+    )
+
+    if args.report:
+        with open(args.report, "w", encoding="utf-8") as f:
+            json.dump({"environment": environment_info(), "results": results}, f, indent=2)
+
+    if best is None:
+        print("[AUTOTUNE] no successful candidate, profile not written")
+        return None
+
+    profile = build_profile(best, slo_met, args.slo_ms, args.model, results)
+    os.makedirs(os.path.dirname(os.path.abspath(args.out)), exist_ok=True)
+    tmp_path = f"{args.out}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(profile, f, indent=2)
+    os.replace(tmp_path, args.out)
+
+    if not slo_met:
+        print(f"[AUTOTUNE] no candidate met p95 <= {args.slo_ms}ms, using lowest-latency config")
+    print(f"[AUTOTUNE] profile saved: {args.out} → {profile}")
+    return profile
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,363 @@
+"""
+YOLO 추론 서버 CPU 벤치마크
+- ALLOWED_MODELS × imgsz × batch × torch 스레드 수 조합을 스윕
+- in-process 추론 (모델 직접 호출) / HTTP `/predict` (동시 부하 생성기) 두 경로 측정
+- 결과(throughput, p50/p95/p99, peak RSS)를 JSON으로 저장하고, 옵션으로 MLflow에 기록
+
+실행 방법 (ai/ 디렉토리 기준):
+$ python -m inference.benchmark --models yolov8n.pt yolo11n.pt --imgsz 320 640 --batch 1 4 --threads 1 2 4
+$ python -m inference.benchmark --url http://localhost:8001 --concurrency 1 4 8 --requests 200
+$ python -m inference.benchmark --mlflow --out bench_results.json
+
+이미지 세트는 tests/bench_images/ 의 파일을 사용하며,
+비어 있으면 고정 seed로 생성한 합성 이미지를 사용합니다 (재현성 보장).
+"""
+import argparse
+import io
+import json
+import os
+import platform
+import resource
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from multiprocessing import get_context
+
+import numpy as np
+from PIL import Image
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+# ==============================
+# Config
+# ==============================
+BENCH_IMAGE_DIR = os.path.join(os.path.dirname(__file__), "tests", "bench_images")
+BENCH_EXPERIMENT_NAME = "Inference_CPU_Benchmark"
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".bmp")
+
+DEFAULT_IMGSZ = [320, 480, 640]
+DEFAULT_BATCH = [1, 4]
+DEFAULT_THREADS = [1, 2, 4]
+DEFAULT_CONCURRENCY = [1, 4, 8]
+
+# 결과 dict 중 MLflow param으로 기록할 키 (나머지 숫자 값은 metric)
+RESULT_PARAM_KEYS = (
+    "mode", "model", "url", "imgsz", "batch", "threads", "interop_threads", "concurrency", "iters", "requests"
+)
+
+
+def allowed_models():
+    """추론 서버가 허용하는 모델 목록 (inference.main.ALLOWED_MODELS)"""
+    try:
+        from inference.main import ALLOWED_MODELS
+    except ImportError:
+        from ai.inference.main import ALLOWED_MODELS
+    return sorted(ALLOWED_MODELS)
+
+
+# ==============================
+# Image Set
+# ==============================
+def load_images(image_dir=BENCH_IMAGE_DIR, count=32, size=(640, 480)):
+    """
+    벤치마크용 이미지 세트 로드
+    - image_dir에 이미지가 있으면 파일명 순으로 최대 count장 사용
+    - 없으면 seed 0 으로 합성 이미지를 생성 (항상 동일한 입력)
+    """
+    files = []
+    if os.path.isdir(image_dir):
+        files = sorted(
+            f for f in os.listdir(image_dir)
+            if f.lower().endswith(IMAGE_EXTENSIONS)
+        )[:count]
+
+    if files:
+        return [Image.open(os.path.join(image_dir, f)).convert("RGB") for f in files]
+
+    rng = np.random.default_rng(0)
+    images = []
+    w, h = size
+    for _ in range(count):
+        arr = rng.integers(0, 256, size=(h, w, 3), dtype=np.uint8)
+        # 단색 노이즈만으로는 NMS 부하가 비현실적이므로 사각형 물체를 몇 개 그려 넣음
+        for _ in range(rng.integers(1, 6)):
+            x0, y0 = rng.integers(0, w - 64), rng.integers(0, h - 64)
+            bw, bh = rng.integers(32, 200), rng.integers(32, 200)
+            arr[y0:y0 + bh, x0:x0 + bw] = rng.integers(0, 256, size=3, dtype=np.uint8)
+        images.append(Image.fromarray(arr))
+    return images
+
+
+def encode_jpeg(image, quality=90):
+    buf = io.BytesIO()
+    image.save(buf, format="JPEG", quality=quality)
+    return buf.getvalue()
+
+
+# ==============================
+# Metrics
+# ==============================
+def latency_summary(latencies):
+    """초 단위 latency 리스트 → ms 단위 분위수 요약"""
+    if not latencies:
+        return {"p50_ms": None, "p95_ms": None, "p99_ms": None, "mean_ms": None}
+    arr = np.asarray(latencies, dtype=np.float64) * 1000
+    return {
+        "p50_ms": round(float(np.percentile(arr, 50)), 3),
+        "p95_ms": round(float(np.percentile(arr, 95)), 3),
+        "p99_ms": round(float(np.percentile(arr, 99)), 3),
+        "mean_ms": round(float(arr.mean()), 3),
+    }
+
+
+def peak_rss_mb():
+    """현재 프로세스의 최대 RSS (Linux: KB 단위, macOS: byte 단위)"""
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    if sys.platform == "darwin":
+        return round(rss / (1024 * 1024), 1)
+    return round(rss / 1024, 1)
+
+
+# ==============================
+# In-process Benchmark
+# ==============================
+def bench_inprocess(model_name, imgsz, batch, threads, image_dir=BENCH_IMAGE_DIR,
+                    image_count=32, warmup=3, iters=20, interop_threads=None, pin_cpus=False):
+    """
+    모델을 직접 호출하여 측정 (단일 조합)
+    - 각 조합은 run_isolated로 별도 프로세스에서 실행되므로 peak RSS가 조합별로 분리됨
+    - model_name은 .pt 외에 export된 .onnx 경로도 가능 (ONNX Runtime 백엔드)
+    - pin_cpus: 앞에서부터 threads개 코어에 프로세스를 고정 (torch 외 백엔드의 스레드 수 제한용)
+    """
+    if pin_cpus and hasattr(os, "sched_setaffinity"):
+        cpus = sorted(os.sched_getaffinity(0))[:threads]
+        os.sched_setaffinity(0, cpus)
+
+    import torch
+    from ultralytics import YOLO
+
+    torch.set_num_threads(threads)
+    if interop_threads:
+        torch.set_num_interop_threads(interop_threads)
+    images = load_images(image_dir, image_count)
+
+    load_start = time.perf_counter()
+    model = YOLO(model_name)
+    load_time = time.perf_counter() - load_start
+
+    def batches():
+        i = 0
+        while True:
+            yield [images[(i + k) % len(images)] for k in range(batch)]
+            i += batch
+
+    gen = batches()
+    for _ in range(warmup):
+        model.predict(next(gen), imgsz=imgsz, verbose=False)
+
+    latencies = []
+    total_start = time.perf_counter()
+    for _ in range(iters):
+        frames = next(gen)
+        start = time.perf_counter()
+        model.predict(frames, imgsz=imgsz, verbose=False)
+        latencies.append(time.perf_counter() - start)
+    total_time = time.perf_counter() - total_start
+
+    return {
+        "mode": "inprocess",
+        "model": model_name,
+        "imgsz": imgsz,
+        "batch": batch,
+        "threads": threads,
+        "interop_threads": interop_threads or torch.get_num_interop_threads(),
+        "iters": iters,
+        "model_load_s": round(load_time, 3),
+        "throughput_ips": round(iters * batch / total_time, 3),
+        **latency_summary(latencies),
+        "peak_rss_mb": peak_rss_mb(),
+    }
+
+
+# ==============================
+# HTTP Benchmark
+# ==============================
+def bench_http(url, concurrency, total_requests=100, image_dir=BENCH_IMAGE_DIR,
+               image_count=32, warmup=3, timeout=30):
+    """
+    `/predict` 엔드포인트에 동시 요청을 보내 측정
+    - concurrency 개의 스레드가 total_requests 개의 요청을 나눠서 전송
+    """
+    import requests
+
+    payloads = [encode_jpeg(img) for img in load_images(image_dir, image_count)]
+    endpoint = url.rstrip("/") + "/predict"
+
+    def _send(i):
+        start = time.perf_counter()
+        try:
+            resp = requests.post(
+                endpoint,
+                files={"file": (f"bench_{i}.jpg", payloads[i % len(payloads)], "image/jpeg")},
+                timeout=timeout,
+            )
+            ok = resp.status_code == 200
+        except requests.RequestException:
+            ok = False
+        return ok, time.perf_counter() - start
+
+    for i in range(warmup):
+        _send(i)
+
+    total_start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(_send, range(total_requests)))
+    total_time = time.perf_counter() - total_start
+
+    latencies = [lat for ok, lat in results if ok]
+    errors = sum(1 for ok, _ in results if not ok)
+
+    return {
+        "mode": "http",
+        "url": endpoint,
+        "concurrency": concurrency,
+        "requests": total_requests,
+        "errors": errors,
+        "throughput_ips": round(len(latencies) / total_time, 3),
+        **latency_summary(latencies),
+        # 서버 프로세스의 RSS는 클라이언트에서 측정할 수 없음
+        "peak_rss_mb": None,
+    }
+
+
+# ==============================
+# Sweep
+# ==============================
+def run_isolated(fn, *args, **kwargs):
+    """fn을 새 spawn 프로세스에서 실행하고 결과 반환 (스레드 설정/메모리가 조합 간에 섞이지 않음)"""
+    with ProcessPoolExecutor(max_workers=1, mp_context=get_context("spawn")) as pool:
+        return pool.submit(fn, *args, **kwargs).result()
+
+
+def run_sweep(models, imgsz_list, batch_list, threads_list, image_dir=BENCH_IMAGE_DIR,
+              image_count=32, warmup=3, iters=20):
+    """
+    in-process 조합 스윕
+    - 조합마다 spawn 프로세스를 새로 띄워 스레드 설정/메모리 사용량이 서로 섞이지 않게 함
+    """
+    results = []
+    for model_name in models:
+        for imgsz in imgsz_list:
+            for batch in batch_list:
+                for threads in threads_list:
+                    print(f"[BENCH] model={model_name} imgsz={imgsz} batch={batch} threads={threads}")
+                    try:
+                        result = run_isolated(
+                            bench_inprocess, model_name, imgsz, batch, threads,
+                            image_dir, image_count, warmup, iters
+                        )
+                    except Exception as e:
+                        print(f"[BENCH] failed: {e}")
+                        result = {
+                            "mode": "inprocess", "model": model_name, "imgsz": imgsz,
+                            "batch": batch, "threads": threads, "error": str(e),
+                        }
+                    print(f"[BENCH] -> {result}")
+                    results.append(result)
+    return results
+
+
+def environment_info():
+    info = {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "hostname": platform.node(),
+        "platform": platform.platform(),
+        "processor": platform.processor(),
+        "cpu_count": os.cpu_count(),
+        "python": platform.python_version(),
+    }
+    try:
+        import torch
+        info["torch"] = torch.__version__
+    except ImportError:
+        pass
+    return info
+
+
+def log_to_mlflow(report, experiment_name=BENCH_EXPERIMENT_NAME):
+    """조합마다 nested run 하나씩 기록"""
+    import mlflow
+
+    mlflow.set_tracking_uri(os.getenv("MLFLOW_TRACKING_URI", "http://mlflow:5000"))
+    mlflow.set_experiment(experiment_name)
+
+    with mlflow.start_run(run_name=f"cpu_benchmark_{int(time.time())}"):
+        mlflow.log_params({f"env_{k}": v for k, v in report["environment"].items()})
+        for result in report["results"]:
+            params = {k: v for k, v in result.items() if k in RESULT_PARAM_KEYS}
+            metrics = {
+                k: v for k, v in result.items()
+                if k not in RESULT_PARAM_KEYS and isinstance(v, (int, float))
+            }
+            with mlflow.start_run(nested=True):
+                mlflow.log_params(params)
+                mlflow.log_metrics(metrics)
+    print(f"[MLflow] Benchmark logged to experiment '{experiment_name}'")
+
+
+# ==============================
+# CLI
+# ==============================
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="YOLO CPU inference benchmark")
+    parser.add_argument("--models", nargs="+", default=None, help="기본값: ALLOWED_MODELS 전체")
+    parser.add_argument("--imgsz", nargs="+", type=int, default=DEFAULT_IMGSZ)
+    parser.add_argument("--batch", nargs="+", type=int, default=DEFAULT_BATCH)
+    parser.add_argument("--threads", nargs="+", type=int, default=DEFAULT_THREADS)
+    parser.add_argument("--iters", type=int, default=20)
+    parser.add_argument("--warmup", type=int, default=3)
+    parser.add_argument("--images", default=BENCH_IMAGE_DIR)
+    parser.add_argument("--image-count", type=int, default=32)
+    parser.add_argument("--url", default=None, help="지정 시 HTTP /predict 경로도 측정")
+    parser.add_argument("--concurrency", nargs="+", type=int, default=DEFAULT_CONCURRENCY)
+    parser.add_argument("--requests", type=int, default=100)
+    parser.add_argument("--skip-inprocess", action="store_true")
+    parser.add_argument("--out", default="benchmark_results.json")
+    parser.add_argument("--mlflow", action="store_true", help="결과를 MLflow에 기록")
+    args = parser.parse_args(argv)
+
+    report = {"environment": environment_info(), "results": []}
+
+    if not args.skip_inprocess:
+        models = args.models or allowed_models()
+        report["results"] += run_sweep(
+            models, args.imgsz, args.batch, args.threads,
+            image_dir=args.images, image_count=args.image_count,
+            warmup=args.warmup, iters=args.iters,
+        )
+
+    if args.url:
+        for concurrency in args.concurrency:
+            print(f"[BENCH] http url={args.url} concurrency={concurrency}")
+            result = bench_http(
+                args.url, concurrency, args.requests,
+                image_dir=args.images, image_count=args.image_count, warmup=args.warmup,
+            )
+            print(f"[BENCH] -> {result}")
+            report["results"].append(result)
+
+    with open(args.out, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+    print(f"[BENCH] Results saved: {args.out}")
+
+    if args.mlflow:
+        try:
+            log_to_mlflow(report)
+        except Exception as e:
+            print(f"[MLflow] Benchmark logging failed: {e}")
+
+    return report
+
+
+if __name__ == "__main__":
+    main()
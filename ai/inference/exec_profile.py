@@ -0,0 +1,93 @@
+"""
+CPU 실행 프로파일 (autotune 결과) 로드 / 적용
+- 프로파일은 `python -m inference.autotune` 이 생성 (기본 경로: models/exec_profile.json)
+- 추론 서버 시작 시 torch 스레드 수, imgsz, 백엔드(ONNX 모델 경로)를 프로파일 값으로 설정
+- autotune 은 각 후보를 앞에서부터 threads 개 코어에 고정(pin_cpus)하여 측정하므로 서빙 시에도 같은 코어 고정 +
+  OMP_NUM_THREADS 를 적용 (ultralytics 가 ONNX Runtime 세션을 기본 옵션으로 만들기 때문에 코어 고정으로 스레드 범위를 맞춤)
+
+ONNX 모델은 export 당시의 .pt 파일 sha256(source_sha256)과 현재 서빙할 .pt가 같을 때만 사용
+(모델이 교체되었는데 예전 ONNX를 서빙하는 사고 방지)
+"""
+import json
+import os
+import sys
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+try:
+    from inference.model_store import sha256_file
+except ImportError:
+    from ai.inference.model_store import sha256_file
+
+EXEC_PROFILE_PATH = os.getenv("EXEC_PROFILE_PATH", os.path.join("models", "exec_profile.json"))
+DEFAULT_IMGSZ = 640
+
+
+def load_profile(path=EXEC_PROFILE_PATH):
+    """프로파일이 없거나 읽을 수 없으면 None (라이브러리 기본값으로 동작)"""
+    if not path or not os.path.exists(path):
+        return None
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            profile = json.load(f)
+        print(f"[PROFILE] loaded {path}: backend={profile.get('backend')} "
+              f"imgsz={profile.get('imgsz')} threads={profile.get('threads')}")
+        return profile
+    except (OSError, ValueError) as e:
+        print(f"[PROFILE] failed to load {path}: {e}")
+        return None
+
+
+def pinned_cpus(profile):
+    """autotune 측정 때와 같은 CPU 집합 (현재 허용된 코어 중 앞에서부터 threads 개). 고정하지 않으면 None"""
+    if not profile or not profile.get("pin_cpus") or not profile.get("threads"):
+        return None
+    if not hasattr(os, "sched_getaffinity"):
+        return None
+    return sorted(os.sched_getaffinity(0))[:int(profile["threads"])]
+
+
+def apply_threads(profile):
+    """
+    CPU 고정 + OpenMP / torch intra·inter-op 스레드 수 적용
+    - 모델(ONNX Runtime 세션) 생성 전에 호출해야 함
+    - inter-op은 첫 병렬 작업 전에만 변경 가능
+    """
+    if not profile:
+        return
+    cpus = pinned_cpus(profile)
+    if cpus:
+        os.sched_setaffinity(0, cpus)
+        print(f"[PROFILE] pinned to cpus={cpus}")
+    if profile.get("threads"):
+        os.environ["OMP_NUM_THREADS"] = str(int(profile["threads"]))
+
+    import torch
+
+    if profile.get("threads"):
+        torch.set_num_threads(int(profile["threads"]))
+    if profile.get("interop_threads"):
+        try:
+            torch.set_num_interop_threads(int(profile["interop_threads"]))
+        except RuntimeError as e:
+            print(f"[PROFILE] inter-op threads not applied: {e}")
+
+
+def profile_imgsz(profile):
+    if profile and profile.get("imgsz"):
+        return int(profile["imgsz"])
+    return DEFAULT_IMGSZ
+
+
+def select_model_path(profile, model_path):
+    """프로파일 백엔드가 onnx이고 원본 .pt가 일치하면 ONNX 경로, 아니면 원래 경로"""
+    if not profile or profile.get("backend") != "onnx":
+        return model_path
+
+    onnx_path = profile.get("model_path")
+    if not onnx_path or not os.path.exists(onnx_path) or not os.path.exists(model_path):
+        return model_path
+    if sha256_file(model_path) != profile.get("source_sha256"):
+        print("[PROFILE] ONNX profile was tuned for a different model → using .pt")
+        return model_path
+    return onnx_path
@@ -0,0 +1,306 @@
+"""
+학습 작업 큐 (Job Queue)
+- 로컬 SQLite(JOBS_DB_PATH)에 작업 상태 / epoch 진행률 / 마지막 체크포인트를 저장 → 서버 재시작 후에도 유지
+- 우선순위(priority 높은 순) → 생성 순으로 한 번에 하나씩 TrainingProcess 로 실행
+- cancel: 대기 중이면 즉시 취소, 실행 중이면 자식 프로세스 종료
+- resume: 마지막 체크포인트(last.pt)에서 같은 kind / MLflow run으로 이어서 학습 (마지막 epoch까지 끝난 체크포인트는 재개 불가)
+- 서버가 학습 도중 종료되면 다음 시작 시 interrupted 로 표시하고, JOBS_AUTO_RESUME=1 이면 다시 큐에 넣음
+
+상태: queued → running → finished | failed | cancelled | interrupted
+"""
+import asyncio
+import json
+import os
+import sqlite3
+import sys
+import threading
+import time
+import uuid
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+JOBS_DB_PATH = os.getenv("JOBS_DB_PATH", os.path.join("models", "jobs.db"))
+JOBS_AUTO_RESUME = os.getenv("JOBS_AUTO_RESUME", "1") == "1"
+JOBS_POLL_INTERVAL = float(os.getenv("JOBS_POLL_INTERVAL", "2"))
+
+# kind → TrainingProcess mode
+JOB_KINDS = {"train": "full", "incremental": "incremental", "distill": "distill"}
+RESUMABLE_STATUSES = ("failed", "cancelled", "interrupted")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id              TEXT PRIMARY KEY,
+    kind            TEXT NOT NULL,
+    params          TEXT NOT NULL,
+    priority        INTEGER NOT NULL DEFAULT 0,
+    status          TEXT NOT NULL,
+    progress        TEXT,
+    run_id          TEXT,
+    last_checkpoint TEXT,
+    error           TEXT,
+    attempts        INTEGER NOT NULL DEFAULT 0,
+    created_at      REAL NOT NULL,
+    started_at      REAL,
+    finished_at     REAL
+);
+CREATE INDEX IF NOT EXISTS idx_jobs_queue ON jobs (status, priority DESC, created_at);
+"""
+
+_JSON_COLUMNS = ("params", "progress")
+
+
+# ==============================
+# Store
+# ==============================
+class JobStore:
+    def __init__(self, path=JOBS_DB_PATH):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.executescript(_SCHEMA)
+
+    @staticmethod
+    def _to_dict(row):
+        if row is None:
+            return None
+        job = dict(row)
+        for col in _JSON_COLUMNS:
+            job[col] = json.loads(job[col]) if job[col] else None
+        return job
+
+    def create(self, kind, params, priority=0):
+        job_id = uuid.uuid4().hex[:12]
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT INTO jobs (id, kind, params, priority, status, created_at) VALUES (?, ?, ?, ?, 'queued', ?)",
+                (job_id, kind, json.dumps(params), priority, time.time()),
+            )
+        return self.get(job_id)
+
+    def get(self, job_id):
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return self._to_dict(row)
+
+    def list(self, status=None, limit=50):
+        query = "SELECT * FROM jobs"
+        args = []
+        if status:
+            query += " WHERE status = ?"
+            args.append(status)
+        query += " ORDER BY created_at DESC LIMIT ?"
+        args.append(limit)
+        with self._lock:
+            rows = self._conn.execute(query, args).fetchall()
+        return [self._to_dict(row) for row in rows]
+
+    def next_queued(self):
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT * FROM jobs WHERE status = 'queued' ORDER BY priority DESC, created_at LIMIT 1"
+            ).fetchone()
+        return self._to_dict(row)
+
+    def queue_position(self, job_id):
+        job = self.get(job_id)
+        if not job or job["status"] != "queued":
+            return None
+        with self._lock:
+            (ahead,) = self._conn.execute(
+                "SELECT COUNT(*) FROM jobs WHERE status = 'queued' AND "
+                "(priority > ? OR (priority = ? AND created_at < ?))",
+                (job["priority"], job["priority"], job["created_at"]),
+            ).fetchone()
+        return ahead
+
+    def update(self, job_id, **fields):
+        for col in _JSON_COLUMNS:
+            if col in fields and fields[col] is not None:
+                fields[col] = json.dumps(fields[col])
+        assignments = ", ".join(f"{col} = ?" for col in fields)
+        with self._lock, self._conn:
+            self._conn.execute(f"UPDATE jobs SET {assignments} WHERE id = ?", (*fields.values(), job_id))
+
+    def mark_interrupted(self):
+        """이전 프로세스에서 running 상태로 남은 작업 → interrupted"""
+        with self._lock, self._conn:
+            rows = self._conn.execute("SELECT id FROM jobs WHERE status = 'running'").fetchall()
+            self._conn.execute(
+                "UPDATE jobs SET status = 'interrupted', error = 'server restarted during training' "
+                "WHERE status = 'running'"
+            )
+        return [row["id"] for row in rows]
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+# ==============================
+# Runner
+# ==============================
+class JobRunner:
+    """
+    큐에서 작업을 하나씩 꺼내 TrainingProcess 로 실행하는 백그라운드 루프
+    - can_start: 새 작업 시작 가능 여부 (스윕 실행 중에는 대기 등)
+    """
+
+    def __init__(self, store, can_start=None, poll_interval=JOBS_POLL_INTERVAL):
+        self.store = store
+        self.can_start = can_start or (lambda: True)
+        self.poll_interval = poll_interval
+        self.current_job_id = None
+        self.current_proc = None
+        self._task = None
+        self._wakeup = None
+
+    def start(self):
+        self._wakeup = asyncio.Event()
+        for job_id in self.store.mark_interrupted():
+            job = self.store.get(job_id)
+            print(f"[JOBS] job {job_id} interrupted by restart (checkpoint={job['last_checkpoint']})")
+            if JOBS_AUTO_RESUME and job["last_checkpoint"]:
+                try:
+                    self.resume(job_id)
+                except ValueError as e:
+                    print(f"[JOBS] job {job_id} not resumed: {e}")
+        self._task = asyncio.create_task(self._loop())
+
+    async def stop(self):
+        job_id, proc = self.current_job_id, self.current_proc
+        if self._task:
+            self._task.cancel()
+        if proc and proc.is_alive():
+            print(f"[JOBS] stopping job {job_id} on shutdown")
+            # 재시작 후 이어서 학습할 수 있도록 interrupted 로 남김
+            self.store.update(job_id, status="interrupted", error="server shutdown")
+            await asyncio.to_thread(proc.cancel)
+
+    def busy(self):
+        return self.current_job_id is not None
+
+    def notify(self):
+        if self._wakeup:
+            self._wakeup.set()
+
+    # ------------------------------
+    # Public API
+    # ------------------------------
+    def submit(self, kind, params, priority=0):
+        if kind not in JOB_KINDS:
+            raise ValueError(f"Unknown job kind: {kind}")
+        job = self.store.create(kind, params, priority)
+        self.notify()
+        return job
+
+    def cancel(self, job_id):
+        """Returns: 갱신된 job (없으면 None)"""
+        job = self.store.get(job_id)
+        if job is None:
+            return None
+        if job["status"] == "queued":
+            self.store.update(job_id, status="cancelled", finished_at=time.time())
+        elif job_id == self.current_job_id and self.current_proc:
+            self.store.update(job_id, status="cancelling")
+            self.current_proc.cancel()
+        return self.store.get(job_id)
+
+    def resume(self, job_id):
+        """체크포인트가 있는 중단 / 실패 작업을 다시 큐에 넣음"""
+        job = self.store.get(job_id)
+        if job is None:
+            return None
+        if job["status"] not in RESUMABLE_STATUSES:
+            raise ValueError(f"Job {job_id} is {job['status']}")
+        if not job["last_checkpoint"] or not os.path.exists(job["last_checkpoint"]):
+            raise ValueError(f"Job {job_id} has no checkpoint to resume from")
+        if self._checkpoint_finished(job):
+            # 학습은 끝났고 이후 단계(아티팩트 / 평가 / 비교)에서 중단됨 → ultralytics 가 "nothing to resume" 으로 실패하므로 재개하지 않음
+            error = "checkpoint already reached the final epoch; nothing to resume"
+            self.store.update(job_id, status="failed", error=error, finished_at=time.time())
+            raise ValueError(f"Job {job_id}: {error}")
+        self.store.update(job_id, status="queued", error=None)
+        self.notify()
+        return self.store.get(job_id)
+
+    def info(self, job):
+        if job and job["status"] == "queued":
+            job["queue_position"] = self.store.queue_position(job["id"])
+        return job
+
+    # ------------------------------
+    # Loop
+    # ------------------------------
+    async def _loop(self):
+        while True:
+            job = self.store.next_queued() if self.can_start() else None
+            if job is None:
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            try:
+                await self._run(job)
+            except Exception as e:
+                print(f"[JOBS] job {job['id']} runner error: {e}")
+                self.store.update(job["id"], status="failed", error=str(e), finished_at=time.time())
+            finally:
+                self.current_job_id = None
+                self.current_proc = None
+
+    @staticmethod
+    def _checkpoint_finished(job):
+        """마지막으로 보고된 epoch 이 전체 epoch 에 도달했는지 (이 경우 last.pt 로 재개할 학습이 없음)"""
+        progress = job["progress"] or {}
+        return bool(progress.get("epochs")) and (progress.get("epoch") or 0) >= progress["epochs"]
+
+    def _process_params(self, job):
+        """resume 이면 원래 파라미터 + 체크포인트 / 기존 MLflow run 으로 같은 kind 를 재개 (승격 평가 등 후처리 유지)"""
+        params = dict(job["params"])
+        if job["last_checkpoint"] and os.path.exists(job["last_checkpoint"]):
+            params.update(resume_from=job["last_checkpoint"], resume_run_id=job["run_id"])
+        return params, JOB_KINDS[job["kind"]]
+
+    def _on_message(self, job_id, msg):
+        kind = msg.get("type")
+        if kind == "run_started":
+            self.store.update(job_id, run_id=msg.get("run_id"))
+        elif kind == "epoch":
+            progress = {k: msg.get(k) for k in ("epoch", "epochs", "metrics", "images_per_sec")}
+            self.store.update(job_id, progress=progress, last_checkpoint=msg.get("last_checkpoint"))
+
+    async def _run(self, job):
+        try:
+            from training.runner import TrainingProcess
+        except ImportError:
+            from ai.training.runner import TrainingProcess
+
+        params, mode = self._process_params(job)
+        self.current_job_id = job["id"]
+        self.current_proc = TrainingProcess(params, mode=mode)
+        self.store.update(
+            job["id"], status="running", started_at=time.time(), finished_at=None,
+            error=None, attempts=job["attempts"] + 1,
+        )
+        print(f"[JOBS] job {job['id']} ({job['kind']}) start | resume={'resume_from' in params}")
+
+        self.current_proc.start()
+        status = await self.current_proc.wait(on_message=lambda msg: self._on_message(job["id"], msg))
+
+        if self.store.get(job["id"])["status"] == "interrupted":
+            # stop() 에서 서버 종료로 중단된 경우 상태 유지
+            return
+        self.store.update(
+            job["id"],
+            status=status,
+            run_id=self.current_proc.run_id or job["run_id"],
+            error=self.current_proc.error,
+            finished_at=time.time(),
+        )
+        print(f"[JOBS] job {job['id']} {status} | run_id={self.current_proc.run_id}")
@@ -1,38 +1,82 @@
-from fastapi import FastAPI, UploadFile, File, BackgroundTasks, Body, HTTPException
-from pydantic import BaseModel, ConfigDict
+from fastapi import FastAPI, UploadFile, File, BackgroundTasks, Body, HTTPException, Header, Request
+from fastapi.responses import Response, JSONResponse
+from pydantic import BaseModel, ConfigDict, Field
 import os
 import io
 import sys
-import mlflow
 import asyncio
 import time
 from contextlib import asynccontextmanager
-from ultralytics import YOLO
 from PIL import Image
+import numpy as np
 
 # ==============================
 # Path 설정
 # ==============================
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+# mlflow / ultralytics / training 모듈은 import 비용이 커서 실제 사용 시점에 로드 (서버 즉시 bind)
 try:
-    from training.train import train as run_training
+    from inference import serialization
+    from inference.workers import INFERENCE_WORKERS, WorkerPool
+    from inference.model_store import ModelStore
+    from inference.timing import RequestStartMiddleware, StageTimer, new_request_id
+    from inference import exec_profile
+    from inference.jobs import JobRunner, JobStore
 except ImportError:
-    from ai.training.train import train as run_training
+    from ai.inference import serialization
+    from ai.inference.workers import INFERENCE_WORKERS, WorkerPool
+    from ai.inference.model_store import ModelStore
+    from ai.inference.timing import RequestStartMiddleware, StageTimer, new_request_id
+    from ai.inference import exec_profile
+    from ai.inference.jobs import JobRunner, JobStore
 
 # ==============================
 # Global State
 # ==============================
 model = None
-is_training = False
+model_source = None
+model_run_id = None
+model_store = None
+# [Jobs] 학습 작업 큐 (SQLite 기반, lifespan에서 시작)
+job_runner = None
+active_sweep = None
+sweep_running = False
+
+# [Supervisor Mode] INFERENCE_WORKERS > 0 일 때만 생성
+worker_pool = None
 
 # [Benchmark Globals]
 active_run_id = None
 inference_cnt = 0
 accumulated_time = 0.0
 
+# [Startup] 단계별 초기화 상태 (/ready 에서 노출)
+startup_state = {
+    "phase": "starting",
+    "ready": False,
+    "model_loaded": False,
+    "warmed_up": False,
+    "mlflow": "pending",
+    "error": None,
+    "started_at": time.time(),
+    "ready_at": None,
+}
+startup_task = None
+mlflow_task = None
+
+# [Exec Profile] autotune 결과 (없으면 None → imgsz 640, 라이브러리 기본 스레드 수)
+exec_profile_data = None
+inference_imgsz = exec_profile.DEFAULT_IMGSZ
+
+# 클래스 이름 테이블 캐시 (model 객체가 바뀌면 다시 계산)
+class_table_cache = None
+
 MODEL_LOCAL_DIR = "models"
 MODEL_FILENAME = "best.pt"
 MODEL_PATH = os.path.join(MODEL_LOCAL_DIR, MODEL_FILENAME)
+# 1이면 /model/switch 기본 동작이 승격 평가 통과(promotion.verdict=pass) run만 허용
+MODEL_SWITCH_REQUIRE_PROMOTION = os.getenv("MODEL_SWITCH_REQUIRE_PROMOTION", "0") == "1"
 
 # 허용 모델 화이트리스트
 ALLOWED_MODELS = {
@@ -42,6 +86,8 @@ ALLOWED_MODELS = {
     "yolo11n.pt",
     "yolo11s.pt"
 }
+# 증류 student 허용 모델 (training/distill.py DISTILL_STUDENTS 와 동일)
+DISTILL_STUDENTS = ("yolov8n.pt", "yolo11n.pt")
 
 # ==============================
 # Request Models
@@ -50,105 +96,277 @@ class TrainRequest(BaseModel):
     epochs: int = 10
     experiment_name: str = "manual_trigger"
     model_name: str = "yolov8s.pt"
+    # 큐 우선순위 (높을수록 먼저 실행)
+    priority: int = 0
 
     # 추가 파라미터(imgsz, mosaic, lr0 등) 허용
     model_config = ConfigDict(extra="allow")
 
+class IncrementalTrainRequest(BaseModel):
+    from_run_id: str
+    new_data_yaml: str
+    base_data_yaml: str | None = None
+    epochs: int | None = None
+    freeze: int | None = None
+    replay_ratio: float | None = None
+    replay_max: int | None = None
+    experiment_name: str | None = None
+    priority: int = 0
+
+    # 추가 학습 파라미터(imgsz, batch 등) 허용
+    model_config = ConfigDict(extra="allow")
+
+class DistillTrainRequest(BaseModel):
+    # 비우면 운영(production) run을 teacher로 사용
+    teacher_run_id: str | None = None
+    student: str = "yolov8n.pt"
+    data_yaml: str | None = None
+    epochs: int | None = None
+    conf: float | None = None
+    label_mode: str | None = None
+    extra_images: str | None = None
+    experiment_name: str | None = None
+    priority: int = 0
+
+    # 추가 학습 파라미터(imgsz, batch 등) 허용
+    model_config = ConfigDict(extra="allow")
+
+class SweepRequest(BaseModel):
+    # {"lr0": {"type": "loguniform", "low": 1e-4, "high": 1e-2}, "imgsz": {"type": "choice", "values": [416, 640]}}
+    space: dict
+    strategy: str = "halving"
+    n_trials: int = Field(default=8, ge=1)
+    parallel: int = Field(default=2, ge=1)
+    max_epochs: int = Field(default=30, ge=1)
+    min_epochs: int = Field(default=3, ge=1)
+    # eta < 2 이면 rung 이 늘지 않아 Sweep 생성이 끝나지 않음
+    eta: int = Field(default=3, ge=2)
+    seed: int = 0
+    experiment_name: str = "hyperparameter_sweep"
+    model_name: str = "yolov8n.pt"
+
+    # 모든 trial에 공통으로 전달할 학습 파라미터
+    model_config = ConfigDict(extra="allow")
+
 # ==============================
-# Background Training Wrapper
+# Lazy Imports
 # ==============================
-async def background_train_wrapper(
-    model_name: str,
-    epochs: int,
-    experiment_name: str,
-    **kwargs
-):
-    global is_training
+def get_mlflow():
+    import mlflow
+    mlflow.set_tracking_uri(os.getenv("MLFLOW_TRACKING_URI", "http://mlflow:5000"))
+    return mlflow
+
+def benchmark_client():
+    # 벤치마크 run은 백그라운드 스레드에서 생성되므로 fluent API(스레드 로컬 active run) 대신 run_id로 기록
+    return get_mlflow().MlflowClient()
+
+def load_yolo(path):
+    from ultralytics import YOLO
+    return YOLO(path)
+
+def get_promotion():
     try:
-        is_training = True
-        print(f"[TRAIN] start | model={model_name}, epochs={epochs}, exp={experiment_name}, extras={kwargs}")
-
-        # 동기 함수인 run_training을 별도 스레드에서 실행
-        await asyncio.to_thread(
-            run_training,
-            model_name=model_name,
-            epochs=epochs,
-            experiment_name=experiment_name,
-            **kwargs
-        )
+        from training import evaluate
+    except ImportError:
+        from ai.training import evaluate
+    return evaluate
 
-        print("[TRAIN] finished")
+def get_sweep_cls():
+    try:
+        from training.sweep import Sweep
+    except ImportError:
+        from ai.training.sweep import Sweep
+    return Sweep
+
+def training_busy():
+    """학습 작업 실행 중 또는 스윕 실행 중 (둘 다 학습용 코어를 사용)"""
+    return sweep_running or (job_runner is not None and job_runner.busy())
+
+# ==============================
+# Background Sweep Wrapper
+# ==============================
+async def background_sweep_wrapper(sweep):
+    global sweep_running
+    try:
+        sweep_running = True
+        summary = await sweep.run()
+        best = summary.get("best_trial") or {}
+        print(f"[SWEEP] {summary['status']} | best run_id={best.get('run_id')} value={best.get('best')}")
     except Exception as e:
-        print(f"[TRAIN] failed: {e}")
+        print(f"[SWEEP] failed: {e}")
     finally:
-        is_training = False
+        sweep_running = False
+        # 스윕 동안 대기하던 작업 시작
+        if job_runner:
+            job_runner.notify()
 
 # ==============================
-# Lifespan (Startup / Shutdown)
+# Startup Phases
 # ==============================
-@asynccontextmanager
-async def lifespan(app: FastAPI):
-    global model
-    print("AI Inference Server Initializing...")
+def init_benchmark_run():
+    """[Benchmark] 추론 세션 MLflow run 시작 (readiness와 무관하게 백그라운드 수행)"""
+    global active_run_id
+    mlflow = get_mlflow()
+    experiment_name = "Jetson_Inference_Benchmark"
+    experiment = mlflow.set_experiment(experiment_name)
     
-    os.makedirs(MODEL_LOCAL_DIR, exist_ok=True)
+    client = benchmark_client()
+    run = client.create_run(
+        experiment.experiment_id,
+        run_name=f"inference_session_{int(time.time())}"
+    )
+    active_run_id = run.info.run_id
+    print(f"[MLflow] Benchmark Run Started: {active_run_id} (Exp: {experiment_name})")
+    
+    client.log_param(active_run_id, "platform", "Jetson Orin Nano")
+    client.log_param(active_run_id, "device", "cuda" if "cuda" in str(os.getenv("CUDA_VISIBLE_DEVICES", "")) else "cpu")
+    if model_source:
+        client.log_param(active_run_id, "model_loaded", model_source)
 
-    # MLflow 설정
-    mlflow_uri = os.getenv("MLFLOW_TRACKING_URI", "http://mlflow:5000")
-    mlflow.set_tracking_uri(mlflow_uri)
+async def run_mlflow_setup():
+    try:
+        startup_state["mlflow"] = "connecting"
+        await asyncio.to_thread(init_benchmark_run)
+        startup_state["mlflow"] = "ok"
+    except Exception as e:
+        startup_state["mlflow"] = f"failed: {e}"
+        print(f"[MLflow] Benchmark init failed: {e}")
 
-    # MLflow run_id 기반 모델 다운로드
-    run_id = os.getenv("MODEL_RUN_ID")
+def resolve_model_path():
+    """
+    서빙할 모델 경로 결정
+    1. MODEL_RUN_ID (없으면 /model/switch 로 마지막에 교체한 run) 가 로컬 캐시에 있으면 그대로 사용
+    2. 없으면 MLflow에서 다운로드
+    3. 실패 시 models/best.pt → yolov8n.pt 순으로 fallback
+    """
+    global model_run_id
+    run_id = os.getenv("MODEL_RUN_ID") or model_store.active_run_id()
     if run_id:
         try:
-            print(f"[MODEL] Downloading from MLflow run_id={run_id}")
-            mlflow.artifacts.download_artifacts(
-                run_id=run_id,
-                artifact_path=f"weights/{MODEL_FILENAME}",
-                dst_path=MODEL_LOCAL_DIR
-            )
+            path = model_store.lookup(run_id, f"weights/{MODEL_FILENAME}")
+            if not path:
+                startup_state["phase"] = "downloading_model"
+                get_mlflow()
+                path = model_store.fetch(run_id, f"weights/{MODEL_FILENAME}")
+            model_run_id = run_id
+            # MODEL_RUN_ID 로 띄운 run 도 서빙 중이므로 active 로 기록 (학습 프로세스의 eviction 대상에서 제외)
+            if model_store.active_run_id() != run_id:
+                model_store.set_active(run_id)
+            return path
         except Exception as e:
             print(f"[MODEL] MLflow download failed: {e}")
 
-    # [Benchmark] Start Inference Run
-    global active_run_id
+    if os.path.exists(MODEL_PATH):
+        return MODEL_PATH
+    print("[MODEL] best.pt not found → loading yolov8n.pt")
+    return "yolov8n.pt"
+
+def load_execution_profile():
+    """autotune 프로파일 적용: torch 스레드 수 + 추론 imgsz (모델 로드 전에 호출)"""
+    global exec_profile_data, inference_imgsz
+    exec_profile_data = exec_profile.load_profile()
+    inference_imgsz = exec_profile.profile_imgsz(exec_profile_data)
+    if not INFERENCE_WORKERS:
+        # Supervisor Mode에서는 워커가 자신에게 할당된 코어 수로 스레드를 설정
+        exec_profile.apply_threads(exec_profile_data)
+
+def load_and_warmup(path):
+    global model, model_source
+    # 프로파일이 ONNX 백엔드이고 같은 .pt로부터 export된 경우에만 ONNX 모델 사용
+    path = exec_profile.select_model_path(exec_profile_data, path)
     try:
-        experiment_name = "Jetson_Inference_Benchmark"
-        mlflow.set_experiment(experiment_name)
-        
-        # End any existing run just in case
-        mlflow.end_run()
-        
-        run = mlflow.start_run(run_name=f"inference_session_{int(time.time())}")
-        active_run_id = run.info.run_id
-        print(f"[MLflow] Benchmark Run Started: {active_run_id} (Exp: {experiment_name})")
-        
-        mlflow.log_param("platform", "Jetson Orin Nano")
-        mlflow.log_param("device", "cuda" if "cuda" in str(os.getenv("CUDA_VISIBLE_DEVICES", "")) else "cpu")
+        print(f"[MODEL] Loading {path}")
+        loaded = load_yolo(path)
     except Exception as e:
-        print(f"[MLflow] Benchmark init failed: {e}")
+        print(f"[MODEL] load failed: {e}")
+        path = "yolov8n.pt"
+        loaded = load_yolo(path)
+    model = loaded
+    model_source = path
+    startup_state["model_loaded"] = True
+    if active_run_id:
+        benchmark_client().log_param(active_run_id, "model_loaded", path)
 
-    # 모델 로드
+    # 첫 요청에서 발생하는 lazy init 비용을 미리 지불 (Supervisor Mode에서는 각 워커가 수행)
+    if not INFERENCE_WORKERS:
+        startup_state["phase"] = "warming_up"
+        dummy = np.zeros((inference_imgsz, inference_imgsz, 3), dtype=np.uint8)
+        model.predict(dummy, imgsz=inference_imgsz, verbose=False)
+        startup_state["warmed_up"] = True
+
+async def initialize():
+    global worker_pool, mlflow_task
     try:
-        if os.path.exists(MODEL_PATH):
-            print(f"[MODEL] Loading {MODEL_PATH}")
-            model = YOLO(MODEL_PATH)
-            if active_run_id:
-                mlflow.log_param("model_loaded", MODEL_PATH)
-        else:
-            print("[MODEL] best.pt not found → loading yolov8n.pt")
-            model = YOLO("yolov8n.pt")
-            if active_run_id:
-                mlflow.log_param("model_loaded", "yolov8n.pt")
+        # MLflow 벤치마크 run 생성은 readiness를 막지 않도록 별도 태스크로 진행
+        mlflow_task = asyncio.create_task(run_mlflow_setup())
+
+        startup_state["phase"] = "resolving_model"
+        await asyncio.to_thread(load_execution_profile)
+        path = await asyncio.to_thread(resolve_model_path)
+
+        startup_state["phase"] = "loading_model"
+        await asyncio.to_thread(load_and_warmup, path)
+
+        # [Supervisor Mode] 코어별로 고정된 모델 워커 프로세스 시작
+        if INFERENCE_WORKERS > 0:
+            startup_state["phase"] = "starting_workers"
+            worker_pool = WorkerPool(INFERENCE_WORKERS, model_source, warmup_imgsz=inference_imgsz)
+            worker_pool.start()
+            # 워커가 모델 로드 + warm-up 을 마치기 전에는 트래픽을 받지 않음
+            startup_state["phase"] = "warming_up"
+            await worker_pool.wait_ready()
+            startup_state["warmed_up"] = True
+
+        startup_state.update(phase="ready", ready=True, ready_at=time.time())
+        print(f"[STARTUP] ready in {startup_state['ready_at'] - startup_state['started_at']:.2f}s")
     except Exception as e:
-        print(f"[MODEL] load failed: {e}")
-        model = YOLO("yolov8n.pt")
+        startup_state.update(phase="failed", error=str(e))
+        print(f"[STARTUP] failed: {e}")
+
+def current_class_table():
+    global class_table_cache
+    if class_table_cache is None or class_table_cache[0] is not model:
+        class_table_cache = (model, serialization.class_table(model.names))
+    return class_table_cache[1]
+
+# ==============================
+# Lifespan (Startup / Shutdown)
+# ==============================
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    global model_store, startup_task, job_runner
+    print("AI Inference Server Initializing...")
+    
+    os.makedirs(MODEL_LOCAL_DIR, exist_ok=True)
+    model_store = ModelStore()
+
+    # 학습 작업 큐: 재시작 전에 실행 중이던 작업은 interrupted 처리 후 (체크포인트가 있으면) 재개
+    job_runner = JobRunner(JobStore(), can_start=lambda: not sweep_running)
+    job_runner.start()
+
+    # 초기화는 백그라운드에서 진행 → 서버는 즉시 요청 수신 (/health, /ready)
+    startup_task = asyncio.create_task(initialize())
 
     yield
+
+    for task in (startup_task, mlflow_task):
+        if task and not task.done():
+            task.cancel()
+
+    if worker_pool:
+        worker_pool.close()
+
+    if job_runner:
+        await job_runner.stop()
+
+    if active_sweep and active_sweep.status == "running":
+        print("[SWEEP] Cancelling sweep on shutdown")
+        # trial 프로세스 join 이 블로킹이므로 이벤트 루프 밖에서 실행
+        await asyncio.to_thread(active_sweep.cancel)
     
     if active_run_id:
         print("[MLflow] Ending Benchmark Run")
-        mlflow.end_run()
+        benchmark_client().set_terminated(active_run_id)
     
     print("AI Inference Server Shutting Down...")
 
@@ -160,18 +378,34 @@ app = FastAPI(
     lifespan=lifespan
 )
 
+# [Server-Timing] 요청 수신 시각 기록 (upload 구간 측정)
+app.add_middleware(RequestStartMiddleware)
+
 # ==============================
 # API Endpoints
 # ==============================
 
 @app.get("/health")
 def health():
+    """Liveness: 프로세스가 살아 있으면 항상 200"""
     return {
         "status": "ok",
+        "phase": startup_state["phase"],
         "model_loaded": model is not None,
-        "is_training": is_training,
-        "benchmark_run_id": active_run_id
+        "is_training": training_busy(),
+        "current_job_id": job_runner.current_job_id if job_runner else None,
+        "benchmark_run_id": active_run_id,
+        "workers": worker_pool.stats() if worker_pool else None
+    }
+
+@app.get("/ready")
+def ready():
+    """Readiness: 모델 로드 + warm-up 완료 전에는 503"""
+    body = {
+        **startup_state,
+        "elapsed_s": round(time.time() - startup_state["started_at"], 2),
     }
+    return JSONResponse(status_code=200 if startup_state["ready"] else 503, content=body)
 
 @app.get("/models")
 def get_available_models():
@@ -180,80 +414,268 @@ def get_available_models():
         "local_models": [
             f for f in os.listdir(MODEL_LOCAL_DIR)
             if f.endswith(".pt")
-        ]
+        ],
+        "cached_runs": model_store.list() if model_store else [],
+        "active_run_id": model_run_id,
+        "model_source": model_source,
+        "exec_profile": exec_profile_data
+    }
+
+def queued_response(message, job):
+    job = job_runner.info(job)
+    return {
+        "message": message,
+        "job_id": job["id"],
+        "status": job["status"],
+        "queue_position": job.get("queue_position"),
+        "params": job["params"],
     }
 
 @app.post("/train")
-async def train_model(
-    request: TrainRequest,
-    background_tasks: BackgroundTasks,
-):
-    global is_training
+async def train_model(request: TrainRequest):
+    """학습 작업을 큐에 추가 (실행 중인 작업이 있으면 순서대로 대기)"""
+    if request.model_name not in ALLOWED_MODELS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Invalid model_name. Allowed: {sorted(ALLOWED_MODELS)}"
+        )
 
-    if is_training:
-        raise HTTPException(status_code=409, detail="Training already in progress")
+    params = request.model_dump()
+    priority = params.pop("priority")
+    job = job_runner.submit("train", params, priority)
+    print(f"[TRAIN] queued job {job['id']} | {params}")
+    return queued_response("Training queued", job)
+
+@app.post("/train/incremental")
+async def train_incremental(request: IncrementalTrainRequest):
+    """운영 중인 run의 best.pt 에서 새 데이터 + replay 샘플로 짧게 재학습"""
+    # 지정하지 않은 값은 training/incremental.py 기본값(INCREMENTAL_*) 사용
+    params = request.model_dump(exclude_none=True)
+    priority = params.pop("priority")
+    job = job_runner.submit("incremental", params, priority)
+    print(f"[TRAIN] queued incremental job {job['id']} | {params}")
+    return queued_response("Incremental training queued", job)
+
+@app.post("/train/distill")
+async def train_distill(request: DistillTrainRequest):
+    """운영 모델(teacher) 예측으로 nano 모델(student) 증류 학습"""
+    if request.student not in DISTILL_STUDENTS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Invalid student. Allowed: {list(DISTILL_STUDENTS)}"
+        )
 
+    # 지정하지 않은 값은 training/distill.py 기본값(DISTILL_*) 사용
+    params = request.model_dump(exclude_none=True)
+    priority = params.pop("priority")
+    job = job_runner.submit("distill", params, priority)
+    print(f"[TRAIN] queued distill job {job['id']} | {params}")
+    return queued_response("Distillation queued", job)
+
+@app.get("/classes")
+def get_class_table():
+    """
+    바이너리 응답(msgpack / npz) 해석용 클래스 이름 테이블
+    - 클라이언트는 한 번 받아두고 X-Class-Table-Version 이 바뀔 때만 다시 요청
+    """
+    if not startup_state["ready"]:
+        raise HTTPException(status_code=503, detail="Model not ready")
+    return current_class_table()
+
+@app.get("/train/status")
+def train_status():
+    """현재 실행 중인 학습 작업 (없으면 idle)"""
+    if job_runner is None or not job_runner.busy():
+        return {"status": "idle"}
+    return {**job_runner.store.get(job_runner.current_job_id), "process": job_runner.current_proc.info()}
+
+@app.post("/train/cancel")
+def cancel_training():
+    if job_runner is None or not job_runner.busy():
+        raise HTTPException(status_code=409, detail="No training in progress")
+    job = job_runner.cancel(job_runner.current_job_id)
+    return {"message": "Training cancelled", **job}
+
+@app.get("/jobs")
+def list_jobs(status: str | None = None, limit: int = 50):
+    return {
+        "current_job_id": job_runner.current_job_id,
+        "jobs": [job_runner.info(job) for job in job_runner.store.list(status, limit)],
+    }
+
+@app.get("/jobs/{job_id}")
+def get_job(job_id: str):
+    job = job_runner.store.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job_runner.info(job)
+
+@app.post("/jobs/{job_id}/cancel")
+def cancel_job(job_id: str):
+    job = job_runner.cancel(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+@app.post("/jobs/{job_id}/resume")
+async def resume_job(job_id: str):
+    """중단 / 실패 / 취소된 작업을 마지막 체크포인트부터 다시 큐에 넣음"""
+    try:
+        job = job_runner.resume(job_id)
+    except ValueError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job_runner.info(job)
+
+@app.post("/sweep")
+async def start_sweep(request: SweepRequest, background_tasks: BackgroundTasks):
+    """하이퍼파라미터 스윕 시작 (학습과 동시에 실행하지 않음, 스윕 동안 작업 큐는 대기)"""
+    global active_sweep, sweep_running
+
+    if training_busy():
+        raise HTTPException(status_code=409, detail="Training already in progress")
     if request.model_name not in ALLOWED_MODELS:
         raise HTTPException(
             status_code=400,
             detail=f"Invalid model_name. Allowed: {sorted(ALLOWED_MODELS)}"
         )
 
-    # 파라미터 분리
     req_data = request.model_dump()
-    epochs = req_data.pop("epochs")
-    experiment_name = req_data.pop("experiment_name")
-    model_name = req_data.pop("model_name")
-    
-    # 백그라운드 작업 추가
-    background_tasks.add_task(
-        background_train_wrapper,
-        model_name=model_name,
-        epochs=epochs,
-        experiment_name=experiment_name,
-        **req_data
-    )
-
+    sweep_args = {k: req_data.pop(k) for k in (
+        "space", "strategy", "n_trials", "parallel", "max_epochs", "min_epochs", "eta", "seed", "experiment_name"
+    )}
+    try:
+        Sweep = get_sweep_cls()
+        active_sweep = Sweep(base_params=req_data, **sweep_args)
+    except (ValueError, KeyError) as e:
+        raise HTTPException(status_code=400, detail=f"Invalid sweep config: {e}")
+
+    # 응답 직후 작업 큐가 새 작업을 시작하지 않도록 미리 표시
+    sweep_running = True
+    background_tasks.add_task(background_sweep_wrapper, active_sweep)
     return {
-        "message": "Training started",
-        "params": request.model_dump()
+        "message": "Sweep started",
+        "sweep_id": active_sweep.sweep_id,
+        "cpu_groups": active_sweep.cpu_groups,
+        "trials": [t["params"] for t in active_sweep.trials],
     }
 
+@app.get("/sweep/status")
+def sweep_status():
+    if active_sweep is None:
+        return {"status": "idle"}
+    return active_sweep.info()
+
+@app.post("/sweep/cancel")
+async def cancel_sweep():
+    if active_sweep is None or active_sweep.status != "running":
+        raise HTTPException(status_code=409, detail="No sweep in progress")
+    await asyncio.to_thread(active_sweep.cancel)
+    return {"message": "Sweep cancelled", "sweep_id": active_sweep.sweep_id}
+
 @app.post("/model/switch")
-def switch_model(run_id: str = Body(..., embed=True)):
-    global model
+def switch_model(
+    run_id: str = Body(..., embed=True),
+    require_promotion: bool | None = Body(None, embed=True),
+):
+    """
+    모델 교체
+    - require_promotion=true (또는 MODEL_SWITCH_REQUIRE_PROMOTION=1) 이면
+      승격 평가를 통과하지 못한 run은 409로 거부
+    """
+    global model, model_source, model_run_id
+    if require_promotion is None:
+        require_promotion = MODEL_SWITCH_REQUIRE_PROMOTION
+
+    promotion = get_promotion()
+    if require_promotion:
+        try:
+            status = promotion.promotion_status(run_id)
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"Promotion status lookup failed: {e}")
+        if status["verdict"] != "pass":
+            raise HTTPException(status_code=409, detail={
+                "message": "Model did not pass promotion evaluation",
+                **status,
+            })
+
+    previous_run_id = model_run_id
     try:
         print(f"[MODEL] Switching to run_id={run_id}")
-        mlflow.artifacts.download_artifacts(
-            run_id=run_id,
-            artifact_path=f"weights/{MODEL_FILENAME}",
-            dst_path=MODEL_LOCAL_DIR
-        )
-        model = YOLO(MODEL_PATH)
+        get_mlflow()
+        # 서빙 중인 모델이 ONNX 여도 원본 .pt 까지 eviction 에서 보호 (active run 은 store 가 자동 보호)
+        protect = [model_source] if model_source else []
+        if previous_run_id:
+            previous_pt = model_store.lookup(previous_run_id, f"weights/{MODEL_FILENAME}")
+            if previous_pt:
+                protect.append(previous_pt)
+        path = model_store.fetch(run_id, f"weights/{MODEL_FILENAME}", protect=protect)
+        path = exec_profile.select_model_path(exec_profile_data, path)
+        model = load_yolo(path)
+        model_source = path
+        model_run_id = run_id
+        model_store.set_active(run_id)
+        if worker_pool:
+            worker_pool.reload(path)
         
         # Log switch event if benchmarking
         if active_run_id:
-            mlflow.log_param("switched_model_run_id", run_id)
-            
-        return {"message": "Model switched successfully", "run_id": run_id}
+            benchmark_client().log_param(active_run_id, "switched_model_run_id", run_id)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+    # 다음 승격 평가의 비교 기준(baseline)이 되도록 운영 run 표시
+    try:
+        promotion.mark_production(run_id, previous_run_id)
+    except Exception as e:
+        print(f"[PROMOTION] failed to tag production run: {e}")
+
+    return {"message": "Model switched successfully", "run_id": run_id}
+
 @app.post("/predict")
-async def predict(file: UploadFile = File(...)):
+async def predict(
+    request: Request,
+    file: UploadFile = File(...),
+    accept: str | None = Header(default=None),
+    x_request_id: str | None = Header(default=None),
+    timings: bool = False,
+):
+    """
+    객체 탐지 추론
+    - 모든 응답에 Server-Timing(upload/decode/queue/forward/nms/serialize) + X-Request-ID 헤더 포함
+    - timings=true 이면 JSON 응답에 timings 필드 추가 (serialize 구간은 본문 생성 전이라 제외)
+    """
     global inference_cnt, accumulated_time
     
-    if not model:
-        raise HTTPException(status_code=500, detail="Model not loaded")
+    if not startup_state["ready"]:
+        raise HTTPException(status_code=503, detail="Model not ready")
+
+    timer = StageTimer(
+        new_request_id(x_request_id),
+        started_at=getattr(request.state, "received_at", None)
+    )
     
     try:
         contents = await file.read()
-        image = Image.open(io.BytesIO(contents))
+        timer.mark("upload")
+
+        image = Image.open(io.BytesIO(contents)).convert("RGB")
+        timer.mark("decode")
 
         # [Benchmark] Start Timer
         start_time = time.time()
 
-        results = model.predict(image, imgsz=640)
+        if worker_pool:
+            # 디코딩된 프레임(BGR)을 공유 메모리로 워커에 전달
+            frame = np.asarray(image)[:, :, ::-1]
+            class_ids, conf, boxes, speed = await worker_pool.predict(frame, imgsz=inference_imgsz)
+            timer.mark_split("forward", queue=speed.get("queue", 0.0), nms=speed.get("postprocess", 0.0))
+        else:
+            results = model.predict(image, imgsz=inference_imgsz)
+            class_ids, conf, boxes = serialization.pack_detections(results)
+            speed = results[0].speed if results else {}
+            timer.mark_split("forward", nms=speed.get("postprocess") or 0.0)
 
         # [Benchmark] End Timer & Calc
         end_time = time.time()
@@ -271,32 +693,48 @@ async def predict(file: UploadFile = File(...)):
             
             if active_run_id:
                 try:
-                    mlflow.log_metric("fps", avg_fps, step=inference_cnt)
-                    mlflow.log_metric("latency_ms", avg_latency_ms, step=inference_cnt)
+                    client = benchmark_client()
+                    client.log_metric(active_run_id, "fps", avg_fps, step=inference_cnt)
+                    client.log_metric(active_run_id, "latency_ms", avg_latency_ms, step=inference_cnt)
                 except Exception as e:
                     print(f"[MLflow] Log failed: {e}")
             
             accumulated_time = 0.0
 
-
-        detections = []
-        for r in results:
-            for box in r.boxes:
-                cls = int(box.cls)
-                detections.append({
-                    "class": cls,
-                    "name": model.names[cls],
-                    "confidence": float(box.conf),
-                    "bbox": box.xyxy.tolist()[0]
-                })
-
-        return {
-            "count": len(detections),
-            "detections": detections,
-            "server_fps_check": round(30/accumulated_time, 2) if accumulated_time > 0 and (inference_cnt % 30 == 0) else None
-        }
+        # Content Negotiation (기본값 JSON)
+        media_type = serialization.negotiate(accept)
+        if media_type != serialization.MEDIA_JSON:
+            table_version = current_class_table()["version"]
+            if media_type == serialization.MEDIA_MSGPACK:
+                body = serialization.encode_msgpack(class_ids, conf, boxes, table_version)
+            else:
+                body = serialization.encode_npz(class_ids, conf, boxes, table_version)
+            response = Response(
+                content=body,
+                media_type=media_type,
+                headers={"X-Class-Table-Version": table_version},
+            )
+        else:
+            detections = serialization.detections_to_dicts(class_ids, conf, boxes, model.names)
+            content = {
+                "count": len(detections),
+                "detections": detections,
+                "server_fps_check": round(30/accumulated_time, 2) if accumulated_time > 0 and (inference_cnt % 30 == 0) else None
+            }
+            if timings:
+                content["timings"] = timer.as_dict()
+            response = JSONResponse(content=content)
+
+        timer.mark("serialize")
+        response.headers["Server-Timing"] = timer.header()
+        response.headers["X-Request-ID"] = timer.request_id
+        return response
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+        raise HTTPException(
+            status_code=500,
+            detail=str(e),
+            headers={"X-Request-ID": timer.request_id}
+        )
 
 # ==============================
 # Main Execution
@@ -0,0 +1,223 @@
+"""
+MLflow 모델 아티팩트 로컬 캐시 (Model Store)
+- run_id → 파일 내용 sha256 으로 색인 (index.json)
+- 다운로드는 store 내부 임시 디렉토리에 받은 뒤 해시 계산 → <sha256>.pt 로 atomic rename
+- 이미 받은 run_id는 네트워크 I/O 없이 바로 재사용 (재시작 / 이전 버전으로 switch 시 즉시 로드)
+- 전체 용량이 MODEL_STORE_MAX_MB 를 넘으면 가장 오래 사용하지 않은 run부터 삭제 (LRU)
+
+- /model/switch 로 교체한 운영 run_id 를 active_run_id 로 기록 → 재시작 시 MODEL_RUN_ID 가 없어도 같은 모델 로드
+  (active run 파일은 eviction 대상에서 제외)
+- 학습 자식 프로세스(incremental / evaluate / distill)도 같은 디렉토리를 사용하므로
+  index.json 변경은 파일 잠금(flock) 아래에서 최신 index 를 다시 읽은 뒤 수행
+
+index.json 예시
+{
+  "active_run_id": "<run_id>",
+  "runs": {
+    "<run_id>": {"sha256": "...", "file": "<sha256>.pt", "size": 22512345,
+                 "artifact_path": "weights/best.pt", "downloaded_at": ..., "last_used": ...}
+  }
+}
+"""
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # Windows: 프로세스 간 잠금 없이 동작
+    fcntl = None
+
+MODEL_STORE_DIR = os.getenv("MODEL_STORE_DIR", os.path.join("models", "store"))
+MODEL_STORE_MAX_BYTES = int(float(os.getenv("MODEL_STORE_MAX_MB", "2048")) * 1024 * 1024)
+# 1이면 캐시 재사용 시에도 sha256을 다시 계산하여 손상 여부 확인
+MODEL_STORE_VERIFY = os.getenv("MODEL_STORE_VERIFY", "0") == "1"
+
+INDEX_FILENAME = "index.json"
+LOCK_FILENAME = ".index.lock"
+DEFAULT_ARTIFACT_PATH = "weights/best.pt"
+
+
+def sha256_file(path, chunk_size=1024 * 1024):
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+class ModelStore:
+    def __init__(self, root=MODEL_STORE_DIR, max_bytes=MODEL_STORE_MAX_BYTES, verify=MODEL_STORE_VERIFY):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.verify = verify
+        self.index_path = os.path.join(root, INDEX_FILENAME)
+        self.lock_path = os.path.join(root, LOCK_FILENAME)
+        self._lock = threading.Lock()
+        os.makedirs(root, exist_ok=True)
+        self._index = self._load_index()
+
+    # ==============================
+    # Index
+    # ==============================
+    def _load_index(self):
+        try:
+            with open(self.index_path, "r", encoding="utf-8") as f:
+                index = json.load(f)
+            index.setdefault("runs", {})
+            return index
+        except FileNotFoundError:
+            return {"runs": {}}
+        except (OSError, ValueError) as e:
+            print(f"[MODEL_STORE] index unreadable, starting empty: {e}")
+            return {"runs": {}}
+
+    @contextmanager
+    def _locked(self):
+        """스레드 + 프로세스 간 잠금 후 index.json 을 다시 읽음 (다른 프로세스의 변경을 덮어쓰지 않도록)"""
+        with self._lock, open(self.lock_path, "a") as lock_file:
+            if fcntl:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                self._index = self._load_index()
+                yield self._index
+            finally:
+                if fcntl:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _save_index(self):
+        fd, tmp_path = tempfile.mkstemp(dir=self.root, prefix=".index.", suffix=".tmp")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(self._index, f, indent=2)
+        os.replace(tmp_path, self.index_path)
+
+    def _path_of(self, entry):
+        return os.path.join(self.root, entry["file"])
+
+    # ==============================
+    # Active Run
+    # ==============================
+    def active_run_id(self):
+        with self._locked():
+            return self._index.get("active_run_id")
+
+    def set_active(self, run_id):
+        """현재 서빙 중인 run 기록 (재시작 시 resolve_model_path 가 사용)"""
+        with self._locked():
+            self._index["active_run_id"] = run_id
+            self._save_index()
+
+    # ==============================
+    # Lookup / Fetch
+    # ==============================
+    def lookup(self, run_id, artifact_path=DEFAULT_ARTIFACT_PATH):
+        """캐시에 있으면 로컬 경로, 없거나 손상되었으면 None"""
+        with self._locked():
+            entry = self._index["runs"].get(run_id)
+            if not entry or entry.get("artifact_path") != artifact_path:
+                return None
+
+            path = self._path_of(entry)
+            if not os.path.exists(path) or os.path.getsize(path) != entry["size"]:
+                print(f"[MODEL_STORE] cached file missing or truncated: run_id={run_id}")
+                self._index["runs"].pop(run_id, None)
+                self._save_index()
+                return None
+            if self.verify and sha256_file(path) != entry["sha256"]:
+                print(f"[MODEL_STORE] checksum mismatch: run_id={run_id}")
+                self._index["runs"].pop(run_id, None)
+                self._save_index()
+                return None
+
+            entry["last_used"] = time.time()
+            self._save_index()
+            return path
+
+    def fetch(self, run_id, artifact_path=DEFAULT_ARTIFACT_PATH, protect=()):
+        """
+        run_id의 아티팩트 로컬 경로 반환 (캐시 miss 시에만 MLflow에서 다운로드)
+        - protect: eviction 대상에서 제외할 로컬 경로 (현재 서빙 중인 모델 등)
+        """
+        path = self.lookup(run_id, artifact_path)
+        if path:
+            print(f"[MODEL_STORE] cache hit: run_id={run_id} → {path}")
+            return path
+
+        import mlflow
+
+        print(f"[MODEL_STORE] cache miss: downloading run_id={run_id} ({artifact_path})")
+        tmp_dir = tempfile.mkdtemp(dir=self.root, prefix=".download.")
+        try:
+            downloaded = mlflow.artifacts.download_artifacts(
+                run_id=run_id,
+                artifact_path=artifact_path,
+                dst_path=tmp_dir
+            )
+            digest = sha256_file(downloaded)
+            size = os.path.getsize(downloaded)
+            filename = f"{digest}{os.path.splitext(downloaded)[1] or '.pt'}"
+            dest = os.path.join(self.root, filename)
+
+            with self._locked():
+                # 같은 내용의 파일이 이미 있으면 (다른 run_id와 동일 가중치) 그대로 공유
+                if not os.path.exists(dest):
+                    os.replace(downloaded, dest)
+                now = time.time()
+                self._index["runs"][run_id] = {
+                    "sha256": digest,
+                    "file": filename,
+                    "size": size,
+                    "artifact_path": artifact_path,
+                    "downloaded_at": now,
+                    "last_used": now,
+                }
+                self._evict(protect=set(protect) | {dest})
+                self._save_index()
+            print(f"[MODEL_STORE] stored run_id={run_id} sha256={digest[:12]} size={size}")
+            return dest
+        finally:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+
+    # ==============================
+    # Eviction
+    # ==============================
+    def total_bytes(self):
+        files = {entry["file"]: entry["size"] for entry in self._index["runs"].values()}
+        return sum(files.values())
+
+    def _evict(self, protect):
+        """용량 초과 시 LRU 순으로 run 제거. 다른 run이 참조하지 않는 파일만 삭제"""
+        protect = {os.path.abspath(p) for p in protect}
+        runs = self._index["runs"]
+        active = runs.get(self._index.get("active_run_id"))
+        if active:
+            protect.add(os.path.abspath(self._path_of(active)))
+        for run_id, entry in sorted(runs.items(), key=lambda kv: kv[1].get("last_used", 0)):
+            if self.total_bytes() <= self.max_bytes:
+                break
+            path = self._path_of(entry)
+            if os.path.abspath(path) in protect:
+                continue
+            runs.pop(run_id)
+            if not any(e["file"] == entry["file"] for e in runs.values()):
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+            print(f"[MODEL_STORE] evicted run_id={run_id} ({entry['size']} bytes)")
+
+    def list(self):
+        with self._locked():
+            return [
+                {"run_id": run_id, **entry}
+                for run_id, entry in sorted(
+                    self._index["runs"].items(),
+                    key=lambda kv: kv[1].get("last_used", 0),
+                    reverse=True,
+                )
+            ]
@@ -0,0 +1,160 @@
+"""
+Detection 응답 직렬화 (Content Negotiation)
+- application/json     : 기본값. 기존 응답 형식 그대로 (detection 당 dict)
+- application/msgpack  : 배열을 raw bytes로 담은 msgpack map
+- application/x-npz    : NumPy packed layout (np.savez, 비압축)
+
+바이너리 포맷은 클래스 이름을 싣지 않고 class id만 보냄
+→ 클래스 이름 테이블은 GET /classes 로 한 번만 받아두고,
+  응답 헤더 X-Class-Table-Version 이 바뀌었을 때만 다시 받으면 됨
+
+바이너리 배열 레이아웃 (little-endian)
+- class_ids : int16   (N,)
+- conf      : float16 (N,)
+- boxes     : float32 (N, 4)  xyxy
+"""
+import hashlib
+import io
+import json
+
+import numpy as np
+
+try:
+    import msgpack
+except ImportError:  # msgpack 미설치 시 JSON / NPZ만 지원
+    msgpack = None
+
+MEDIA_JSON = "application/json"
+MEDIA_MSGPACK = "application/msgpack"
+MEDIA_NPZ = "application/x-npz"
+
+# 클라이언트가 보낼 수 있는 별칭
+_MEDIA_ALIASES = {
+    "application/x-msgpack": MEDIA_MSGPACK,
+    "application/vnd.msgpack": MEDIA_MSGPACK,
+    "application/npz": MEDIA_NPZ,
+}
+
+CLASS_ID_DTYPE = np.dtype("<i2")
+CONF_DTYPE = np.dtype("<f2")
+BOX_DTYPE = np.dtype("<f4")
+
+
+def supported_media_types():
+    types = [MEDIA_JSON, MEDIA_NPZ]
+    if msgpack is not None:
+        types.append(MEDIA_MSGPACK)
+    return types
+
+
+def negotiate(accept_header):
+    """
+    Accept 헤더에서 지원하는 media type 선택
+    - q 값이 높은 순, 같으면 헤더에 나온 순
+    - 지원하는 타입이 없거나 */* 이면 JSON
+    """
+    if not accept_header:
+        return MEDIA_JSON
+
+    supported = supported_media_types()
+    candidates = []
+    for order, part in enumerate(accept_header.split(",")):
+        fields = [f.strip() for f in part.split(";")]
+        media = _MEDIA_ALIASES.get(fields[0].lower(), fields[0].lower())
+        q = 1.0
+        for param in fields[1:]:
+            if param.startswith("q="):
+                try:
+                    q = float(param[2:])
+                except ValueError:
+                    q = 0.0
+        if q > 0:
+            candidates.append((-q, order, media))
+
+    for _, _, media in sorted(candidates):
+        if media in supported:
+            return media
+        if media in ("*/*", "application/*"):
+            return MEDIA_JSON
+    return MEDIA_JSON
+
+
+# ==============================
+# Class Table
+# ==============================
+def class_table(names):
+    """model.names(dict | list) → {"version", "names"}"""
+    if isinstance(names, dict):
+        table = {int(k): str(v) for k, v in names.items()}
+    else:
+        table = {i: str(v) for i, v in enumerate(names)}
+    raw = json.dumps(table, sort_keys=True, ensure_ascii=False).encode("utf-8")
+    return {
+        "version": hashlib.sha1(raw).hexdigest()[:12],
+        "names": table,
+    }
+
+
+# ==============================
+# Detections
+# ==============================
+def pack_detections(results):
+    """
+    ultralytics Results 리스트 → (class_ids, conf, boxes) numpy 배열
+    - conf는 JSON 응답 정밀도를 유지하기 위해 float32로 두고, 바이너리 인코딩 시 float16으로 변환
+    """
+    cls_list, conf_list, box_list = [], [], []
+    for r in results:
+        if r.boxes is None or len(r.boxes) == 0:
+            continue
+        cls_list.append(r.boxes.cls.cpu().numpy())
+        conf_list.append(r.boxes.conf.cpu().numpy())
+        box_list.append(r.boxes.xyxy.cpu().numpy())
+
+    if not cls_list:
+        return (
+            np.zeros(0, dtype=CLASS_ID_DTYPE),
+            np.zeros(0, dtype=np.float32),
+            np.zeros((0, 4), dtype=BOX_DTYPE),
+        )
+    return (
+        np.concatenate(cls_list).astype(CLASS_ID_DTYPE),
+        np.concatenate(conf_list).astype(np.float32),
+        np.concatenate(box_list).astype(BOX_DTYPE).reshape(-1, 4),
+    )
+
+
+def detections_to_dicts(class_ids, conf, boxes, names):
+    """기존 JSON 응답 형식 (detection 당 dict)"""
+    return [
+        {
+            "class": int(c),
+            "name": names[int(c)],
+            "confidence": float(p),
+            "bbox": b,
+        }
+        for c, p, b in zip(class_ids.tolist(), conf.tolist(), boxes.tolist())
+    ]
+
+
+def encode_msgpack(class_ids, conf, boxes, table_version):
+    payload = {
+        "count": int(class_ids.shape[0]),
+        "class_table": table_version,
+        "class_ids": class_ids.astype(CLASS_ID_DTYPE).tobytes(),
+        "conf": conf.astype(CONF_DTYPE).tobytes(),
+        "boxes": boxes.astype(BOX_DTYPE).tobytes(),
+    }
+    return msgpack.packb(payload, use_bin_type=True)
+
+
+def encode_npz(class_ids, conf, boxes, table_version):
+    buf = io.BytesIO()
+    np.savez(
+        buf,
+        class_ids=class_ids.astype(CLASS_ID_DTYPE),
+        conf=conf.astype(CONF_DTYPE),
+        boxes=boxes.astype(BOX_DTYPE),
+        class_table=np.array(table_version),
+    )
+    return buf.getvalue()
@@ -0,0 +1,87 @@
+"""
+요청 단계별 소요 시간 측정 (Server-Timing)
+- upload    : 요청 수신 ~ 업로드 파일 읽기 완료 (multipart 파싱 포함)
+- decode    : 이미지 디코딩
+- queue     : 워커 슬롯/워커 대기 (Supervisor Mode에서만 0이 아님)
+- forward   : 전처리 + 모델 forward
+- nms       : 후처리(NMS)
+- serialize : 응답 직렬화
+
+perf_counter 차이만 기록하므로 운영 환경에서 항상 켜 두어도 부담이 없음
+"""
+import re
+import time
+import uuid
+
+STAGES = ("upload", "decode", "queue", "forward", "nms", "serialize")
+
+# Server-Timing desc="..." / 응답 헤더에 그대로 들어가므로 안전한 문자만 허용
+_UNSAFE_ID_CHARS = re.compile(r"[^A-Za-z0-9._:-]")
+REQUEST_ID_MAX_LEN = 64
+
+
+class RequestStartMiddleware:
+    """요청 수신 시각을 scope state에 기록하는 순수 ASGI 미들웨어 (upload 구간 측정용)"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http":
+            scope.setdefault("state", {})["received_at"] = time.perf_counter()
+        await self.app(scope, receive, send)
+
+
+def new_request_id(incoming=None):
+    """클라이언트가 보낸 X-Request-ID 가 있으면 안전한 문자만 남겨 사용 (따옴표/쉼표 등은 '_' 로 치환)"""
+    if incoming:
+        sanitized = _UNSAFE_ID_CHARS.sub("_", incoming[:REQUEST_ID_MAX_LEN])
+        if sanitized.strip("_"):
+            return sanitized
+    return uuid.uuid4().hex[:16]
+
+
+class StageTimer:
+    def __init__(self, request_id, started_at=None):
+        self.request_id = request_id
+        self.started_at = started_at or time.perf_counter()
+        self.stages = {}
+        self._last = self.started_at
+
+    def mark(self, stage):
+        """직전 mark 이후 경과 시간을 stage에 누적"""
+        now = time.perf_counter()
+        self.stages[stage] = self.stages.get(stage, 0.0) + (now - self._last) * 1000
+        self._last = now
+
+    def mark_split(self, rest_stage, **known_ms):
+        """
+        직전 mark 이후 경과 시간 중 known_ms 는 각 stage로, 나머지는 rest_stage로 기록
+        (예: 모델 호출 구간을 forward / nms 로 나눌 때 ultralytics speed 값 사용)
+        """
+        now = time.perf_counter()
+        elapsed = (now - self._last) * 1000
+        for stage, ms in known_ms.items():
+            self.add(stage, ms)
+            elapsed -= ms
+        self.add(rest_stage, max(elapsed, 0.0))
+        self._last = now
+
+    def add(self, stage, ms):
+        self.stages[stage] = self.stages.get(stage, 0.0) + float(ms)
+
+    def total_ms(self):
+        return (time.perf_counter() - self.started_at) * 1000
+
+    def as_dict(self):
+        return {
+            "request_id": self.request_id,
+            **{stage: round(self.stages[stage], 3) for stage in STAGES if stage in self.stages},
+            "total": round(self.total_ms(), 3),
+        }
+
+    def header(self):
+        parts = [f"{stage};dur={self.stages[stage]:.2f}" for stage in STAGES if stage in self.stages]
+        parts.append(f"total;dur={self.total_ms():.2f}")
+        parts.append(f'req;desc="{self.request_id}"')
+        return ", ".join(parts)
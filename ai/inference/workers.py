@@ -0,0 +1,344 @@
+"""
+멀티 프로세스 추론 워커 풀 (Supervisor Mode)
+- INFERENCE_WORKERS=N (N > 0) 이면 모델 워커 프로세스 N개를 띄움
+- 각 워커는 CPU 코어 부분집합에 고정(sched_setaffinity)되고, torch 스레드 수도 그 코어 수로 제한
+- 디코딩된 프레임은 pickle 대신 워커별 multiprocessing.shared_memory 링 버퍼 슬롯으로 전달
+- 요청은 처리 중인 작업 수가 가장 적은 워커로 라우팅 (least-loaded)
+- 각 워커는 모델 로드 + warm-up predict 후 ready 를 보고 → wait_ready() 가 끝나야 서버 readiness 전환
+- 종료된 워커는 감시 태스크가 감지하여 대기 중인 요청을 실패 처리하고 슬롯을 회수한 뒤 다시 띄움
+
+메인 프로세스(uvicorn)는 업로드 수신/디코딩/응답 직렬화만 담당하고,
+전처리 + forward + NMS는 워커 프로세스에서 GIL 경합 없이 병렬로 수행됨
+"""
+import asyncio
+import itertools
+import os
+import sys
+import threading
+import time
+from multiprocessing import get_context, shared_memory
+
+import numpy as np
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+# ==============================
+# Config
+# ==============================
+INFERENCE_WORKERS = int(os.getenv("INFERENCE_WORKERS", "0"))
+WORKER_RING_SLOTS = int(os.getenv("INFERENCE_WORKER_SLOTS", "4"))
+# 슬롯 하나에 담을 수 있는 프레임의 최대 변 길이 (더 큰 프레임은 비율 유지 축소)
+WORKER_MAX_SIDE = int(os.getenv("INFERENCE_WORKER_MAX_SIDE", "1280"))
+WORKER_TIMEOUT = float(os.getenv("INFERENCE_WORKER_TIMEOUT", "30"))
+# 워커 시작(torch import + 모델 로드 + warm-up) 대기 시간
+WORKER_READY_TIMEOUT = float(os.getenv("INFERENCE_WORKER_READY_TIMEOUT", "300"))
+WORKER_MONITOR_INTERVAL = 1.0
+
+
+def partition_cpus(num_workers, cpus=None):
+    """사용 가능한 코어를 워커 수만큼 연속 구간으로 분할"""
+    if cpus is None:
+        if hasattr(os, "sched_getaffinity"):
+            cpus = sorted(os.sched_getaffinity(0))
+        else:
+            cpus = list(range(os.cpu_count() or 1))
+    if num_workers >= len(cpus):
+        return [[cpus[i % len(cpus)]] for i in range(num_workers)]
+    chunks = np.array_split(np.array(cpus), num_workers)
+    return [chunk.tolist() for chunk in chunks]
+
+
+# ==============================
+# Worker Process
+# ==============================
+def _worker_main(worker_id, generation, model_path, cpus, shm_name, slot_bytes, warmup_imgsz,
+                 task_queue, result_queue):
+    """
+    워커 프로세스 진입점
+    - task  : ("predict", req_id, slot, shape, imgsz) | ("reload", model_path) | None(종료)
+    - result: ("ready", worker_id, generation) |
+              ("result", worker_id, generation, slot, req_id, payload | None, error | None)
+    """
+    # torch import 전에 스레드 수를 고정해야 OpenMP 풀이 코어 수에 맞게 생성됨
+    threads = str(len(cpus))
+    for var in ("OMP_NUM_THREADS", "MKL_NUM_THREADS", "OPENBLAS_NUM_THREADS"):
+        os.environ[var] = threads
+    if hasattr(os, "sched_setaffinity"):
+        os.sched_setaffinity(0, cpus)
+
+    import torch
+    from ultralytics import YOLO
+    try:
+        from inference.serialization import pack_detections
+    except ImportError:
+        from ai.inference.serialization import pack_detections
+
+    torch.set_num_threads(len(cpus))
+    model = YOLO(model_path)
+    # 첫 요청의 lazy init 비용을 ready 보고 전에 지불
+    model.predict(np.zeros((warmup_imgsz, warmup_imgsz, 3), dtype=np.uint8), imgsz=warmup_imgsz, verbose=False)
+    shm = shared_memory.SharedMemory(name=shm_name)
+    result_queue.put(("ready", worker_id, generation))
+    print(f"[WORKER-{worker_id}] ready | cpus={cpus} model={model_path}")
+
+    try:
+        while True:
+            task = task_queue.get()
+            if task is None:
+                break
+
+            if task[0] == "reload":
+                try:
+                    model = YOLO(task[1])
+                    print(f"[WORKER-{worker_id}] model reloaded: {task[1]}")
+                except Exception as e:
+                    print(f"[WORKER-{worker_id}] reload failed: {e}")
+                continue
+
+            _, req_id, slot, shape, imgsz = task
+            # CLOCK_MONOTONIC 은 프로세스 간 공유되므로 부모의 제출 시각과 비교해 대기 시간 계산 가능
+            started_at = time.monotonic()
+            try:
+                # 공유 메모리 슬롯을 복사 없이 그대로 BGR 프레임으로 사용
+                frame = np.ndarray(shape, dtype=np.uint8, buffer=shm.buf, offset=slot * slot_bytes)
+                results = model.predict(frame, imgsz=imgsz, verbose=False)
+                class_ids, conf, boxes = pack_detections(results)
+                speed = dict(results[0].speed) if results else {}
+                speed["started_at"] = started_at
+                result_queue.put(("result", worker_id, generation, slot, req_id, (class_ids, conf, boxes, speed), None))
+            except Exception as e:
+                result_queue.put(("result", worker_id, generation, slot, req_id, None, str(e)))
+            finally:
+                frame = None
+    finally:
+        shm.close()
+
+
+# ==============================
+# Supervisor
+# ==============================
+class WorkerPool:
+    """
+    모델 워커 프로세스 N개를 관리하는 Supervisor
+    - start()/close() 는 lifespan에서 호출
+    - predict()는 이벤트 루프에서만 호출 (슬롯/부하 상태는 루프 스레드에서만 변경)
+    """
+
+    def __init__(self, num_workers, model_path, slots=WORKER_RING_SLOTS, max_side=WORKER_MAX_SIDE,
+                 warmup_imgsz=640):
+        self.num_workers = num_workers
+        self.model_path = model_path
+        self.slots = slots
+        self.max_side = max_side
+        self.slot_bytes = max_side * max_side * 3
+        self.warmup_imgsz = warmup_imgsz
+
+        self._ctx = get_context("spawn")
+        self._cpus = partition_cpus(num_workers)
+        self._procs = []
+        self._shms = []
+        self._task_queues = []
+        self._result_queue = None
+        self._free_slots = []
+        self._inflight = []
+        # 워커 재시작 횟수: 죽은 워커가 남긴 메시지를 새 워커의 것으로 처리하지 않도록 구분
+        self._generations = []
+        self._ready = []
+        self._pending = {}
+        self._req_ids = itertools.count()
+        self._slot_sem = None
+        self._loop = None
+        self._collector = None
+        self._monitor = None
+        self._closing = False
+
+    def start(self):
+        self._loop = asyncio.get_running_loop()
+        self._result_queue = self._ctx.Queue()
+        self._slot_sem = asyncio.Semaphore(self.num_workers * self.slots)
+
+        for worker_id in range(self.num_workers):
+            self._shms.append(shared_memory.SharedMemory(create=True, size=self.slots * self.slot_bytes))
+            self._procs.append(None)
+            self._task_queues.append(None)
+            self._free_slots.append(list(range(self.slots)))
+            self._inflight.append(0)
+            self._generations.append(-1)
+            self._ready.append(self._loop.create_future())
+            self._spawn(worker_id)
+
+        self._collector = threading.Thread(target=self._collect_results, daemon=True)
+        self._collector.start()
+        self._monitor = asyncio.create_task(self._monitor_workers())
+        print(f"[WORKERS] started {self.num_workers} workers | slots={self.slots} max_side={self.max_side}")
+
+    def _spawn(self, worker_id):
+        # 죽은 프로세스가 큐 내부 잠금을 잡은 채 종료되었을 수 있으므로 작업 큐는 새로 생성
+        self._generations[worker_id] += 1
+        self._task_queues[worker_id] = self._ctx.Queue()
+        proc = self._ctx.Process(
+            target=_worker_main,
+            args=(worker_id, self._generations[worker_id], self.model_path, self._cpus[worker_id],
+                  self._shms[worker_id].name, self.slot_bytes, self.warmup_imgsz,
+                  self._task_queues[worker_id], self._result_queue),
+            daemon=True,
+            name=f"inference-worker-{worker_id}",
+        )
+        proc.start()
+        self._procs[worker_id] = proc
+
+    async def wait_ready(self, timeout=WORKER_READY_TIMEOUT):
+        """모든 워커가 모델 로드 + warm-up 을 마칠 때까지 대기"""
+        await asyncio.wait_for(asyncio.gather(*self._ready), timeout=timeout)
+        print(f"[WORKERS] all {self.num_workers} workers ready")
+
+    def _is_ready(self, worker_id):
+        ready = self._ready[worker_id]
+        return ready.done() and not ready.cancelled() and ready.exception() is None
+
+    async def _monitor_workers(self):
+        while not self._closing:
+            await asyncio.sleep(WORKER_MONITOR_INTERVAL)
+            for worker_id, proc in enumerate(self._procs):
+                if not self._closing and not proc.is_alive():
+                    self._restart(worker_id, proc.exitcode)
+
+    def _restart(self, worker_id, exitcode):
+        """죽은 워커의 대기 요청 실패 처리 + 슬롯 / 세마포어 회수 후 재시작"""
+        print(f"[WORKERS] worker {worker_id} died (exitcode={exitcode}) → restarting")
+        for req_id, (fut, owner) in list(self._pending.items()):
+            if owner == worker_id:
+                self._pending.pop(req_id)
+                if not fut.done():
+                    fut.set_exception(RuntimeError(f"inference worker {worker_id} died"))
+        for _ in range(self._inflight[worker_id]):
+            self._slot_sem.release()
+        self._inflight[worker_id] = 0
+        self._free_slots[worker_id] = list(range(self.slots))
+
+        ready = self._ready[worker_id]
+        if not ready.done():
+            # 시작 중에 죽었으면 wait_ready() 를 기다리는 쪽에 알림
+            ready.set_exception(RuntimeError(f"inference worker {worker_id} exited during startup"))
+            ready.exception()
+        self._ready[worker_id] = self._loop.create_future()
+        self._spawn(worker_id)
+
+    def _collect_results(self):
+        while True:
+            item = self._result_queue.get()
+            if item is None:
+                break
+            self._loop.call_soon_threadsafe(self._on_message, item)
+
+    def _on_message(self, item):
+        kind, worker_id, generation = item[:3]
+        if generation != self._generations[worker_id]:
+            # 이미 재시작된 워커의 메시지 (슬롯은 _restart 에서 회수됨)
+            return
+        if kind == "ready":
+            if not self._ready[worker_id].done():
+                self._ready[worker_id].set_result(True)
+            return
+        self._on_result(worker_id, *item[3:])
+
+    def _on_result(self, worker_id, slot, req_id, payload, error):
+        # 슬롯 반환은 결과 도착 시점에만 수행 (timeout 이후에도 워커가 읽는 중일 수 있으므로)
+        self._free_slots[worker_id].append(slot)
+        self._inflight[worker_id] -= 1
+        self._slot_sem.release()
+
+        fut, _ = self._pending.pop(req_id, (None, None))
+        if fut is None or fut.done():
+            return
+        if error:
+            fut.set_exception(RuntimeError(error))
+        else:
+            fut.set_result(payload)
+
+    def _fit_frame(self, frame):
+        """
+        슬롯 크기(max_side)에 맞게 축소
+        Returns: (frame, (sx, sy)) - 축소 좌표 → 원본 좌표 배율 (축소하지 않으면 None)
+        """
+        h, w = frame.shape[:2]
+        if max(h, w) <= self.max_side:
+            return frame, None
+        import cv2
+        scale = self.max_side / max(h, w)
+        new_w, new_h = max(1, int(w * scale)), max(1, int(h * scale))
+        resized = cv2.resize(frame, (new_w, new_h), interpolation=cv2.INTER_AREA)
+        return resized, (w / new_w, h / new_h)
+
+    async def predict(self, frame, imgsz=640):
+        """
+        BGR uint8 프레임(H, W, 3) 추론
+        Returns: (class_ids, conf, boxes, speed)
+          - boxes: 원본 프레임 기준 xyxy (슬롯에 맞게 축소했다면 다시 원본 좌표로 환산)
+          - speed: ultralytics speed(ms) + "queue"(슬롯/워커 대기 ms)
+        """
+        fitted, restore = self._fit_frame(frame)
+        frame = np.ascontiguousarray(fitted, dtype=np.uint8)
+        submitted_at = time.monotonic()
+
+        await self._slot_sem.acquire()
+        # 재시작 중(ready 전)인 워커로는 보내지 않음
+        candidates = [i for i in range(self.num_workers) if self._free_slots[i] and self._is_ready(i)]
+        if not candidates:
+            self._slot_sem.release()
+            raise RuntimeError("No inference worker available (restarting)")
+        worker_id = min(candidates, key=lambda i: self._inflight[i])
+        slot = self._free_slots[worker_id].pop()
+        self._inflight[worker_id] += 1
+
+        view = np.ndarray(frame.shape, dtype=np.uint8,
+                          buffer=self._shms[worker_id].buf, offset=slot * self.slot_bytes)
+        view[...] = frame
+        del view
+
+        req_id = next(self._req_ids)
+        fut = self._loop.create_future()
+        self._pending[req_id] = (fut, worker_id)
+        self._task_queues[worker_id].put(("predict", req_id, slot, frame.shape, imgsz))
+
+        try:
+            class_ids, conf, boxes, speed = await asyncio.wait_for(fut, timeout=WORKER_TIMEOUT)
+        finally:
+            self._pending.pop(req_id, None)
+        speed["queue"] = max(speed.pop("started_at", submitted_at) - submitted_at, 0.0) * 1000
+        if restore is not None and len(boxes):
+            sx, sy = restore
+            boxes = (boxes.astype(np.float32) * np.array([sx, sy, sx, sy], dtype=np.float32)).astype(boxes.dtype)
+        return class_ids, conf, boxes, speed
+
+    def reload(self, model_path):
+        """모든 워커에 모델 교체 지시 (진행 중인 요청 처리 후 순서대로 반영)"""
+        self.model_path = model_path
+        for task_queue in self._task_queues:
+            task_queue.put(("reload", model_path))
+
+    def stats(self):
+        return {
+            "workers": self.num_workers,
+            "alive": sum(1 for p in self._procs if p.is_alive()),
+            "ready": sum(1 for i in range(self.num_workers) if self._is_ready(i)),
+            "restarts": sum(self._generations),
+            "inflight": list(self._inflight),
+        }
+
+    def close(self):
+        self._closing = True
+        if self._monitor:
+            self._monitor.cancel()
+        for task_queue in self._task_queues:
+            task_queue.put(None)
+        for proc in self._procs:
+            proc.join(timeout=10)
+            if proc.is_alive():
+                proc.terminate()
+        if self._result_queue is not None:
+            self._result_queue.put(None)
+        for shm in self._shms:
+            shm.close()
+            shm.unlink()
+        print("[WORKERS] stopped")
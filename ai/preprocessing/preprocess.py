@@ -1,34 +1,347 @@
 # ai/preprocessing/preprocess.py
+"""
+YOLO 데이터셋 검증 + 통계
+- data.yaml 의 모든 split(train / val / test)을 프로세스 풀로 병렬 검사
+- 이미지: 열기 / 헤더 검증, 잘린(truncated) JPEG 탐지, 내용 sha256 → 중복(split 간 누수 포함) 탐지
+- 라벨: 줄 형식(class cx cy w h 또는 polygon), class id 범위(data.yaml nc), 좌표 범위(0~1), 0 크기 박스
+- 통계: 클래스별 인스턴스 / 이미지 수, 박스 크기 분포(small / medium / large, COCO 기준 픽셀 면적)
+- manifest(파일 크기 + 수정시각 → 검사 결과)를 저장하여 재실행 시 바뀐 파일만 다시 검사
+
+실행 방법 (ai/ 디렉토리 기준):
+$ python -m preprocessing.preprocess --dataset /data/dataset
+$ python -m preprocessing.preprocess --dataset /data/dataset --report report.json --workers 8
+"""
+import argparse
+import hashlib
+import io
+import json
 import os
+import sys
+import time
+from collections import Counter, defaultdict
+from concurrent.futures import ProcessPoolExecutor
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+try:
+    from training.dataset_cache import SPLITS, available_cpus, dataset_root, label_path, load_data_yaml, split_images
+except ImportError:
+    from ai.training.dataset_cache import SPLITS, available_cpus, dataset_root, label_path, load_data_yaml, split_images
+
+DATASET_PATH = os.getenv("DATASET_PATH", "/data/dataset")
+MANIFEST_FILENAME = ".validation_manifest.json"
+# 2: JPEG EOI 검사 방식 변경 → 이전 결과 재검사
+MANIFEST_VERSION = 2
+
+# 좌표 허용 오차 (라벨링 툴 반올림)
+COORD_TOLERANCE = 1e-3
+# COCO 기준 박스 면적 구간 (픽셀^2)
+SMALL_AREA = 32 ** 2
+MEDIUM_AREA = 96 ** 2
+
+
+def _signature(path):
+    try:
+        st = os.stat(path)
+        return [st.st_size, st.st_mtime_ns]
+    except FileNotFoundError:
+        return None
+
+
+# ==============================
+# Per-file Check (worker process)
+# ==============================
+def _check_image(path):
+    """Returns: (sha256, width, height, errors)"""
+    from PIL import Image
+
+    with open(path, "rb") as f:
+        data = f.read()
+    digest = hashlib.sha256(data).hexdigest()
+    if not data:
+        return digest, None, None, ["empty image file"]
+
+    errors = []
+    width = height = None
+    try:
+        with Image.open(io.BytesIO(data)) as im:
+            im.verify()
+        with Image.open(io.BytesIO(data)) as im:
+            width, height = im.size
+            fmt = im.format
+        # 잘린 JPEG 탐지 (업로드 중단 등). EOI 마커(FFD9)로 끝나지 않으면
+        # 휴대폰 / 편집기가 EOI 뒤에 데이터를 덧붙인 정상 파일일 수 있으므로 전체 디코딩으로 확인
+        if fmt == "JPEG" and not data.rstrip(b"\x00").endswith(b"\xff\xd9"):
+            with Image.open(io.BytesIO(data)) as im:
+                im.load()
+    except Exception as e:
+        errors.append(f"corrupt image: {e}")
+    return digest, width, height, errors
+
+
+def _check_label(path, nc):
+    """Returns: (boxes [[cls, w, h], ...], errors)"""
+    boxes, errors = [], []
+    with open(path, "r", encoding="utf-8") as f:
+        for lineno, line in enumerate(f, 1):
+            parts = line.split()
+            if not parts:
+                continue
+            # bbox: class cx cy w h / polygon: class x1 y1 x2 y2 ... (좌표 쌍 3개 이상)
+            if len(parts) != 5 and (len(parts) < 7 or len(parts) % 2 == 0):
+                errors.append(f"line {lineno}: expected 5 values or a polygon, got {len(parts)}")
+                continue
+            try:
+                cls = int(parts[0])
+                coords = [float(v) for v in parts[1:]]
+            except ValueError:
+                errors.append(f"line {lineno}: non-numeric value")
+                continue
+            if not 0 <= cls < nc:
+                errors.append(f"line {lineno}: class id {cls} out of range [0, {nc})")
+            if any(v < -COORD_TOLERANCE or v > 1 + COORD_TOLERANCE for v in coords):
+                errors.append(f"line {lineno}: coordinates outside [0, 1]")
+
+            if len(coords) == 4:
+                w, h = coords[2], coords[3]
+            else:
+                xs, ys = coords[0::2], coords[1::2]
+                w, h = max(xs) - min(xs), max(ys) - min(ys)
+            if w <= 0 or h <= 0:
+                errors.append(f"line {lineno}: zero-size box")
+            boxes.append([cls, round(w, 6), round(h, 6)])
+    return boxes, errors
+
+
+def check_file(job):
+    """이미지 1장 + 라벨 검사 (ProcessPoolExecutor 에서 실행)"""
+    split, image, label, nc = job
+    record = {
+        "split": split,
+        "label": label,
+        "image_sig": _signature(image),
+        "label_sig": _signature(label),
+        "errors": [],
+        "warnings": [],
+        "boxes": [],
+    }
+    try:
+        record["sha256"], record["width"], record["height"], errors = _check_image(image)
+        record["errors"].extend(errors)
+    except OSError as e:
+        record.update(sha256=None, width=None, height=None)
+        record["errors"].append(f"unreadable image: {e}")
+
+    if record["label_sig"] is None:
+        record["warnings"].append("missing label (treated as background)")
+    else:
+        try:
+            record["boxes"], errors = _check_label(label, nc)
+            record["errors"].extend(errors)
+        except (OSError, UnicodeDecodeError) as e:
+            record["errors"].append(f"unreadable label: {e}")
+    return image, record
+
 
-DATASET_PATH = "C:/Users/SSAFY/Desktop/smart-cart-detection.v1i.yolov8"
+# ==============================
+# Manifest
+# ==============================
+def load_manifest(path, names_key):
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+    except (FileNotFoundError, ValueError):
+        return {}
+    # 클래스 정의가 바뀌면 라벨 검사 결과가 달라지므로 전체 재검사
+    if manifest.get("version") != MANIFEST_VERSION or manifest.get("names_key") != names_key:
+        return {}
+    return manifest.get("files", {})
 
 
-def validate_dataset():
+def save_manifest(path, names_key, files):
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump({"version": MANIFEST_VERSION, "names_key": names_key, "files": files}, f)
+    os.replace(tmp_path, path)
+
+
+# ==============================
+# Statistics
+# ==============================
+def build_stats(files, names):
+    instances = Counter()
+    images_with = Counter()
+    sizes = defaultdict(Counter)
+    split_counts = Counter()
+    background = 0
+    for record in files.values():
+        split_counts[record["split"]] += 1
+        if not record["boxes"]:
+            background += 1
+        for cls in {b[0] for b in record["boxes"]}:
+            images_with[cls] += 1
+        for cls, w, h in record["boxes"]:
+            instances[cls] += 1
+            if record.get("width") and record.get("height"):
+                area = w * record["width"] * h * record["height"]
+                bucket = "small" if area < SMALL_AREA else "medium" if area < MEDIUM_AREA else "large"
+                sizes[cls][bucket] += 1
+
+    def name_of(cls):
+        if isinstance(names, dict):
+            return names.get(cls, str(cls))
+        return names[cls] if 0 <= cls < len(names) else str(cls)
+
+    total = sum(instances.values()) or 1
+    classes = {
+        name_of(cls): {
+            "instances": instances[cls],
+            "images": images_with[cls],
+            "share": round(instances[cls] / total, 4),
+            "sizes": dict(sizes[cls]),
+        }
+        for cls in sorted(instances)
+    }
+    counts = [v["instances"] for v in classes.values()]
+    return {
+        "images": dict(split_counts),
+        "background_images": background,
+        "instances": sum(instances.values()),
+        "classes": classes,
+        # 가장 많은 클래스 / 가장 적은 클래스 인스턴스 비율
+        "imbalance_ratio": round(max(counts) / min(counts), 2) if counts else None,
+    }
+
+
+def find_duplicates(files):
+    groups = defaultdict(list)
+    for image, record in files.items():
+        if record.get("sha256"):
+            groups[record["sha256"]].append(image)
+    duplicates = [sorted(paths) for paths in groups.values() if len(paths) > 1]
+    # 같은 이미지가 train과 val/test에 동시에 있으면 검증 지표가 부풀려짐
+    leaks = [
+        paths for paths in duplicates
+        if len({files[p]["split"] for p in paths}) > 1
+    ]
+    return duplicates, leaks
+
+
+def find_orphan_labels(splits):
+    """이미지 없이 라벨만 남은 .txt (이미지 삭제 후 라벨 미정리 등)"""
+    orphans = []
+    for images in splits.values():
+        expected = {os.path.abspath(label_path(image)) for image, _ in images}
+        for label_dir in {os.path.dirname(p) for p in expected}:
+            if not os.path.isdir(label_dir):
+                continue
+            for name in os.listdir(label_dir):
+                path = os.path.abspath(os.path.join(label_dir, name))
+                if name.endswith(".txt") and path not in expected:
+                    orphans.append(path)
+    return sorted(set(orphans))
+
+
+# ==============================
+# Validate
+# ==============================
+def validate_dataset(dataset_path=DATASET_PATH, data_yaml=None, workers=None,
+                     manifest_path=None, report_path=None, strict=True):
     """
-    YOLOv8 데이터셋 최소 전처리(검증)
-    - train/images ↔ train/labels 1:1
-    - 파일 존재 여부
+    데이터셋 전체 검증
+    - strict=True 이면 오류가 있을 때 ValueError
+    Returns: report dict
     """
+    start = time.perf_counter()
+    data_yaml = data_yaml or os.path.join(dataset_path, "data.yaml")
+    if not os.path.exists(data_yaml):
+        raise FileNotFoundError(f"data.yaml not found: {data_yaml}")
+
+    data = load_data_yaml(data_yaml)
+    names = data.get("names") or []
+    nc = int(data.get("nc") or len(names))
+    names_key = hashlib.sha256(json.dumps([nc, names], sort_keys=True).encode()).hexdigest()
+    root = dataset_root(data, data_yaml)
+
+    splits = {split: split_images(root, data[split]) for split in SPLITS if data.get(split)}
+    if not splits:
+        raise ValueError("data.yaml has no train/val/test split")
+    for split, images in splits.items():
+        if not images:
+            raise FileNotFoundError(f"{split}: no images found")
+
+    manifest_path = manifest_path or os.path.join(dataset_path, MANIFEST_FILENAME)
+    cached = load_manifest(manifest_path, names_key)
+
+    files, jobs = {}, []
+    for split, images in splits.items():
+        for image, _ in images:
+            label = label_path(image)
+            record = cached.get(image)
+            # 크기 + 수정시각이 같으면 이전 검사 결과 재사용
+            if (record and record["split"] == split
+                    and record["image_sig"] == _signature(image)
+                    and record["label_sig"] == _signature(label)):
+                files[image] = record
+            else:
+                jobs.append((split, image, label, nc))
 
-    img_dir = os.path.join(DATASET_PATH, "train/images")
-    lbl_dir = os.path.join(DATASET_PATH, "train/labels")
+    print(f"[PREPROCESS] {sum(len(v) for v in splits.values())} images, "
+          f"{len(jobs)} new or changed, {len(files)} cached")
 
-    if not os.path.isdir(img_dir):
-        raise FileNotFoundError("train/images not found")
+    if jobs:
+        workers = workers or available_cpus()
+        chunksize = max(1, min(256, len(jobs) // (workers * 4) or 1))
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            for image, record in pool.map(check_file, jobs, chunksize=chunksize):
+                files[image] = record
 
-    if not os.path.isdir(lbl_dir):
-        raise FileNotFoundError("train/labels not found")
+    save_manifest(manifest_path, names_key, files)
 
-    imgs = {os.path.splitext(f)[0] for f in os.listdir(img_dir)}
-    lbls = {os.path.splitext(f)[0] for f in os.listdir(lbl_dir)}
+    errors = {image: r["errors"] for image, r in files.items() if r["errors"]}
+    for label in find_orphan_labels(splits):
+        errors[label] = ["label without image"]
+    missing_labels = sum(1 for r in files.values() if r["label_sig"] is None)
+    duplicates, leaks = find_duplicates(files)
 
-    diff = imgs ^ lbls
-    if diff:
-        raise ValueError(f"Image/Label mismatch: {len(diff)} files")
+    report = {
+        "dataset": os.path.abspath(dataset_path),
+        "checked": len(jobs),
+        "cached": len(files) - len(jobs),
+        "elapsed_s": round(time.perf_counter() - start, 2),
+        "errors": errors,
+        "missing_labels": missing_labels,
+        "duplicates": duplicates,
+        "split_leaks": leaks,
+        "stats": build_stats(files, names),
+    }
+
+    if report_path:
+        with open(report_path, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+
+    print(f"[PREPROCESS] {len(errors)} files with errors, {len(duplicates)} duplicate groups "
+          f"({len(leaks)} across splits), {missing_labels} missing labels, {report['elapsed_s']}s")
+    for image, errs in list(errors.items())[:20]:
+        print(f"  {image}: {'; '.join(errs)}")
+
+    if strict and (errors or leaks):
+        raise ValueError(f"Dataset validation failed: {len(errors)} files with errors, {len(leaks)} split leaks")
 
     print("[PREPROCESS] Dataset validation passed")
+    return report
 
 
 if __name__ == "__main__":
-    validate_dataset()
+    parser = argparse.ArgumentParser(description="Validate a YOLO dataset")
+    parser.add_argument("--dataset", default=DATASET_PATH)
+    parser.add_argument("--data", default=None, help="data.yaml 경로 (기본: <dataset>/data.yaml)")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--report", default=None, help="검증 리포트 JSON 저장 경로")
+    args = parser.parse_args()
+
+    try:
+        validate_dataset(args.dataset, args.data, args.workers, report_path=args.report)
+    except (ValueError, FileNotFoundError) as e:
+        print(f"[PREPROCESS] {e}")
+        sys.exit(1)
@@ -0,0 +1,348 @@
+"""
+데이터셋 샤드 (Shard) 포맷
+- YOLO 데이터셋(이미지 + 라벨 수천~수십만 개 파일)을 수백 MB 단위 tar 샤드 몇 개로 묶음
+- 네트워크 볼륨 / MinIO 에서 파일마다 open / stat 하는 대신 큰 파일을 순차로 읽음
+- index.json 에 샘플별 (샤드, 데이터 오프셋, 크기) 기록 → 샤드를 풀지 않고 임의 접근(검증 등) 가능
+  - 로컬: seek + read / MinIO: HTTP Range 요청
+
+샤드 디렉토리 구조 (로컬 또는 s3://<bucket>/<prefix>/)
+  index.json             # 클래스 정보 + split별 샤드 목록 + 샘플 오프셋
+  train-00000.tar        # 멤버: train/images/<rel>, train/labels/<stem>.txt
+  train-00001.tar
+  val-00000.tar
+
+실행 방법 (ai/ 디렉토리 기준):
+$ python -m preprocessing.shards pack --data /data/dataset/data.yaml --out /data/shards/smart-cart-v1
+$ python -m preprocessing.shards upload --src /data/shards/smart-cart-v1 --dest s3://data/shards/smart-cart-v1
+$ python -m preprocessing.shards materialize --src s3://data/shards/smart-cart-v1
+"""
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import sys
+import tarfile
+import time
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+try:
+    from training.dataset_cache import SPLITS, dataset_root, label_path, load_data_yaml, split_images
+except ImportError:
+    from ai.training.dataset_cache import SPLITS, dataset_root, label_path, load_data_yaml, split_images
+
+# ==============================
+# Config
+# ==============================
+SHARD_SIZE_MB = int(os.getenv("SHARD_SIZE_MB", "256"))
+SHARD_BUCKET = os.getenv("SHARD_BUCKET", "data")
+SHARD_CACHE_DIR = os.getenv("SHARD_CACHE_DIR", "/data/cache/shards")
+MINIO_ENDPOINT = os.getenv("MINIO_ENDPOINT", "http://minio:9000")
+MINIO_ACCESS_KEY = os.getenv("MINIO_ACCESS_KEY", os.getenv("AWS_ACCESS_KEY_ID", "admin"))
+MINIO_SECRET_KEY = os.getenv("MINIO_SECRET_KEY", os.getenv("AWS_SECRET_ACCESS_KEY", "password123"))
+
+INDEX_FILENAME = "index.json"
+INDEX_VERSION = 1
+DONE_FILENAME = ".materialized"
+
+_s3_client = None
+
+
+def s3_client():
+    global _s3_client
+    if _s3_client is None:
+        import boto3
+
+        _s3_client = boto3.client(
+            "s3",
+            endpoint_url=MINIO_ENDPOINT,
+            aws_access_key_id=MINIO_ACCESS_KEY,
+            aws_secret_access_key=MINIO_SECRET_KEY,
+        )
+    return _s3_client
+
+
+def parse_s3_uri(uri):
+    """s3://bucket/prefix → (bucket, prefix)"""
+    bucket, _, prefix = uri[len("s3://"):].partition("/")
+    return bucket, prefix.strip("/")
+
+
+def _member_names(split, rel):
+    image = f"{split}/images/{rel}"
+    return image, os.path.splitext(f"{split}/labels/{rel}")[0] + ".txt"
+
+
+# ==============================
+# Pack
+# ==============================
+def _shard_offsets(shard_path):
+    """작성한 샤드를 다시 열어 멤버별 데이터 오프셋 수집 (헤더만 읽음)"""
+    with tarfile.open(shard_path, "r") as tar:
+        return {m.name: (m.offset_data, m.size) for m in tar.getmembers()}
+
+
+def pack(data_yaml, out_dir, shard_size_mb=SHARD_SIZE_MB):
+    """
+    data.yaml 의 모든 split을 tar 샤드 + index.json 으로 변환
+    Returns: index dict
+    """
+    start = time.perf_counter()
+    data = load_data_yaml(data_yaml)
+    root = dataset_root(data, data_yaml)
+    max_bytes = shard_size_mb * 1024 * 1024
+    os.makedirs(out_dir, exist_ok=True)
+
+    index = {
+        "version": INDEX_VERSION,
+        "names": data.get("names"),
+        "nc": data.get("nc") or len(data.get("names") or []),
+        "created_at": time.time(),
+        "splits": {},
+    }
+
+    for split in SPLITS:
+        if not data.get(split):
+            continue
+        shards, samples = [], []
+        tar, shard_path, shard_bytes, pending = None, None, 0, []
+
+        def close_shard():
+            tar.close()
+            offsets = _shard_offsets(shard_path)
+            for rel, image_name, label_name in pending:
+                image_off, image_size = offsets[image_name]
+                label_off, label_size = offsets.get(label_name, (-1, 0))
+                samples.append([len(shards) - 1, rel, image_off, image_size, label_off, label_size])
+
+        for src, rel in split_images(root, data[split]):
+            if tar is None or shard_bytes >= max_bytes:
+                if tar is not None:
+                    close_shard()
+                name = f"{split}-{len(shards):05d}.tar"
+                shard_path = os.path.join(out_dir, name)
+                shards.append(name)
+                tar, shard_bytes, pending = tarfile.open(shard_path, "w", format=tarfile.GNU_FORMAT), 0, []
+
+            rel = rel.replace(os.sep, "/")
+            image_name, label_name = _member_names(split, rel)
+            tar.add(src, arcname=image_name, recursive=False)
+            shard_bytes += os.path.getsize(src)
+            src_label = label_path(src)
+            if os.path.exists(src_label):
+                tar.add(src_label, arcname=label_name, recursive=False)
+            pending.append((rel, image_name, label_name))
+
+        if tar is not None:
+            close_shard()
+        index["splits"][split] = {"shards": shards, "samples": samples}
+        print(f"[SHARDS] {split}: {len(samples)} samples in {len(shards)} shards")
+
+    index_path = os.path.join(out_dir, INDEX_FILENAME)
+    with open(f"{index_path}.tmp", "w", encoding="utf-8") as f:
+        json.dump(index, f)
+    os.replace(f"{index_path}.tmp", index_path)
+    print(f"[SHARDS] packed {data_yaml} → {out_dir} ({time.perf_counter() - start:.1f}s)")
+    return index
+
+
+def upload(src_dir, dest_uri):
+    """
+    샤드 → MinIO. index.json 을 마지막에 올려 읽는 쪽이 불완전한 샤드 세트를 보지 않도록 함
+    - dest_uri 가 s3:// 로 시작하지 않으면 SHARD_BUCKET 버킷의 prefix 로 간주
+    """
+    if not dest_uri.startswith("s3://"):
+        dest_uri = f"s3://{SHARD_BUCKET}/{dest_uri.strip('/')}"
+    bucket, prefix = parse_s3_uri(dest_uri)
+    client = s3_client()
+    names = sorted(n for n in os.listdir(src_dir) if n.endswith(".tar"))
+    for name in names + [INDEX_FILENAME]:
+        key = f"{prefix}/{name}" if prefix else name
+        client.upload_file(os.path.join(src_dir, name), bucket, key)
+        print(f"[SHARDS] uploaded s3://{bucket}/{key}")
+
+
+# ==============================
+# Reader
+# ==============================
+class ShardDataset:
+    """
+    로컬 디렉토리 또는 s3://bucket/prefix 의 샤드 읽기
+    - iter_samples(split): 샤드 순차 스트리밍 (학습용)
+    - get(split, i): index 오프셋 기반 임의 접근 (검증용)
+    샘플 = (rel, image bytes, label text 또는 None)
+    """
+
+    def __init__(self, source):
+        self.source = source.rstrip("/")
+        self.remote = self.source.startswith("s3://")
+        if self.remote:
+            self.bucket, self.prefix = parse_s3_uri(self.source)
+        raw = self._read_object(INDEX_FILENAME)
+        self.index = json.loads(raw)
+        if self.index.get("version") != INDEX_VERSION:
+            raise ValueError(f"Unsupported shard index version: {self.index.get('version')}")
+        self.index_hash = hashlib.sha256(raw).hexdigest()
+
+    @property
+    def splits(self):
+        return list(self.index["splits"])
+
+    def __len__(self):
+        return sum(len(s["samples"]) for s in self.index["splits"].values())
+
+    def num_samples(self, split):
+        return len(self.index["splits"][split]["samples"])
+
+    def _key(self, name):
+        return f"{self.prefix}/{name}" if self.prefix else name
+
+    def _read_object(self, name, start=None, size=None):
+        if size == 0:
+            return b""
+        if self.remote:
+            kwargs = {"Bucket": self.bucket, "Key": self._key(name)}
+            if start is not None:
+                kwargs["Range"] = f"bytes={start}-{start + size - 1}"
+            return s3_client().get_object(**kwargs)["Body"].read()
+        with open(os.path.join(self.source, name), "rb") as f:
+            if start is not None:
+                f.seek(start)
+                return f.read(size)
+            return f.read()
+
+    def _open_stream(self, name):
+        if self.remote:
+            return s3_client().get_object(Bucket=self.bucket, Key=self._key(name))["Body"]
+        return open(os.path.join(self.source, name), "rb")
+
+    def get(self, split, i):
+        shard_idx, rel, image_off, image_size, label_off, label_size = self.index["splits"][split]["samples"][i]
+        shard = self.index["splits"][split]["shards"][shard_idx]
+        image = self._read_object(shard, image_off, image_size)
+        label = None
+        if label_off >= 0:
+            label = self._read_object(shard, label_off, label_size).decode("utf-8")
+        return rel, image, label
+
+    def iter_members(self, split):
+        """샤드를 순서대로 스트리밍하며 (tar 멤버 이름, bytes) 반환"""
+        for shard in self.index["splits"][split]["shards"]:
+            stream = self._open_stream(shard)
+            try:
+                with tarfile.open(fileobj=stream, mode="r|") as tar:
+                    for member in tar:
+                        if member.isfile():
+                            yield member.name, tar.extractfile(member).read()
+            finally:
+                stream.close()
+
+    def iter_samples(self, split):
+        prefix = f"{split}/images/"
+        rel = image = label = None
+        # 라벨은 해당 이미지 바로 다음 멤버로 기록되어 있음
+        for name, payload in self.iter_members(split):
+            if name.startswith(prefix):
+                if rel is not None:
+                    yield rel, image, label
+                rel, image, label = name[len(prefix):], payload, None
+            else:
+                label = payload.decode("utf-8")
+        if rel is not None:
+            yield rel, image, label
+
+
+# ==============================
+# Materialize (학습용 로컬 미러)
+# ==============================
+def _member_path(root, name):
+    """tar 멤버 이름 → root 아래 경로. 절대 경로 / '..' 로 root 밖을 가리키는 멤버는 거부"""
+    parts = name.split("/")
+    if name.startswith("/") or "\\" in name or any(part in ("", ".", "..") for part in parts):
+        raise ValueError(f"Unsafe shard member name: {name!r}")
+    path = os.path.join(root, *parts)
+    if os.path.commonpath([os.path.abspath(root), os.path.abspath(path)]) != os.path.abspath(root):
+        raise ValueError(f"Unsafe shard member name: {name!r}")
+    return path
+
+
+def materialize(source, cache_root=SHARD_CACHE_DIR):
+    """
+    샤드를 순차로 읽어 로컬에 YOLO 디렉토리 구조로 풀고 data.yaml 경로 반환
+    - index.json 해시로 디렉토리 결정 → 같은 샤드 세트는 한 번만 풀어 둠
+    - 이후 training/dataset_cache.py 디코딩 캐시가 이 디렉토리를 원본으로 사용
+    """
+    import yaml
+
+    dataset = ShardDataset(source)
+    out_dir = os.path.join(cache_root, dataset.index_hash[:16])
+    data_yaml = os.path.join(out_dir, "data.yaml")
+    if os.path.exists(os.path.join(out_dir, DONE_FILENAME)):
+        print(f"[SHARDS] materialized hit: {out_dir}")
+        return data_yaml
+
+    # 임시 디렉토리에 푼 뒤 rename (동시에 같은 샤드를 푸는 다른 학습 프로세스 대비)
+    start = time.perf_counter()
+    tmp_dir = f"{out_dir}.{os.getpid()}.tmp"
+    total = 0
+    try:
+        for split in dataset.splits:
+            for name, payload in dataset.iter_members(split):
+                # 버킷의 샤드는 외부 입력이므로 materialize 디렉토리 밖에 쓰지 않도록 검사
+                path = _member_path(tmp_dir, name)
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                with open(path, "wb") as f:
+                    f.write(payload)
+                total += len(payload)
+    except Exception:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        raise
+
+    data = {"path": out_dir, "nc": dataset.index["nc"], "names": dataset.index["names"]}
+    for split in dataset.splits:
+        data[split] = f"{split}/images"
+    with open(os.path.join(tmp_dir, "data.yaml"), "w", encoding="utf-8") as f:
+        yaml.safe_dump(data, f, allow_unicode=True, sort_keys=False)
+    with open(os.path.join(tmp_dir, DONE_FILENAME), "w", encoding="utf-8") as f:
+        f.write(source)
+    try:
+        os.rename(tmp_dir, out_dir)
+    except OSError:
+        # 다른 프로세스가 먼저 완료 (또는 이전 실패로 남은 불완전 디렉토리 → 교체)
+        if os.path.exists(os.path.join(out_dir, DONE_FILENAME)):
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+        else:
+            shutil.rmtree(out_dir, ignore_errors=True)
+            os.rename(tmp_dir, out_dir)
+
+    elapsed = time.perf_counter() - start
+    print(f"[SHARDS] materialized {source} → {out_dir}: {len(dataset)} samples, "
+          f"{total / 1e6:.0f} MB in {elapsed:.1f}s")
+    return data_yaml
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Pack a YOLO dataset into tar shards")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("pack")
+    p.add_argument("--data", required=True)
+    p.add_argument("--out", required=True)
+    p.add_argument("--shard-size-mb", type=int, default=SHARD_SIZE_MB)
+
+    p = sub.add_parser("upload")
+    p.add_argument("--src", required=True)
+    p.add_argument("--dest", required=True, help=f"s3://{SHARD_BUCKET}/<prefix>")
+
+    p = sub.add_parser("materialize")
+    p.add_argument("--src", required=True, help="샤드 디렉토리 또는 s3://bucket/prefix")
+    p.add_argument("--cache-dir", default=SHARD_CACHE_DIR)
+
+    args = parser.parse_args()
+    if args.command == "pack":
+        pack(args.data, args.out, args.shard_size_mb)
+    elif args.command == "upload":
+        upload(args.src, args.dest)
+    else:
+        print(materialize(args.src, args.cache_dir))
@@ -0,0 +1,236 @@
+"""
+학습용 디코딩 이미지 캐시 (Dataset Cache)
+- 데이터셋 내용 해시(data.yaml + 이미지/라벨 파일 크기·수정시각) + imgsz 로 캐시 디렉토리 결정
+- 캐시 디렉토리는 원본 데이터셋의 미러: 이미지 / 라벨은 심볼릭 링크, 옆에 디코딩 + 리사이즈된 .npy 저장
+- ultralytics cache="disk" 는 이미지 옆 .npy 가 있으면 JPEG 디코딩 없이 np.load 로 읽으므로,
+  같은 데이터로 실험을 반복하면 디코딩 / 리사이즈 비용이 0 (OS 페이지 캐시에 올라간 .npy 재사용)
+- .npy 는 긴 변을 imgsz 로 맞춘 상태로 저장 → 학습 시 추가 리사이즈 없음
+
+디렉토리 구조
+<DATASET_CACHE_DIR>/<hash16>_<imgsz>/
+  data.yaml              # 미러를 가리키는 data.yaml (train() 에 전달)
+  cache.json             # 완료 표시 (이 파일이 있으면 재빌드 생략)
+  train/images/*.jpg     # → 원본 심볼릭 링크
+  train/images/*.npy     # 디코딩 + 리사이즈 결과
+  train/labels/*.txt     # → 원본 심볼릭 링크
+
+실행 방법 (ai/ 디렉토리 기준, 학습 전에 미리 만들어 둘 때):
+$ python -m training.dataset_cache --data /data/dataset/data.yaml --imgsz 640
+"""
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+DATASET_CACHE_DIR = os.getenv("DATASET_CACHE_DIR", "/data/cache/datasets")
+IMAGE_EXTS = {".jpg", ".jpeg", ".png", ".bmp", ".webp", ".tif", ".tiff"}
+SPLITS = ("train", "val", "test")
+MANIFEST_FILENAME = "cache.json"
+
+
+def available_cpus():
+    if hasattr(os, "sched_getaffinity"):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+
+# ==============================
+# Dataset 해석 (ultralytics data.yaml 규칙과 동일하게 경로 결정)
+# ==============================
+def load_data_yaml(data_yaml):
+    import yaml
+
+    with open(data_yaml, "r", encoding="utf-8") as f:
+        return yaml.safe_load(f)
+
+
+def dataset_root(data, data_yaml):
+    root = data.get("path") or os.path.dirname(os.path.abspath(data_yaml))
+    if not os.path.isabs(root):
+        root = os.path.join(os.path.dirname(os.path.abspath(data_yaml)), root)
+    return root
+
+
+def _resolve(root, entry):
+    path = os.path.abspath(os.path.join(root, entry))
+    if not os.path.exists(path) and entry.startswith("../"):
+        path = os.path.abspath(os.path.join(root, entry[3:]))
+    return path
+
+
+def label_path(image_path):
+    """ultralytics img2label_paths 와 동일: 마지막 /images/ → /labels/, 확장자 → .txt"""
+    sa, sb = f"{os.sep}images{os.sep}", f"{os.sep}labels{os.sep}"
+    return os.path.splitext(sb.join(image_path.rsplit(sa, 1)))[0] + ".txt"
+
+
+def split_images(root, entries):
+    """
+    split 항목(디렉토리 / 이미지 목록 .txt / 그 리스트)을 이미지 경로 목록으로 변환
+    Returns: [(원본 경로, 미러 내 상대 경로), ...]
+    """
+    if isinstance(entries, str):
+        entries = [entries]
+
+    images = []
+    for entry in entries:
+        path = _resolve(root, entry)
+        if os.path.isdir(path):
+            for dirpath, _, filenames in os.walk(path):
+                for name in filenames:
+                    if os.path.splitext(name)[1].lower() in IMAGE_EXTS:
+                        full = os.path.join(dirpath, name)
+                        images.append((full, os.path.relpath(full, path)))
+        elif os.path.isfile(path):
+            parent = os.path.dirname(path)
+            with open(path, "r", encoding="utf-8") as f:
+                for line in f:
+                    line = line.strip()
+                    if not line:
+                        continue
+                    full = os.path.abspath(os.path.join(parent, line[2:] if line.startswith("./") else line))
+                    images.append((full, os.path.basename(full)))
+    # 목록 파일끼리 파일명이 겹치는 경우 대비
+    seen = set()
+    unique = []
+    for full, rel in sorted(images):
+        while rel in seen:
+            stem, ext = os.path.splitext(rel)
+            rel = f"{stem}_dup{ext}"
+        seen.add(rel)
+        unique.append((full, rel))
+    return unique
+
+
+def dataset_hash(data_yaml, splits):
+    """data.yaml 내용 + 이미지/라벨 (경로, 크기, 수정시각) 해시. 파일 내용을 읽지 않아 빠름"""
+    h = hashlib.sha256()
+    with open(data_yaml, "rb") as f:
+        h.update(f.read())
+    for split in sorted(splits):
+        h.update(split.encode())
+        for image, _ in splits[split]:
+            for path in (image, label_path(image)):
+                try:
+                    st = os.stat(path)
+                    h.update(f"{path}|{st.st_size}|{st.st_mtime_ns}".encode())
+                except FileNotFoundError:
+                    h.update(f"{path}|missing".encode())
+    return h.hexdigest()
+
+
+# ==============================
+# Cache Build
+# ==============================
+def link_or_copy(src, dst):
+    if os.path.lexists(dst):
+        return
+    os.makedirs(os.path.dirname(dst), exist_ok=True)
+    try:
+        os.symlink(src, dst)
+    except FileExistsError:
+        # 동시에 같은 캐시를 만드는 다른 프로세스 (병렬 스윕 trial 등)
+        pass
+    except OSError:
+        # 심볼릭 링크 권한이 없는 환경 (Windows 등)
+        shutil.copy2(src, dst)
+
+
+def _decode_resize(src, npy_path, imgsz):
+    """원본 디코딩 → 긴 변 imgsz 로 리사이즈 → .npy (이미 있으면 생략)"""
+    if os.path.exists(npy_path):
+        return True
+    import cv2
+    import numpy as np
+
+    im = cv2.imread(src)
+    if im is None:
+        return False
+    h, w = im.shape[:2]
+    r = imgsz / max(h, w)
+    if r != 1:
+        interp = cv2.INTER_LINEAR if r > 1 else cv2.INTER_AREA
+        im = cv2.resize(im, (min(round(w * r), imgsz), min(round(h * r), imgsz)), interpolation=interp)
+    tmp_path = f"{npy_path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as f:
+        np.save(f, im, allow_pickle=False)
+    os.replace(tmp_path, npy_path)
+    return True
+
+
+def prepare(data_yaml, imgsz, cache_root=DATASET_CACHE_DIR, workers=None):
+    """
+    캐시 준비 후 미러 data.yaml 경로 반환 (이미 완료된 캐시면 즉시 반환)
+    Returns: (mirror_yaml_path, manifest dict)
+    """
+    data = load_data_yaml(data_yaml)
+    root = dataset_root(data, data_yaml)
+    splits = {s: split_images(root, data[s]) for s in SPLITS if data.get(s)}
+
+    digest = dataset_hash(data_yaml, splits)
+    cache_dir = os.path.join(cache_root, f"{digest[:16]}_{imgsz}")
+    mirror_yaml = os.path.join(cache_dir, "data.yaml")
+    manifest_path = os.path.join(cache_dir, MANIFEST_FILENAME)
+
+    if os.path.exists(manifest_path) and os.path.exists(mirror_yaml):
+        with open(manifest_path, "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+        if manifest.get("dataset_hash") == digest:
+            print(f"[DATASET_CACHE] hit: {cache_dir}")
+            return mirror_yaml, manifest
+
+    print(f"[DATASET_CACHE] building: {cache_dir}")
+    start = time.perf_counter()
+    jobs = []
+    for split, images in splits.items():
+        for src, rel in images:
+            dst = os.path.join(cache_dir, split, "images", rel)
+            link_or_copy(src, dst)
+            src_label = label_path(src)
+            if os.path.exists(src_label):
+                link_or_copy(src_label, label_path(dst))
+            jobs.append((src, os.path.splitext(dst)[0] + ".npy"))
+
+    # cv2 디코딩 / 리사이즈는 GIL을 해제하므로 스레드로 병렬화
+    with ThreadPoolExecutor(max_workers=workers or available_cpus()) as pool:
+        decoded = list(pool.map(lambda job: _decode_resize(job[0], job[1], imgsz), jobs))
+
+    import yaml
+
+    mirror = {k: v for k, v in data.items() if k not in ("path", *SPLITS)}
+    mirror["path"] = cache_dir
+    for split in splits:
+        mirror[split] = os.path.join(split, "images")
+    tmp_path = f"{mirror_yaml}.{os.getpid()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        yaml.safe_dump(mirror, f, allow_unicode=True, sort_keys=False)
+    os.replace(tmp_path, mirror_yaml)
+
+    manifest = {
+        "dataset_hash": digest,
+        "source_yaml": os.path.abspath(data_yaml),
+        "imgsz": imgsz,
+        "images": {split: len(images) for split, images in splits.items()},
+        "undecodable": decoded.count(False),
+        "build_seconds": round(time.perf_counter() - start, 2),
+        "built_at": time.time(),
+    }
+    tmp_path = f"{manifest_path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(tmp_path, manifest_path)
+    print(f"[DATASET_CACHE] built: {manifest}")
+    return mirror_yaml, manifest
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Pre-decode dataset into imgsz-keyed cache")
+    parser.add_argument("--data", required=True)
+    parser.add_argument("--imgsz", type=int, default=640)
+    parser.add_argument("--cache-dir", default=DATASET_CACHE_DIR)
+    parser.add_argument("--workers", type=int, default=None)
+    args = parser.parse_args()
+    prepare(args.data, args.imgsz, args.cache_dir, args.workers)
@@ -0,0 +1,319 @@
+"""
+지식 증류 (Knowledge Distillation) — 카트용 nano 모델
+- teacher: 현재 운영(production) run의 best.pt (yolov8s / yolo11s 등)
+- student: yolov8n.pt / yolo11n.pt
+- 방식: teacher 예측(pseudo-label)으로 학습 라벨을 보강한 뒤 student 학습
+  - merge  : 정답 라벨 + 정답과 겹치지 않는 teacher 박스 (라벨 누락 보완)
+  - teacher: teacher 예측만 사용
+  - --extra-images 로 라벨 없는 이미지(uncertain-images 등)를 추가하면 teacher 라벨로 학습 데이터 확장
+  - 검증은 원본 val(정답 라벨) 그대로 사용
+- 학습 후 teacher / student 를 같은 val split + 같은 CPU 벤치마크(training/evaluate.py measure)로 측정하여
+  student run에 나란히 기록: distill.teacher.* / distill.student.* / distill.map_retention / distill.speedup
+
+ultralytics 는 feature / logit 단위 증류 loss를 제공하지 않으므로 출력(pseudo-label) 증류로 구현
+
+실행 방법 (ai/ 디렉토리 기준):
+$ python -m training.distill --student yolov8n.pt
+$ python -m training.distill --teacher-run-id <run_id> --student yolo11n.pt --extra-images /data/incoming/unlabeled
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+try:
+    from training import dataset_cache
+    from training.evaluate import WEIGHTS_ARTIFACT, find_production_run, get_client, measure
+    from inference.model_store import ModelStore
+except ImportError:
+    from ai.training import dataset_cache
+    from ai.training.evaluate import WEIGHTS_ARTIFACT, find_production_run, get_client, measure
+    from ai.inference.model_store import ModelStore
+
+# ==============================
+# Config
+# ==============================
+DISTILL_STUDENTS = ("yolov8n.pt", "yolo11n.pt")
+DISTILL_STUDENT = os.getenv("DISTILL_STUDENT", "yolov8n.pt")
+DISTILL_EPOCHS = int(os.getenv("DISTILL_EPOCHS", "100"))
+# teacher 예측을 라벨로 채택할 최소 confidence
+DISTILL_CONF = float(os.getenv("DISTILL_CONF", "0.4"))
+DISTILL_LABEL_MODE = os.getenv("DISTILL_LABEL_MODE", "merge")
+DISTILL_BATCH = int(os.getenv("DISTILL_BATCH", "16"))
+DISTILL_WORK_DIR = os.getenv("DISTILL_WORK_DIR", "/data/runs/distill")
+
+LABEL_MODES = ("merge", "teacher")
+# merge 시 이 IoU 이상 정답 박스와 겹치는 teacher 박스는 중복으로 보고 제외
+MERGE_IOU = 0.5
+
+
+def _read_boxes(path):
+    """YOLO 라벨 → [(cls, (cx, cy, w, h))]. polygon 은 외접 박스로 변환"""
+    boxes = []
+    if not os.path.exists(path):
+        return boxes
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) < 5:
+                continue
+            coords = [float(v) for v in parts[1:]]
+            if len(coords) == 4:
+                box = tuple(coords)
+            else:
+                xs, ys = coords[0::2], coords[1::2]
+                box = ((max(xs) + min(xs)) / 2, (max(ys) + min(ys)) / 2, max(xs) - min(xs), max(ys) - min(ys))
+            boxes.append((int(parts[0]), box))
+    return boxes
+
+
+def _iou(a, b):
+    ax1, ay1, ax2, ay2 = a[0] - a[2] / 2, a[1] - a[3] / 2, a[0] + a[2] / 2, a[1] + a[3] / 2
+    bx1, by1, bx2, by2 = b[0] - b[2] / 2, b[1] - b[3] / 2, b[0] + b[2] / 2, b[1] + b[3] / 2
+    iw = max(0.0, min(ax2, bx2) - max(ax1, bx1))
+    ih = max(0.0, min(ay2, by2) - max(ay1, by1))
+    inter = iw * ih
+    union = a[2] * a[3] + b[2] * b[3] - inter
+    return inter / union if union > 0 else 0.0
+
+
+def _teacher_predictions(teacher, images, conf, imgsz, batch):
+    """Returns: {이미지 경로: [(cls, (cx, cy, w, h)), ...]}"""
+    predictions = {}
+    for i in range(0, len(images), batch):
+        chunk = images[i:i + batch]
+        for path, result in zip(chunk, teacher.predict(chunk, conf=conf, imgsz=imgsz, verbose=False)):
+            predictions[path] = [
+                (int(c), tuple(float(v) for v in xywhn))
+                for c, xywhn in zip(result.boxes.cls.tolist(), result.boxes.xywhn.tolist())
+            ]
+        print(f"[DISTILL] teacher labels {min(i + batch, len(images))}/{len(images)}")
+    return predictions
+
+
+def build_distill_dataset(teacher_path, data_yaml, out_dir, conf=DISTILL_CONF,
+                          label_mode=DISTILL_LABEL_MODE, extra_images=None, imgsz=640, batch=DISTILL_BATCH):
+    """
+    teacher pseudo-label 로 보강한 학습 데이터셋 생성 (이미지는 심볼릭 링크, 라벨만 새로 작성)
+    Returns: (data_yaml_path, stats)
+    """
+    import yaml
+    from ultralytics import YOLO
+
+    if label_mode not in LABEL_MODES:
+        raise ValueError(f"label_mode must be one of {LABEL_MODES}")
+
+    data = dataset_cache.load_data_yaml(data_yaml)
+    root = dataset_cache.dataset_root(data, data_yaml)
+    train_images = dataset_cache.split_images(root, data["train"])
+    extra = []
+    if extra_images:
+        # 상대 경로를 root 와 entry 양쪽에 넘기면 경로가 두 번 붙으므로 절대 경로로 해석 후 전달
+        extra_path = os.path.abspath(extra_images)
+        extra = dataset_cache.split_images(os.path.dirname(extra_path), extra_path)
+
+    teacher = YOLO(teacher_path)
+    # 클래스 인덱스가 다르면 teacher 라벨을 그대로 쓸 수 없음
+    names = data.get("names")
+    teacher_names = list(teacher.names.values()) if isinstance(teacher.names, dict) else list(teacher.names)
+    expected = list(names.values()) if isinstance(names, dict) else list(names or [])
+    if expected and teacher_names != expected:
+        raise ValueError("Teacher class names do not match the dataset")
+
+    predictions = _teacher_predictions(teacher, [src for src, _ in train_images + extra], conf, imgsz, batch)
+
+    out_dir = os.path.abspath(out_dir)
+    stats = {"images": 0, "extra_images": len(extra), "gt_boxes": 0, "teacher_boxes": 0}
+    for prefix, images, labelled in (("train", train_images, True), ("extra", extra, False)):
+        for src, rel in images:
+            dst = os.path.join(out_dir, "train", "images", prefix, rel)
+            dataset_cache.link_or_copy(src, dst)
+
+            lines = []
+            gt = _read_boxes(dataset_cache.label_path(src)) if labelled else []
+            if label_mode == "merge":
+                # polygon 원문을 그대로 쓰면 ultralytics 가 파일 전체를 segment 로 해석하므로 박스로 기록
+                lines.extend(f"{cls} " + " ".join(f"{v:.6f}" for v in box) for cls, box in gt)
+                stats["gt_boxes"] += len(gt)
+            for cls, box in predictions.get(src, []):
+                if label_mode == "merge" and any(_iou(box, g) >= MERGE_IOU for _, g in gt):
+                    continue
+                lines.append(f"{cls} " + " ".join(f"{v:.6f}" for v in box))
+                stats["teacher_boxes"] += 1
+
+            label = dataset_cache.label_path(dst)
+            os.makedirs(os.path.dirname(label), exist_ok=True)
+            with open(label, "w", encoding="utf-8") as f:
+                f.write("\n".join(lines) + ("\n" if lines else ""))
+            stats["images"] += 1
+
+    # 검증은 원본 val (정답 라벨)
+    val = [src for src, _ in dataset_cache.split_images(root, data["val"])] if data.get("val") else []
+    with open(os.path.join(out_dir, "val.txt"), "w", encoding="utf-8") as f:
+        f.write("\n".join(val) + "\n")
+
+    distilled = {k: v for k, v in data.items() if k not in ("path", *dataset_cache.SPLITS)}
+    distilled.update(path=out_dir, train="train/images", val="val.txt")
+    distilled_yaml = os.path.join(out_dir, "data.yaml")
+    with open(distilled_yaml, "w", encoding="utf-8") as f:
+        yaml.safe_dump(distilled, f, allow_unicode=True, sort_keys=False)
+
+    print(f"[DISTILL] dataset {distilled_yaml}: {stats}")
+    return distilled_yaml, stats
+
+
+def compare(teacher_run_id, student_run_id, teacher_path, data_yaml):
+    """teacher / student 를 같은 조건으로 측정하여 student run에 나란히 기록"""
+    client = get_client()
+    store = ModelStore()
+    student_path = store.fetch(student_run_id, WEIGHTS_ARTIFACT, protect=[teacher_path])
+    export_dir = tempfile.mkdtemp(prefix="distill_")
+
+    teacher = measure(
+        teacher_path, data_yaml,
+        logged_metrics=client.get_run(teacher_run_id).data.metrics,
+        export_dir=os.path.join(export_dir, "teacher"),
+    )
+    student = measure(
+        student_path, data_yaml,
+        logged_metrics=client.get_run(student_run_id).data.metrics,
+        export_dir=os.path.join(export_dir, "student"),
+    )
+
+    summary = {}
+    if teacher.get("mAP50_95") and student.get("mAP50_95") is not None:
+        summary["map_retention"] = student["mAP50_95"] / teacher["mAP50_95"]
+    if student["p50_ms"]:
+        summary["speedup"] = teacher["p50_ms"] / student["p50_ms"]
+
+    for prefix, values in (("distill.teacher", teacher), ("distill.student", student), ("distill", summary)):
+        for key, value in values.items():
+            if isinstance(value, (int, float)):
+                client.log_metric(student_run_id, f"{prefix}.{key}", value)
+
+    report = {
+        "teacher_run_id": teacher_run_id,
+        "student_run_id": student_run_id,
+        "teacher": teacher,
+        "student": student,
+        **summary,
+        "compared_at": time.time(),
+    }
+    report_path = os.path.join(export_dir, "distill.json")
+    with open(report_path, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    client.log_artifact(student_run_id, report_path, artifact_path="evaluation")
+
+    print(f"[DISTILL] teacher mAP50-95={teacher.get('mAP50_95')} p50={teacher['p50_ms']:.1f}ms | "
+          f"student mAP50-95={student.get('mAP50_95')} p50={student['p50_ms']:.1f}ms | {summary}")
+    return report
+
+
+def distill_train(
+    *,
+    teacher_run_id: str = None,
+    student: str = DISTILL_STUDENT,
+    data_yaml: str = None,
+    epochs: int = DISTILL_EPOCHS,
+    conf: float = DISTILL_CONF,
+    label_mode: str = DISTILL_LABEL_MODE,
+    extra_images: str = None,
+    imgsz: int = 640,
+    experiment_name: str = None,
+    run_tags: dict = None,
+    **kwargs
+):
+    """
+    teacher(기본: 운영 run) → student 증류 학습 후 teacher / student 비교 기록
+    - kwargs 는 train() 으로 그대로 전달 (batch, callbacks 등)
+    - kwargs 에 resume_from 이 있으면 체크포인트에서 student 학습을 재개한 뒤 비교 단계까지 수행
+    Returns: student run_id
+    """
+    try:
+        from training.train import DATA_YAML, DEFAULT_EXPERIMENT_NAME, train
+    except ImportError:
+        from ai.training.train import DATA_YAML, DEFAULT_EXPERIMENT_NAME, train
+
+    if student not in DISTILL_STUDENTS:
+        raise ValueError(f"student must be one of {DISTILL_STUDENTS}")
+
+    resume_run_id = kwargs.get("resume_run_id") if kwargs.get("resume_from") else None
+    if resume_run_id:
+        # 재개 시에는 최초 실행 때 기록한 teacher 사용 (그 사이 운영 run 이 바뀌었을 수 있음)
+        teacher_run_id = get_client().get_run(resume_run_id).data.tags.get("distill.teacher_run_id", teacher_run_id)
+    teacher_run_id = teacher_run_id or find_production_run(get_client())
+    if not teacher_run_id:
+        raise ValueError("No teacher run: pass teacher_run_id or mark a production run")
+
+    data_yaml = data_yaml or DATA_YAML
+    teacher_path = ModelStore().fetch(teacher_run_id, WEIGHTS_ARTIFACT)
+    # 운영(서버) 모델 대체가 목적이 아니므로 승격 평가 대신 teacher 비교만 수행
+    kwargs.setdefault("evaluate", False)
+
+    if kwargs.get("resume_from"):
+        # 증류 데이터셋 / 하이퍼파라미터 / distill tag 는 최초 실행 시 체크포인트와 run 에 기록됨
+        print(f"[DISTILL] resume teacher={teacher_run_id} checkpoint={kwargs['resume_from']}")
+        student_run_id = train(experiment_name=experiment_name or DEFAULT_EXPERIMENT_NAME, **kwargs)
+    else:
+        work_dir = os.path.join(DISTILL_WORK_DIR, f"{int(time.time())}_{teacher_run_id[:8]}")
+        distilled_yaml, stats = build_distill_dataset(
+            teacher_path, data_yaml, os.path.join(work_dir, "dataset"),
+            conf=conf, label_mode=label_mode, extra_images=extra_images, imgsz=imgsz,
+        )
+
+        tags = {
+            "lineage.mode": "distill",
+            "distill.teacher_run_id": teacher_run_id,
+            "distill.label_mode": label_mode,
+            "distill.conf": str(conf),
+            "distill.teacher_boxes": str(stats["teacher_boxes"]),
+            "distill.extra_images": str(stats["extra_images"]),
+        }
+        print(f"[DISTILL] teacher={teacher_run_id} student={student} epochs={epochs}")
+
+        kwargs.setdefault("project", os.path.join(work_dir, "runs"))
+        student_run_id = train(
+            model_name=student,
+            data_yaml=distilled_yaml,
+            epochs=epochs,
+            imgsz=imgsz,
+            experiment_name=experiment_name or DEFAULT_EXPERIMENT_NAME,
+            run_tags={**tags, **(run_tags or {})},
+            **kwargs
+        )
+
+    try:
+        compare(teacher_run_id, student_run_id, teacher_path, data_yaml)
+    except Exception as e:
+        # 비교 실패가 학습 결과를 무효화하지 않도록 기록만 남김
+        print(f"[DISTILL] comparison failed: {e}")
+        get_client().set_tag(student_run_id, "distill.compare_error", str(e)[:5000])
+    return student_run_id
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Distill the production model into a nano student")
+    parser.add_argument("--teacher-run-id", default=None, help="기본: 운영(production) run")
+    parser.add_argument("--student", default=DISTILL_STUDENT, choices=DISTILL_STUDENTS)
+    parser.add_argument("--data", default=None, help="기본: DATASET_PATH/data.yaml")
+    parser.add_argument("--epochs", type=int, default=DISTILL_EPOCHS)
+    parser.add_argument("--conf", type=float, default=DISTILL_CONF)
+    parser.add_argument("--label-mode", default=DISTILL_LABEL_MODE, choices=LABEL_MODES)
+    parser.add_argument("--extra-images", default=None, help="teacher 라벨로 추가할 라벨 없는 이미지 디렉토리")
+    parser.add_argument("--imgsz", type=int, default=640)
+    args = parser.parse_args()
+
+    distill_train(
+        teacher_run_id=args.teacher_run_id,
+        student=args.student,
+        data_yaml=args.data,
+        epochs=args.epochs,
+        conf=args.conf,
+        label_mode=args.label_mode,
+        extra_images=args.extra_images,
+        imgsz=args.imgsz,
+    )
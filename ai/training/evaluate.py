@@ -0,0 +1,267 @@
+"""
+학습 후 모델 승격(promotion) 평가
+- 후보(candidate) run의 best.pt를 export → 고정 벤치마크 이미지 세트(inference/tests/bench_images)로 CPU latency / throughput 측정
+- 현재 운영(production) run의 모델도 같은 장비 / 같은 설정으로 측정하여 비교 (서로 다른 날 측정한 숫자 비교 방지)
+- mAP는 두 모델을 같은 val split으로 다시 검증 (데이터셋이 없으면 MLflow에 기록된 값 사용)
+- 결과는 후보 run에 metric(eval.*) / tag(promotion.*) / artifact(evaluation/promotion.json)로 기록
+- /model/switch 는 require_promotion=true 일 때 promotion.verdict == "pass" 인 run만 허용
+
+운영 run 결정 순서
+1. baseline_run_id 인자
+2. PRODUCTION_RUN_ID 환경변수
+3. tag promotion.status = "production" 인 가장 최근 run (/model/switch 시 기록)
+
+실행 방법 (ai/ 디렉토리 기준):
+$ python -m training.evaluate --run-id <candidate_run_id>
+$ python -m training.evaluate --run-id <candidate_run_id> --baseline-run-id <production_run_id>
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+try:
+    from inference.benchmark import BENCH_IMAGE_DIR, bench_inprocess, run_isolated
+    from inference.autotune import export_onnx
+    from inference.model_store import ModelStore
+except ImportError:
+    from ai.inference.benchmark import BENCH_IMAGE_DIR, bench_inprocess, run_isolated
+    from ai.inference.autotune import export_onnx
+    from ai.inference.model_store import ModelStore
+
+# ==============================
+# Config
+# ==============================
+MLFLOW_TRACKING_URI = os.getenv("MLFLOW_TRACKING_URI", "http://mlflow:5000")
+PRODUCTION_RUN_ID = os.getenv("PRODUCTION_RUN_ID", "")
+
+# 측정 백엔드: "onnx" (export 후 ONNX Runtime) | "torch"
+PROMOTION_BACKEND = os.getenv("PROMOTION_BACKEND", "onnx")
+PROMOTION_IMGSZ = int(os.getenv("PROMOTION_IMGSZ", "640"))
+PROMOTION_THREADS = int(os.getenv("PROMOTION_THREADS", "2"))
+PROMOTION_ITERS = int(os.getenv("PROMOTION_ITERS", "30"))
+
+# 허용 기준 (운영 모델 대비)
+PROMOTION_MAX_MAP_DROP = float(os.getenv("PROMOTION_MAX_MAP_DROP", "0.01"))
+PROMOTION_MAX_LATENCY_INCREASE = float(os.getenv("PROMOTION_MAX_LATENCY_INCREASE", "0.10"))
+# 0보다 크면 운영 모델과 무관하게 p95 절대 상한(ms) 적용
+PROMOTION_MAX_P95_MS = float(os.getenv("PROMOTION_MAX_P95_MS", "0"))
+
+WEIGHTS_ARTIFACT = "weights/best.pt"
+
+TAG_VERDICT = "promotion.verdict"
+TAG_REASONS = "promotion.reasons"
+TAG_BASELINE = "promotion.baseline_run_id"
+TAG_STATUS = "promotion.status"
+
+
+def get_client():
+    import mlflow
+    mlflow.set_tracking_uri(MLFLOW_TRACKING_URI)
+    return mlflow.MlflowClient()
+
+
+def find_production_run(client):
+    """운영 모델은 서버 전체에 하나이므로 모든 experiment에서 검색"""
+    if PRODUCTION_RUN_ID:
+        return PRODUCTION_RUN_ID
+    experiment_ids = [e.experiment_id for e in client.search_experiments()]
+    if not experiment_ids:
+        return None
+    runs = client.search_runs(
+        experiment_ids,
+        filter_string=f"tags.`{TAG_STATUS}` = 'production'",
+        order_by=["attributes.start_time DESC"],
+        max_results=1,
+    )
+    return runs[0].info.run_id if runs else None
+
+
+def mark_production(run_id, previous_run_id=None):
+    """/model/switch 성공 시 호출: 새 run을 production, 이전 run을 retired로 표시"""
+    client = get_client()
+    if previous_run_id and previous_run_id != run_id:
+        client.set_tag(previous_run_id, TAG_STATUS, "retired")
+    client.set_tag(run_id, TAG_STATUS, "production")
+
+
+def promotion_status(run_id):
+    """run의 승격 평가 결과 (평가 전이면 verdict=None)"""
+    tags = get_client().get_run(run_id).data.tags
+    return {
+        "run_id": run_id,
+        "verdict": tags.get(TAG_VERDICT),
+        "reasons": tags.get(TAG_REASONS, ""),
+        "baseline_run_id": tags.get(TAG_BASELINE),
+    }
+
+
+# ==============================
+# Measurement
+# ==============================
+def _validate(model_path, data_yaml, imgsz):
+    """별도 프로세스에서 val split mAP 계산"""
+    from ultralytics import YOLO
+
+    results = YOLO(model_path).val(data=data_yaml, imgsz=imgsz, device="cpu", plots=False, verbose=False)
+    return {"mAP50": float(results.box.map50), "mAP50_95": float(results.box.map)}
+
+
+def measure(model_path, data_yaml=None, logged_metrics=None, backend=PROMOTION_BACKEND,
+            imgsz=PROMOTION_IMGSZ, threads=PROMOTION_THREADS, iters=PROMOTION_ITERS,
+            image_dir=BENCH_IMAGE_DIR, export_dir=None):
+    """모델 1개의 정확도 + CPU 성능 측정"""
+    if data_yaml and os.path.exists(data_yaml):
+        accuracy = run_isolated(_validate, model_path, data_yaml, imgsz)
+        accuracy["map_source"] = "val"
+    else:
+        logged_metrics = logged_metrics or {}
+        accuracy = {
+            "mAP50": logged_metrics.get("mAP50"),
+            "mAP50_95": logged_metrics.get("mAP50_95"),
+            "map_source": "mlflow",
+        }
+
+    bench_path = model_path
+    if backend == "onnx":
+        bench_path = run_isolated(export_onnx, model_path, imgsz, export_dir or tempfile.mkdtemp())
+
+    perf = run_isolated(
+        bench_inprocess, bench_path, imgsz, 1, threads,
+        image_dir=image_dir, iters=iters, pin_cpus=True
+    )
+    return {
+        **accuracy,
+        "backend": backend,
+        "p50_ms": perf["p50_ms"],
+        "p95_ms": perf["p95_ms"],
+        "throughput_ips": perf["throughput_ips"],
+    }
+
+
+def decide(candidate, baseline,
+           max_map_drop=PROMOTION_MAX_MAP_DROP,
+           max_latency_increase=PROMOTION_MAX_LATENCY_INCREASE,
+           max_p95_ms=PROMOTION_MAX_P95_MS):
+    """Returns: (verdict "pass" | "fail", 실패 사유 목록)"""
+    reasons = []
+    if max_p95_ms > 0 and candidate["p95_ms"] > max_p95_ms:
+        reasons.append(f"p95 {candidate['p95_ms']:.1f}ms > limit {max_p95_ms:.1f}ms")
+
+    if baseline:
+        if candidate.get("mAP50_95") is not None and baseline.get("mAP50_95") is not None:
+            if candidate["mAP50_95"] < baseline["mAP50_95"] - max_map_drop:
+                reasons.append(
+                    f"mAP50_95 {candidate['mAP50_95']:.4f} < baseline {baseline['mAP50_95']:.4f} - {max_map_drop}"
+                )
+        latency_limit = baseline["p95_ms"] * (1 + max_latency_increase)
+        if candidate["p95_ms"] > latency_limit:
+            reasons.append(
+                f"p95 {candidate['p95_ms']:.1f}ms > baseline {baseline['p95_ms']:.1f}ms +{max_latency_increase:.0%}"
+            )
+        throughput_limit = baseline["throughput_ips"] * (1 - max_latency_increase)
+        if candidate["throughput_ips"] < throughput_limit:
+            reasons.append(
+                f"throughput {candidate['throughput_ips']:.2f} < baseline {baseline['throughput_ips']:.2f} "
+                f"-{max_latency_increase:.0%}"
+            )
+
+    return ("fail" if reasons else "pass"), reasons
+
+
+# ==============================
+# Evaluate
+# ==============================
+def evaluate_candidate(run_id, candidate_path=None, baseline_run_id=None, data_yaml=None):
+    """
+    후보 run 평가 후 MLflow에 verdict 기록
+    - candidate_path: 학습 직후처럼 로컬 best.pt가 있으면 다운로드 생략
+    Returns: 평가 리포트 dict
+    """
+    client = get_client()
+    store = ModelStore()
+
+    if baseline_run_id is None:
+        baseline_run_id = find_production_run(client)
+    if baseline_run_id == run_id:
+        baseline_run_id = None
+
+    candidate_path = candidate_path or store.fetch(run_id, WEIGHTS_ARTIFACT)
+    export_dir = tempfile.mkdtemp(prefix="promotion_")
+
+    print(f"[PROMOTION] candidate={run_id} baseline={baseline_run_id or '-'}")
+    candidate = measure(
+        candidate_path, data_yaml,
+        logged_metrics=client.get_run(run_id).data.metrics,
+        export_dir=os.path.join(export_dir, "candidate"),
+    )
+
+    baseline = None
+    if baseline_run_id:
+        baseline_path = store.fetch(baseline_run_id, WEIGHTS_ARTIFACT, protect=[candidate_path])
+        baseline = measure(
+            baseline_path, data_yaml,
+            logged_metrics=client.get_run(baseline_run_id).data.metrics,
+            export_dir=os.path.join(export_dir, "baseline"),
+        )
+
+    verdict, reasons = decide(candidate, baseline)
+    report = {
+        "run_id": run_id,
+        "baseline_run_id": baseline_run_id,
+        "verdict": verdict,
+        "reasons": reasons,
+        "candidate": candidate,
+        "baseline": baseline,
+        "criteria": {
+            "max_map_drop": PROMOTION_MAX_MAP_DROP,
+            "max_latency_increase": PROMOTION_MAX_LATENCY_INCREASE,
+            "max_p95_ms": PROMOTION_MAX_P95_MS,
+            "imgsz": PROMOTION_IMGSZ,
+            "threads": PROMOTION_THREADS,
+        },
+        "evaluated_at": time.time(),
+    }
+
+    # ==============================
+    # MLflow 기록 (후보 run)
+    # ==============================
+    for prefix, values in (("eval", candidate), ("eval.baseline", baseline or {})):
+        for key, value in values.items():
+            if isinstance(value, (int, float)):
+                client.log_metric(run_id, f"{prefix}.{key}", value)
+    client.set_tag(run_id, TAG_VERDICT, verdict)
+    client.set_tag(run_id, TAG_REASONS, "; ".join(reasons)[:5000])
+    client.set_tag(run_id, TAG_BASELINE, baseline_run_id or "")
+
+    report_path = os.path.join(export_dir, "promotion.json")
+    with open(report_path, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    client.log_artifact(run_id, report_path, artifact_path="evaluation")
+
+    print(f"[PROMOTION] verdict={verdict} reasons={reasons}")
+    return report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark-gated model promotion")
+    parser.add_argument("--run-id", required=True)
+    parser.add_argument("--baseline-run-id", default=None)
+    parser.add_argument("--data", default=None, help="mAP 재검증용 data.yaml (없으면 MLflow 기록값 사용)")
+    args = parser.parse_args(argv)
+
+    report = evaluate_candidate(
+        args.run_id,
+        baseline_run_id=args.baseline_run_id,
+        data_yaml=args.data,
+    )
+    print(json.dumps(report, indent=2))
+    return 0 if report["verdict"] == "pass" else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,185 @@
+"""
+증분 학습 (Incremental Fine-tuning)
+- 기존 MLflow run의 best.pt 에서 시작 (범용 yolov8s.pt / yolo11s.pt 대신)
+- 학습 데이터 = 새로 라벨링된 데이터 전체 + 기존 데이터 중 일부(replay) 샘플
+  - replay 개수 = min(새 이미지 수 × replay_ratio, replay_max)
+  - 검증은 기존 val + 새 val 을 함께 사용 (기존 분포에서의 성능 저하 확인)
+- 짧은 스케줄(epochs 적게, 낮은 lr0) + backbone 앞쪽 레이어 freeze
+- 부모 run과의 관계는 MLflow tag lineage.* 로 기록
+
+주로 uncertain-images 스트림에서 라벨링한 데이터로 주간 모델 갱신 시 사용
+
+실행 방법 (ai/ 디렉토리 기준):
+$ python -m training.incremental --from-run-id <run_id> --new-data /data/incoming/2024-W21/data.yaml
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+try:
+    from training import dataset_cache
+    from inference.model_store import ModelStore
+except ImportError:
+    from ai.training import dataset_cache
+    from ai.inference.model_store import ModelStore
+
+# ==============================
+# Config
+# ==============================
+INCREMENTAL_EPOCHS = int(os.getenv("INCREMENTAL_EPOCHS", "10"))
+# 앞에서부터 freeze할 레이어 수 (YOLOv8 / YOLO11 backbone = 0~9)
+INCREMENTAL_FREEZE = int(os.getenv("INCREMENTAL_FREEZE", "10"))
+INCREMENTAL_LR0 = float(os.getenv("INCREMENTAL_LR0", "0.002"))
+INCREMENTAL_REPLAY_RATIO = float(os.getenv("INCREMENTAL_REPLAY_RATIO", "1.0"))
+INCREMENTAL_REPLAY_MAX = int(os.getenv("INCREMENTAL_REPLAY_MAX", "2000"))
+INCREMENTAL_WORK_DIR = os.getenv("INCREMENTAL_WORK_DIR", "/data/runs/incremental")
+
+WEIGHTS_ARTIFACT = "weights/best.pt"
+
+
+def _split_paths(data, data_yaml, split):
+    if not data.get(split):
+        return []
+    root = dataset_cache.dataset_root(data, data_yaml)
+    return [src for src, _ in dataset_cache.split_images(root, data[split])]
+
+
+def _write_list(path, images):
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("\n".join(images) + "\n")
+
+
+def build_incremental_dataset(new_data_yaml, base_data_yaml, out_dir,
+                              replay_ratio=INCREMENTAL_REPLAY_RATIO,
+                              replay_max=INCREMENTAL_REPLAY_MAX, seed=0):
+    """
+    새 데이터 + replay 샘플로 학습용 data.yaml 생성 (이미지 목록 .txt 방식, 원본 파일은 복사하지 않음)
+    Returns: (data_yaml_path, stats)
+    """
+    import yaml
+
+    new_data = dataset_cache.load_data_yaml(new_data_yaml)
+    base_data = dataset_cache.load_data_yaml(base_data_yaml)
+
+    # 클래스 인덱스가 달라지면 부모 모델의 head와 맞지 않음
+    base_names = base_data.get("names")
+    if new_data.get("names") and new_data["names"] != base_names:
+        raise ValueError("Class names of new data do not match the base dataset")
+
+    new_train = _split_paths(new_data, new_data_yaml, "train")
+    if not new_train:
+        raise ValueError(f"No training images found in {new_data_yaml}")
+    old_train = _split_paths(base_data, base_data_yaml, "train")
+
+    replay_count = min(int(len(new_train) * replay_ratio), replay_max, len(old_train))
+    replay = random.Random(seed).sample(old_train, replay_count)
+
+    val = _split_paths(base_data, base_data_yaml, "val") + _split_paths(new_data, new_data_yaml, "val")
+
+    out_dir = os.path.abspath(out_dir)
+    os.makedirs(out_dir, exist_ok=True)
+    _write_list(os.path.join(out_dir, "train.txt"), new_train + replay)
+    _write_list(os.path.join(out_dir, "val.txt"), val)
+
+    data = {k: v for k, v in base_data.items() if k not in ("path", *dataset_cache.SPLITS)}
+    data.update(path=out_dir, train="train.txt", val="val.txt")
+    data_yaml = os.path.join(out_dir, "data.yaml")
+    with open(data_yaml, "w", encoding="utf-8") as f:
+        yaml.safe_dump(data, f, allow_unicode=True, sort_keys=False)
+
+    stats = {"new": len(new_train), "replay": replay_count, "replay_pool": len(old_train), "val": len(val)}
+    print(f"[INCREMENTAL] dataset {data_yaml}: {stats}")
+    return data_yaml, stats
+
+
+def incremental_train(
+    *,
+    from_run_id: str,
+    new_data_yaml: str,
+    base_data_yaml: str = None,
+    epochs: int = INCREMENTAL_EPOCHS,
+    freeze: int = INCREMENTAL_FREEZE,
+    lr0: float = INCREMENTAL_LR0,
+    replay_ratio: float = INCREMENTAL_REPLAY_RATIO,
+    replay_max: int = INCREMENTAL_REPLAY_MAX,
+    experiment_name: str = None,
+    seed: int = 0,
+    run_tags: dict = None,
+    **kwargs
+):
+    """
+    from_run_id 의 best.pt 에서 이어서 짧게 학습 (새 run의 lineage.parent_run_id = from_run_id)
+    - kwargs 는 train() 으로 그대로 전달 (imgsz, batch, callbacks 등)
+    - kwargs 에 resume_from 이 있으면 데이터셋을 다시 만들지 않고 체크포인트에서 같은 run 으로 재개
+    Returns: 새 run_id
+    """
+    try:
+        from training.train import DATA_YAML, DEFAULT_EXPERIMENT_NAME, MLFLOW_TRACKING_URI, train
+    except ImportError:
+        from ai.training.train import DATA_YAML, DEFAULT_EXPERIMENT_NAME, MLFLOW_TRACKING_URI, train
+    import mlflow
+
+    if kwargs.get("resume_from"):
+        # 데이터셋 / 하이퍼파라미터 / lineage tag 는 최초 실행 시 체크포인트와 run 에 기록됨
+        print(f"[INCREMENTAL] resume parent={from_run_id} checkpoint={kwargs['resume_from']}")
+        return train(experiment_name=experiment_name or DEFAULT_EXPERIMENT_NAME, **kwargs)
+
+    base_data_yaml = base_data_yaml or DATA_YAML
+    work_dir = os.path.join(INCREMENTAL_WORK_DIR, f"{int(time.time())}_{from_run_id[:8]}")
+
+    mlflow.set_tracking_uri(MLFLOW_TRACKING_URI)
+    weights = ModelStore().fetch(from_run_id, WEIGHTS_ARTIFACT)
+    data_yaml, stats = build_incremental_dataset(
+        new_data_yaml, base_data_yaml, os.path.join(work_dir, "dataset"),
+        replay_ratio=replay_ratio, replay_max=replay_max, seed=seed,
+    )
+
+    lineage = {
+        "lineage.mode": "incremental",
+        "lineage.parent_run_id": from_run_id,
+        "lineage.new_data": os.path.abspath(new_data_yaml),
+        "lineage.base_data": os.path.abspath(base_data_yaml),
+        "lineage.new_images": str(stats["new"]),
+        "lineage.replay_images": str(stats["replay"]),
+        "lineage.freeze": str(freeze),
+    }
+    print(f"[INCREMENTAL] parent={from_run_id} weights={weights} epochs={epochs} freeze={freeze}")
+
+    kwargs.setdefault("project", os.path.join(work_dir, "runs"))
+    return train(
+        model_name=weights,
+        data_yaml=data_yaml,
+        epochs=epochs,
+        freeze=freeze,
+        lr0=lr0,
+        seed=seed,
+        experiment_name=experiment_name or DEFAULT_EXPERIMENT_NAME,
+        run_tags={**lineage, **(run_tags or {})},
+        **kwargs
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Incremental fine-tuning from an MLflow run")
+    parser.add_argument("--from-run-id", required=True, help="시작 가중치(best.pt)를 가져올 MLflow run")
+    parser.add_argument("--new-data", required=True, help="새로 라벨링된 데이터 data.yaml")
+    parser.add_argument("--base-data", default=None, help="기존 데이터 data.yaml (기본: DATASET_PATH/data.yaml)")
+    parser.add_argument("--epochs", type=int, default=INCREMENTAL_EPOCHS)
+    parser.add_argument("--freeze", type=int, default=INCREMENTAL_FREEZE)
+    parser.add_argument("--replay-ratio", type=float, default=INCREMENTAL_REPLAY_RATIO)
+    parser.add_argument("--replay-max", type=int, default=INCREMENTAL_REPLAY_MAX)
+    args = parser.parse_args()
+
+    incremental_train(
+        from_run_id=args.from_run_id,
+        new_data_yaml=args.new_data,
+        base_data_yaml=args.base_data,
+        epochs=args.epochs,
+        freeze=args.freeze,
+        replay_ratio=args.replay_ratio,
+        replay_max=args.replay_max,
+    )
@@ -0,0 +1,218 @@
+"""
+학습 전용 자식 프로세스 실행기
+- 추론 서버(/predict)와 같은 프로세스에서 학습하지 않도록 spawn 프로세스에서 train() 실행
+- CPU affinity / nice / 스레드 수 제한으로 추론용 코어를 보호
+- 진행 상황(epoch 단위)은 Pipe로 부모 프로세스에 전달
+- cancel() 시 SIGTERM → 자식에서 KeyboardInterrupt로 변환되어 MLflow run이 정상 종료(FAILED)됨
+
+환경변수
+- TRAIN_CPUS    : 학습 프로세스에 할당할 코어 (예: "2-3", "4,5,6"). 비우면 제한 없음
+- TRAIN_NICE    : 학습 프로세스 nice 값 (기본 10, 높을수록 낮은 우선순위)
+- TRAIN_THREADS : torch / OpenMP 스레드 수 (기본: 할당 코어 수)
+"""
+import asyncio
+import os
+import signal
+import sys
+from multiprocessing import get_context
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+TRAIN_CPUS = os.getenv("TRAIN_CPUS", "")
+TRAIN_NICE = int(os.getenv("TRAIN_NICE", "10"))
+TRAIN_THREADS = int(os.getenv("TRAIN_THREADS", "0"))
+
+
+def parse_cpu_list(spec):
+    """"0-2,5" → [0, 1, 2, 5]"""
+    cpus = []
+    for part in filter(None, (p.strip() for p in spec.split(","))):
+        if "-" in part:
+            start, end = part.split("-", 1)
+            cpus.extend(range(int(start), int(end) + 1))
+        else:
+            cpus.append(int(part))
+    return sorted(set(cpus))
+
+
+def _raise_interrupt(signum, frame):
+    raise KeyboardInterrupt(f"signal {signum}")
+
+
+def _train_entry(conn, params, cpus, nice, threads, mode="full"):
+    """
+    자식 프로세스 진입점
+    - 메시지: {"type": "started" | "run_started" | "epoch" | "finished" | "failed" | "cancelled", ...}
+    """
+    if threads:
+        for var in ("OMP_NUM_THREADS", "MKL_NUM_THREADS", "OPENBLAS_NUM_THREADS"):
+            os.environ[var] = str(threads)
+    if cpus and hasattr(os, "sched_setaffinity"):
+        os.sched_setaffinity(0, cpus)
+    if nice:
+        os.nice(nice)
+    signal.signal(signal.SIGTERM, _raise_interrupt)
+
+    try:
+        import torch
+        if mode == "incremental":
+            try:
+                from training.incremental import incremental_train as train
+            except ImportError:
+                from ai.training.incremental import incremental_train as train
+        elif mode == "distill":
+            try:
+                from training.distill import distill_train as train
+            except ImportError:
+                from ai.training.distill import distill_train as train
+        else:
+            try:
+                from training.train import train
+            except ImportError:
+                from ai.training.train import train
+
+        if threads:
+            torch.set_num_threads(threads)
+
+        def on_pretrain_routine_start(trainer):
+            # train() 안에서 생성된 MLflow run id를 학습 시작 시점에 부모로 전달 (중단된 run 추적용)
+            import mlflow
+            run = mlflow.active_run()
+            if run:
+                conn.send({"type": "run_started", "run_id": run.info.run_id})
+
+        def on_fit_epoch_end(trainer):
+            conn.send({
+                "type": "epoch",
+                "epoch": trainer.epoch + 1,
+                "epochs": trainer.epochs,
+                "metrics": {k: float(v) for k, v in (trainer.metrics or {}).items()},
+                "last_checkpoint": str(trainer.last),
+                "images_per_sec": getattr(trainer, "images_per_sec", None),
+            })
+
+        conn.send({"type": "started", "pid": os.getpid(), "cpus": cpus, "nice": nice, "threads": threads})
+        run_id = train(callbacks={
+            "on_pretrain_routine_start": on_pretrain_routine_start,
+            "on_fit_epoch_end": on_fit_epoch_end,
+        }, **params)
+        conn.send({"type": "finished", "run_id": run_id})
+    except KeyboardInterrupt:
+        conn.send({"type": "cancelled"})
+    except Exception as e:
+        conn.send({"type": "failed", "error": str(e)})
+    finally:
+        conn.close()
+
+
+class TrainingProcess:
+    """
+    train()을 별도 프로세스에서 실행하고 진행 상황을 수집
+
+    Usage:
+        proc = TrainingProcess({"model_name": "yolov8s.pt", "epochs": 10})
+        proc.start()
+        await proc.wait(on_message=print)
+    """
+
+    def __init__(self, params, cpus=None, nice=None, threads=None, mode="full"):
+        self.params = params
+        # "full": train() / "incremental": incremental_train() / "distill": distill_train()
+        self.mode = mode
+        self.cpus = cpus if cpus is not None else parse_cpu_list(TRAIN_CPUS)
+        self.nice = TRAIN_NICE if nice is None else nice
+        self.threads = threads if threads is not None else (TRAIN_THREADS or len(self.cpus))
+        self.status = "pending"
+        self.progress = {}
+        self.run_id = None
+        self.error = None
+        self._proc = None
+        self._conn = None
+
+    def start(self):
+        ctx = get_context("spawn")
+        self._conn, child_conn = ctx.Pipe(duplex=False)
+        self._proc = ctx.Process(
+            target=_train_entry,
+            args=(child_conn, self.params, self.cpus, self.nice, self.threads, self.mode),
+            daemon=False,
+            name="training-worker",
+        )
+        self._proc.start()
+        child_conn.close()
+        self.status = "running"
+
+    def _handle(self, msg):
+        kind = msg.get("type")
+        if kind == "run_started":
+            self.run_id = msg.get("run_id")
+        elif kind == "epoch":
+            self.progress = msg
+        elif kind == "finished":
+            self.status = "finished"
+            self.run_id = msg.get("run_id")
+        elif kind == "failed":
+            self.status = "failed"
+            self.error = msg.get("error")
+        elif kind == "cancelled":
+            self.status = "cancelled"
+
+    def poll(self):
+        """파이프에 쌓인 메시지를 모두 읽어 상태 갱신"""
+        messages = []
+        try:
+            while self._conn.poll():
+                msg = self._conn.recv()
+                self._handle(msg)
+                messages.append(msg)
+        except (EOFError, OSError):
+            pass
+        return messages
+
+    def is_alive(self):
+        return self._proc is not None and self._proc.is_alive()
+
+    async def wait(self, on_message=None, interval=1.0):
+        """자식 프로세스 종료까지 대기 (이벤트 루프를 막지 않도록 주기적으로 poll)"""
+        while True:
+            for msg in self.poll():
+                if on_message:
+                    on_message(msg)
+            if not self.is_alive():
+                break
+            await asyncio.sleep(interval)
+
+        self._proc.join()
+        for msg in self.poll():
+            if on_message:
+                on_message(msg)
+        if self.status == "running":
+            # 메시지 없이 종료된 경우 (OOM kill 등)
+            self.status = "failed"
+            self.error = f"training process exited with code {self._proc.exitcode}"
+        return self.status
+
+    def cancel(self, timeout=30):
+        """SIGTERM → timeout 후에도 살아 있으면 SIGKILL"""
+        if not self.is_alive():
+            return
+        self._proc.terminate()
+        self._proc.join(timeout)
+        if self._proc.is_alive():
+            self._proc.kill()
+            self._proc.join()
+        if self.status == "running":
+            self.status = "cancelled"
+
+    def info(self):
+        return {
+            "status": self.status,
+            "mode": self.mode,
+            "pid": self._proc.pid if self._proc else None,
+            "cpus": self.cpus,
+            "nice": self.nice,
+            "threads": self.threads,
+            "progress": self.progress,
+            "run_id": self.run_id,
+            "error": self.error,
+        }
@@ -0,0 +1,343 @@
+"""
+하이퍼파라미터 스윕 (병렬 trial + early stopping)
+- 탐색 공간에서 trial 파라미터를 샘플링하여 TrainingProcess(자식 프로세스)로 동시에 실행
+- 코어 예산(TRAIN_CPUS 또는 전체 코어)을 parallel 개 그룹으로 나눠 trial마다 한 그룹씩 고정
+- 뒤처지는 trial은 학습 도중 중단 (SIGTERM → MLflow run FAILED 로 종료)
+  - random  : median stopping (같은 epoch에서 다른 trial들의 중앙값보다 낮으면 중단)
+  - halving : successive halving (rung epoch = min_epochs * eta^k 마다 상위 1/eta 만 계속)
+- 모든 trial은 MLflow parent run(sweep_<id>) 아래 child run으로 기록
+
+탐색 공간 예시
+{
+  "lr0":    {"type": "loguniform", "low": 0.0001, "high": 0.01},
+  "mosaic": {"type": "uniform", "low": 0.0, "high": 1.0},
+  "mixup":  {"type": "uniform", "low": 0.0, "high": 0.3},
+  "imgsz":  {"type": "choice", "values": [416, 512, 640]}
+}
+
+실행 방법 (ai/ 디렉토리 기준):
+$ python -m training.sweep --space space.json --strategy halving --trials 12 --parallel 3 --epochs 30
+"""
+import argparse
+import asyncio
+import json
+import math
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+import uuid
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+try:
+    from training.runner import TRAIN_CPUS, TrainingProcess, parse_cpu_list
+    from training.train import MLFLOW_TRACKING_URI
+except ImportError:
+    from ai.training.runner import TRAIN_CPUS, TrainingProcess, parse_cpu_list
+    from ai.training.train import MLFLOW_TRACKING_URI
+
+STRATEGIES = ("random", "halving")
+DEFAULT_OBJECTIVE = "metrics/mAP50-95(B)"
+
+
+# ==============================
+# Search Space
+# ==============================
+def sample_params(space, rng):
+    params = {}
+    for name, spec in space.items():
+        kind = spec.get("type", "choice")
+        if kind == "choice":
+            params[name] = rng.choice(spec["values"])
+        elif kind == "uniform":
+            params[name] = rng.uniform(spec["low"], spec["high"])
+        elif kind == "loguniform":
+            params[name] = math.exp(rng.uniform(math.log(spec["low"]), math.log(spec["high"])))
+        elif kind == "int":
+            params[name] = rng.randint(spec["low"], spec["high"])
+        else:
+            raise ValueError(f"Unknown search space type for {name}: {kind}")
+    return params
+
+
+def split_cpus(parallel, cpus=None):
+    """코어 예산을 parallel 개의 연속 구간으로 분할 (코어가 부족하면 parallel 축소)"""
+    if not cpus:
+        cpus = sorted(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else list(range(os.cpu_count() or 1))
+    parallel = max(1, min(parallel, len(cpus)))
+    size, extra = divmod(len(cpus), parallel)
+    groups, start = [], 0
+    for i in range(parallel):
+        end = start + size + (1 if i < extra else 0)
+        groups.append(cpus[start:end])
+        start = end
+    return groups
+
+
+# ==============================
+# Sweep
+# ==============================
+class Sweep:
+    """
+    Usage:
+        sweep = Sweep(space, {"model_name": "yolov8n.pt"}, strategy="halving", n_trials=12, parallel=3)
+        summary = await sweep.run()
+    """
+
+    def __init__(self, space, base_params=None, strategy="random", n_trials=8, parallel=2,
+                 max_epochs=30, min_epochs=3, eta=3, objective=DEFAULT_OBJECTIVE,
+                 experiment_name="hyperparameter_sweep", seed=0, cpus=None):
+        if strategy not in STRATEGIES:
+            raise ValueError(f"strategy must be one of {STRATEGIES}")
+        if n_trials < 1 or parallel < 1:
+            raise ValueError("n_trials and parallel must be >= 1")
+        if min_epochs < 1 or max_epochs < 1:
+            raise ValueError("min_epochs and max_epochs must be >= 1")
+        if strategy == "halving" and eta < 2:
+            raise ValueError("eta must be >= 2 for successive halving")
+        self.sweep_id = uuid.uuid4().hex[:8]
+        self.space = space
+        self.base_params = dict(base_params or {})
+        self.strategy = strategy
+        self.max_epochs = max_epochs
+        self.min_epochs = min_epochs
+        self.eta = eta
+        self.objective = objective
+        self.experiment_name = experiment_name
+        self.cpu_groups = split_cpus(parallel, cpus if cpus is not None else parse_cpu_list(TRAIN_CPUS))
+
+        rng = random.Random(seed)
+        self.trials = [
+            {"trial": i, "params": sample_params(space, rng), "status": "pending",
+             "history": {}, "best": None, "run_id": None, "cpus": None, "error": None}
+            for i in range(n_trials)
+        ]
+        self.rungs = {}
+        rung = min_epochs
+        while strategy == "halving" and rung < max_epochs:
+            self.rungs[rung] = {}
+            rung *= eta
+
+        self.status = "pending"
+        self.parent_run_id = None
+        self._procs = {}
+        self._cancelled = False
+
+    # ------------------------------
+    # MLflow parent run
+    # ------------------------------
+    def _client(self):
+        import mlflow
+        mlflow.set_tracking_uri(MLFLOW_TRACKING_URI)
+        return mlflow.MlflowClient()
+
+    def _start_parent(self):
+        import mlflow
+        mlflow.set_tracking_uri(MLFLOW_TRACKING_URI)
+        experiment = mlflow.set_experiment(self.experiment_name)
+        client = self._client()
+        run = client.create_run(
+            experiment.experiment_id,
+            run_name=f"sweep_{self.sweep_id}",
+            tags={"sweep.id": self.sweep_id, "sweep.strategy": self.strategy},
+        )
+        self.parent_run_id = run.info.run_id
+        for key, value in {
+            "strategy": self.strategy,
+            "n_trials": len(self.trials),
+            "parallel": len(self.cpu_groups),
+            "max_epochs": self.max_epochs,
+            "min_epochs": self.min_epochs,
+            "eta": self.eta,
+            "objective": self.objective,
+            "search_space": json.dumps(self.space),
+            **{f"base.{k}": v for k, v in self.base_params.items()},
+        }.items():
+            client.log_param(self.parent_run_id, key, str(value)[:6000])
+        print(f"[SWEEP] parent run {self.parent_run_id} (Exp: {self.experiment_name})")
+
+    def _finish_parent(self, summary):
+        client = self._client()
+        for trial in self.trials:
+            if trial["best"] is not None:
+                client.log_metric(self.parent_run_id, "trial_best", trial["best"], step=trial["trial"])
+        best = summary.get("best_trial")
+        if best:
+            client.log_metric(self.parent_run_id, "best_objective", best["best"])
+            client.set_tag(self.parent_run_id, "sweep.best_run_id", best["run_id"] or "")
+            for key, value in best["params"].items():
+                client.log_param(self.parent_run_id, f"best.{key}", value)
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, "sweep.json")
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump(summary, f, indent=2)
+            client.log_artifact(self.parent_run_id, path)
+        client.set_terminated(self.parent_run_id, "KILLED" if self._cancelled else "FINISHED")
+
+    # ------------------------------
+    # Early stopping
+    # ------------------------------
+    def _should_stop(self, trial, epoch):
+        """trial이 epoch까지 보고한 최고값 기준으로 중단 여부 판단"""
+        value = trial["best"]
+        if value is None or epoch < self.min_epochs:
+            return False
+
+        if self.strategy == "halving":
+            rung = next((r for r in sorted(self.rungs, reverse=True) if epoch >= r), None)
+            if rung is None or trial["trial"] in self.rungs[rung]:
+                return False
+            self.rungs[rung][trial["trial"]] = value
+            values = sorted(self.rungs[rung].values(), reverse=True)
+            if len(values) < self.eta:
+                return False
+            keep = max(1, len(values) // self.eta)
+            return value < values[keep - 1]
+
+        # median stopping: 같은 epoch에 도달한 다른 trial들의 최고값 중앙값과 비교
+        others = []
+        for other in self.trials:
+            if other is trial or not other["history"] or max(other["history"]) < epoch:
+                continue
+            others.append(max(v for e, v in other["history"].items() if e <= epoch))
+        if len(others) < 2:
+            return False
+        return value < statistics.median(others)
+
+    def _on_message(self, trial, proc, msg):
+        kind = msg.get("type")
+        if kind == "run_started":
+            trial["run_id"] = msg.get("run_id")
+        elif kind == "epoch":
+            value = msg.get("metrics", {}).get(self.objective)
+            if value is None:
+                return
+            epoch = msg["epoch"]
+            trial["history"][epoch] = value
+            trial["best"] = value if trial["best"] is None else max(trial["best"], value)
+            if trial["status"] == "running" and self._should_stop(trial, epoch):
+                trial["status"] = "pruned"
+                print(f"[SWEEP] trial {trial['trial']} pruned at epoch {epoch} ({self.objective}={trial['best']:.4f})")
+                asyncio.get_running_loop().create_task(asyncio.to_thread(proc.cancel))
+
+    # ------------------------------
+    # Run
+    # ------------------------------
+    def _trial_params(self, trial):
+        params = {
+            **self.base_params,
+            **trial["params"],
+            "epochs": self.max_epochs,
+            "experiment_name": self.experiment_name,
+            "parent_run_id": self.parent_run_id,
+            "name": f"sweep_{self.sweep_id}_trial{trial['trial']}",
+            # 승격 평가는 스윕이 끝난 뒤 선택된 run에만 수행
+            "evaluate": False,
+        }
+        return params
+
+    async def _run_trial(self, trial, cpus):
+        params = self._trial_params(trial)
+        proc = TrainingProcess(params, cpus=cpus, threads=len(cpus))
+        self._procs[trial["trial"]] = proc
+        trial.update(status="running", cpus=cpus, started_at=time.time())
+        print(f"[SWEEP] trial {trial['trial']} start | cpus={cpus} params={trial['params']}")
+        proc.start()
+
+        status = await proc.wait(on_message=lambda msg: self._on_message(trial, proc, msg))
+        trial["run_id"] = trial["run_id"] or proc.run_id
+        trial["finished_at"] = time.time()
+        if trial["status"] == "running":
+            trial["status"] = status
+            trial["error"] = proc.error
+        print(f"[SWEEP] trial {trial['trial']} {trial['status']} | best={trial['best']}")
+
+    async def run(self):
+        self.status = "running"
+        await asyncio.to_thread(self._start_parent)
+
+        pending = list(self.trials)
+        free_groups = list(self.cpu_groups)
+        running = {}
+        while (pending and not self._cancelled) or running:
+            while pending and free_groups and not self._cancelled:
+                trial = pending.pop(0)
+                cpus = free_groups.pop(0)
+                task = asyncio.create_task(self._run_trial(trial, cpus))
+                running[task] = cpus
+            done, _ = await asyncio.wait(running, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                free_groups.append(running.pop(task))
+                if task.exception():
+                    print(f"[SWEEP] trial error: {task.exception()}")
+
+        for trial in pending:
+            trial["status"] = "cancelled"
+        self.status = "cancelled" if self._cancelled else "finished"
+        summary = self.info()
+        await asyncio.to_thread(self._finish_parent, summary)
+        return summary
+
+    def cancel(self):
+        """대기 중인 trial은 시작하지 않고, 실행 중인 trial은 중단"""
+        self._cancelled = True
+        for proc in self._procs.values():
+            if proc.is_alive():
+                proc.cancel()
+
+    def info(self):
+        finished = [t for t in self.trials if t["best"] is not None and t["status"] == "finished"]
+        best = max(finished, key=lambda t: t["best"], default=None)
+        return {
+            "sweep_id": self.sweep_id,
+            "status": self.status,
+            "strategy": self.strategy,
+            "parent_run_id": self.parent_run_id,
+            "objective": self.objective,
+            "cpu_groups": self.cpu_groups,
+            "trials": self.trials,
+            "best_trial": best,
+        }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Parallel hyperparameter sweep")
+    parser.add_argument("--space", required=True, help="탐색 공간 JSON 파일")
+    parser.add_argument("--strategy", choices=STRATEGIES, default="halving")
+    parser.add_argument("--trials", type=int, default=8)
+    parser.add_argument("--parallel", type=int, default=2)
+    parser.add_argument("--epochs", type=int, default=30)
+    parser.add_argument("--min-epochs", type=int, default=3)
+    parser.add_argument("--eta", type=int, default=3)
+    parser.add_argument("--model", default="yolov8n.pt")
+    parser.add_argument("--experiment", default="hyperparameter_sweep")
+    parser.add_argument("--objective", default=DEFAULT_OBJECTIVE)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    with open(args.space, "r", encoding="utf-8") as f:
+        space = json.load(f)
+
+    sweep = Sweep(
+        space,
+        {"model_name": args.model},
+        strategy=args.strategy,
+        n_trials=args.trials,
+        parallel=args.parallel,
+        max_epochs=args.epochs,
+        min_epochs=args.min_epochs,
+        eta=args.eta,
+        objective=args.objective,
+        experiment_name=args.experiment,
+        seed=args.seed,
+    )
+    summary = asyncio.run(sweep.run())
+    print(json.dumps(summary["best_trial"], indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -3,9 +3,20 @@
 # ==============================
 
 import os
+import sys
+import time
 import mlflow
 from ultralytics import YOLO
 
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+try:
+    from training import dataset_cache
+    from preprocessing import shards
+except ImportError:
+    from ai.training import dataset_cache
+    from ai.preprocessing import shards
+
 # --- [필수] Windows OpenMP 충돌 방지 ---
 os.environ["KMP_DUPLICATE_LIB_OK"] = "TRUE"
 
@@ -21,6 +32,41 @@ DEFAULT_EXPERIMENT_NAME = os.getenv(
     "MLFLOW_EXPERIMENT_NAME",
     "smart-cart-training"
 )
+# 학습 직후 승격 평가(training/evaluate.py) 실행 여부 기본값
+TRAIN_EVALUATE = os.getenv("TRAIN_EVALUATE", "1") == "1"
+# 데이터 로더 워커 수 ("auto": 할당된 코어 수 기준 자동)
+TRAIN_LOADER_WORKERS = os.getenv("TRAIN_LOADER_WORKERS", "auto")
+# 1이면 디코딩 + 리사이즈된 이미지 캐시(training/dataset_cache.py) 사용
+TRAIN_DATASET_CACHE = os.getenv("TRAIN_DATASET_CACHE", "1") == "1"
+# 샤드 위치 (로컬 디렉토리 또는 s3://data/<prefix>). 지정 시 기본 데이터셋 대신 샤드를 로컬로 풀어 사용
+TRAIN_SHARDS = os.getenv("TRAIN_SHARDS", "")
+MAX_LOADER_WORKERS = 8
+
+
+def auto_workers():
+    """메인(학습) 프로세스용 코어 1개를 남기고 나머지를 로더 워커로 사용"""
+    return max(0, min(dataset_cache.available_cpus() - 1, MAX_LOADER_WORKERS))
+
+
+def throughput_callbacks():
+    """epoch별 학습 처리량(images/sec)을 MLflow metric train_images_per_sec 로 기록"""
+    state = {}
+
+    def on_train_epoch_start(trainer):
+        state["start"] = time.perf_counter()
+
+    def on_train_epoch_end(trainer):
+        elapsed = time.perf_counter() - state.get("start", time.perf_counter())
+        images = len(trainer.train_loader.dataset)
+        if elapsed > 0:
+            trainer.images_per_sec = images / elapsed
+            mlflow.log_metric("train_images_per_sec", trainer.images_per_sec, step=trainer.epoch + 1)
+            print(f"[Training] epoch {trainer.epoch + 1}: {trainer.images_per_sec:.1f} images/sec")
+
+    return {
+        "on_train_epoch_start": on_train_epoch_start,
+        "on_train_epoch_end": on_train_epoch_end,
+    }
 
 # ==============================
 # Train Function
@@ -36,6 +82,14 @@ def train(
     name: str = "mlflow_run",
     experiment_name: str = DEFAULT_EXPERIMENT_NAME,
     model_name: str = "yolov8s.pt",
+    callbacks: dict = None,
+    evaluate: bool = TRAIN_EVALUATE,
+    use_dataset_cache: bool = TRAIN_DATASET_CACHE,
+    parent_run_id: str = None,
+    run_tags: dict = None,
+    resume_from: str = None,
+    resume_run_id: str = None,
+    shards_source: str = TRAIN_SHARDS,
     **kwargs  # 🔥 [NEW] 모든 추가 파라미터를 받음
 ):
     """
@@ -44,6 +98,14 @@ def train(
     Args:
         model_name: 사전학습 모델 (.pt)
         experiment_name: MLflow experiment name
+        callbacks: ultralytics 콜백 {이벤트명: 함수} (예: on_fit_epoch_end 진행률 보고)
+        evaluate: 학습 후 운영 모델 대비 승격 평가 수행 (결과는 promotion.verdict tag)
+        use_dataset_cache: 데이터셋 해시 + imgsz 기준 디코딩 캐시 사용 (반복 실험 시 JPEG 디코딩 생략)
+        parent_run_id: 지정 시 해당 MLflow run의 child run으로 기록 (스윕 trial 등)
+        run_tags: MLflow run에 추가할 tag (증분 학습 lineage 등)
+        resume_from: 중단된 학습의 last.pt 경로. 지정 시 체크포인트에 저장된 설정으로 이어서 학습
+        resume_run_id: resume 시 이어서 기록할 기존 MLflow run id
+        shards_source: 데이터셋 샤드 위치 (preprocessing/shards.py). data_yaml 이 기본값일 때만 적용
         **kwargs: model.train()에 전달할 모든 추가 파라미터 (mosaic, mixup, lr0, lrf 등)
     """
 
@@ -55,18 +117,29 @@ def train(
 
     print(f"[MLflow] URI        : {MLFLOW_TRACKING_URI}")
     print(f"[MLflow] Experiment : {experiment_name}")
-    print(f"[Training] Model    : {model_name}")
+    print(f"[Training] Model    : {model_name if not resume_from else resume_from + ' (resume)'}")
 
     # ==============================
     # Load Model
     # ==============================
-    model = YOLO(model_name)
+    model = YOLO(resume_from or model_name)
+    for event, fn in throughput_callbacks().items():
+        model.add_callback(event, fn)
+    for event, fn in (callbacks or {}).items():
+        model.add_callback(event, fn)
 
     # ==============================
     # MLflow Run
     # ==============================
     mlflow.end_run()  # 혹시 남아있는 run 정리
-    with mlflow.start_run() as run:
+    tags = dict(run_tags or {})
+    if parent_run_id:
+        tags["mlflow.parentRunId"] = parent_run_id
+    with mlflow.start_run(
+        run_id=resume_run_id if resume_from else None,
+        run_name=name if parent_run_id and not resume_from else None,
+        tags=tags or None,
+    ) as run:
         run_id = run.info.run_id
         print(f"[MLflow] Run ID: {run_id}")
 
@@ -88,7 +161,7 @@ def train(
             "epochs": epochs,
             "batch": batch,
             "device": device,
-            "workers": 0,  # Windows/Linux 호환성 안전값
+            "workers": TRAIN_LOADER_WORKERS,
             
             # --- Augmentation Defaults ---
             "mosaic": 1.0,
@@ -110,6 +183,28 @@ def train(
         
         # kwargs로 들어온 값이 있다면 덮어쓰기 (Override)
         train_args.update(kwargs)
+        if train_args["workers"] == "auto":
+            train_args["workers"] = auto_workers()
+        else:
+            train_args["workers"] = int(train_args["workers"])
+
+        # ==============================
+        # Dataset Cache
+        # ==============================
+        dataset_hash = None
+        if shards_source and not resume_from and data_yaml == DATA_YAML and "data" not in kwargs:
+            # 작은 파일 수천 개 대신 큰 샤드를 순차로 읽어 로컬 미러 생성 (같은 샤드는 재사용)
+            train_args["data"] = shards.materialize(shards_source)
+        source_data = train_args["data"]
+        if use_dataset_cache and not resume_from and "cache" not in kwargs and os.path.exists(source_data):
+            try:
+                train_args["data"], manifest = dataset_cache.prepare(source_data, train_args["imgsz"])
+                train_args["cache"] = "disk"
+                dataset_hash = manifest["dataset_hash"]
+            except Exception as e:
+                # 캐시 준비 실패 시 원본 데이터로 학습
+                print(f"[DATASET_CACHE] disabled: {e}")
+                train_args["data"] = source_data
 
         # ==============================
         # Log Params
@@ -117,14 +212,24 @@ def train(
         # 로깅을 위해 model_name도 포함
         log_params = train_args.copy()
         log_params["model_name"] = model_name
-        mlflow.log_params(log_params)
+        if shards_source and source_data != data_yaml:
+            log_params["shards_source"] = shards_source
+        if dataset_hash:
+            log_params["source_data"] = source_data
+            log_params["dataset_hash"] = dataset_hash
 
         print("[Training] Start with params:", train_args)
 
         # ==============================
         # Train
         # ==============================
-        results = model.train(**train_args)
+        if resume_from:
+            # 데이터 / epoch / 하이퍼파라미터는 체크포인트에 저장된 값 사용 (파라미터는 최초 실행 시 기록됨)
+            mlflow.set_tag("resumed_from", resume_from)
+            results = model.train(resume=True)
+        else:
+            mlflow.log_params(log_params)
+            results = model.train(**train_args)
 
         # ==============================
         # Metrics
@@ -171,6 +276,26 @@ def train(
 
         print("[MLflow] Artifacts uploaded")
 
+        # ==============================
+        # Promotion Evaluation
+        # ==============================
+        if evaluate:
+            try:
+                from training.evaluate import evaluate_candidate
+            except ImportError:
+                from ai.training.evaluate import evaluate_candidate
+            try:
+                evaluate_candidate(
+                    run_id,
+                    candidate_path=best_model_path,
+                    data_yaml=data_yaml,
+                )
+            except Exception as e:
+                # 평가 실패는 학습 결과를 무효화하지 않음 (verdict=error → 승격 게이트 통과 불가)
+                print(f"[PROMOTION] evaluation failed: {e}")
+                mlflow.set_tag("promotion.verdict", "error")
+                mlflow.set_tag("promotion.reasons", str(e)[:5000])
+
         return run_id
 
 
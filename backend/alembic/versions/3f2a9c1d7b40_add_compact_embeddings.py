@@ -0,0 +1,49 @@
+"""add compact halfvec embeddings
+
+Revision ID: 3f2a9c1d7b40
+Revises:
+Create Date: 2026-10-19 10:00:00.000000
+
+product / recipe 에 embedding 의 앞 256차원을 잘라 재정규화한 halfvec 생성 컬럼과
+recipe.embedding_compact HNSW 인덱스를 추가합니다.
+생성 컬럼(STORED)이므로 기존 행은 ADD COLUMN 시점에 채워지고,
+이후 embedding 이 갱신되면 자동으로 다시 계산됩니다.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from app.models import COMPACT_EMBEDDING_DIM, COMPACT_EMBEDDING_EXPR
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3f2a9c1d7b40'
+down_revision: Union[str, Sequence[str], None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+TABLES = ("product", "recipe")
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # halfvec / subvector / l2_normalize 는 pgvector 0.7.0 이상 필요
+    op.execute("CREATE EXTENSION IF NOT EXISTS vector")
+    # seed_data.py(create_all)로 이미 컬럼이 만들어진 DB에서도 실행 가능하도록 IF NOT EXISTS
+    for table in TABLES:
+        op.execute(
+            f"ALTER TABLE {table} ADD COLUMN IF NOT EXISTS embedding_compact "
+            f"halfvec({COMPACT_EMBEDDING_DIM}) GENERATED ALWAYS AS ({COMPACT_EMBEDDING_EXPR}) STORED"
+        )
+    op.execute(
+        "CREATE INDEX IF NOT EXISTS ix_recipe_embedding_compact_hnsw "
+        "ON recipe USING hnsw (embedding_compact halfvec_cosine_ops)"
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("DROP INDEX IF EXISTS ix_recipe_embedding_compact_hnsw")
+    for table in TABLES:
+        op.execute(f"ALTER TABLE {table} DROP COLUMN IF EXISTS embedding_compact")
@@ -0,0 +1,41 @@
+"""add embedding ann indexes
+
+Revision ID: 7c1e4b2a9d53
+Revises: 3f2a9c1d7b40
+Create Date: 2026-10-19 14:00:00.000000
+
+recipe / product 의 embedding(Vector 1536)에 ANN 인덱스를 추가합니다.
+인덱스 종류와 빌드 파라미터는 환경변수로 지정합니다 (app/db/vector_index.py).
+  VECTOR_INDEX_TYPE=hnsw     HNSW_M=16, HNSW_EF_CONSTRUCTION=64
+  VECTOR_INDEX_TYPE=ivfflat  IVFFLAT_LISTS=0 (0: 행 수 / 1000, 임베딩을 채운 뒤 실행)
+파라미터를 바꿔 다시 만들려면 downgrade → upgrade 하세요.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from app.db.vector_index import VECTOR_INDEX_TYPE, create_index, drop_indexes
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7c1e4b2a9d53'
+down_revision: Union[str, Sequence[str], None] = '3f2a9c1d7b40'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+TABLES = ("recipe", "product")
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    conn = op.get_bind()
+    for table in TABLES:
+        create_index(conn, table, kind=VECTOR_INDEX_TYPE)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    conn = op.get_bind()
+    for table in TABLES:
+        drop_indexes(conn, table)
@@ -22,6 +22,13 @@ class Settings:
     BASE_URL = os.getenv("BASE_URL", "http://localhost:8000")
     SECRET_KEY = os.getenv("SECRET_KEY", "dev_secret_key_change_me_in_production")
 
+    # 추천 검색 엔진: pgvector(DB 검색) / numpy(app/services/vector_search.py, 프로세스 메모리)
+    RECOMMENDATION_ENGINE = os.getenv("RECOMMENDATION_ENGINE", "pgvector")
+    # 추천 벡터 검색: full(Vector 1536) / compact(halfvec 256, embedding_compact 컬럼)
+    RECOMMENDATION_VECTOR_MODE = os.getenv("RECOMMENDATION_VECTOR_MODE", "full")
+    # compact 모드에서 상위 N개 후보를 full 벡터로 재정렬 (0이면 재정렬 안 함)
+    RECOMMENDATION_RERANK_CANDIDATES = int(os.getenv("RECOMMENDATION_RERANK_CANDIDATES", "50"))
+
 settings = Settings()
 
 
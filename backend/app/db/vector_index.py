@@ -0,0 +1,70 @@
+# app/db/vector_index.py
+"""
+[pgvector ANN 인덱스 관리]
+- 빌드: HNSW(m, ef_construction) / IVFFlat(lists). alembic 마이그레이션과 벤치마크가 같은 DDL을 사용
+- 검색: hnsw.ef_search / ivfflat.probes 를 트랜잭션 단위(set_config(..., is_local=true))로 지정
+  값이 클수록 recall↑ 지연 시간↑. ef_search 는 LIMIT 보다 작으면 결과가 잘리므로 LIMIT 이상으로 맞춤
+
+※ IVFFlat 은 빌드 시점의 데이터로 클러스터 중심을 잡으므로, 임베딩을 채운 뒤에 만들어야 합니다.
+"""
+import os
+from typing import Optional
+
+from sqlalchemy import text
+
+VECTOR_INDEX_TYPE = os.getenv("VECTOR_INDEX_TYPE", "hnsw")
+HNSW_M = int(os.getenv("HNSW_M", "16"))
+HNSW_EF_CONSTRUCTION = int(os.getenv("HNSW_EF_CONSTRUCTION", "64"))
+IVFFLAT_LISTS = int(os.getenv("IVFFLAT_LISTS", "0"))  # 0: 행 수 기준 자동
+HNSW_EF_SEARCH = int(os.getenv("HNSW_EF_SEARCH", "40"))
+IVFFLAT_PROBES = int(os.getenv("IVFFLAT_PROBES", "10"))
+
+INDEX_TYPES = ("hnsw", "ivfflat")
+
+
+def index_name(table: str, column: str, kind: str) -> str:
+    return f"ix_{table}_{column}_{kind}"
+
+
+def auto_lists(n_rows: int) -> int:
+    """pgvector 권장값: 100만 행 이하 rows / 1000 (최소 10)"""
+    return max(10, n_rows // 1000)
+
+
+def create_index_sql(table: str, column: str = "embedding", kind: str = VECTOR_INDEX_TYPE,
+                     opclass: str = "vector_cosine_ops", m: int = HNSW_M,
+                     ef_construction: int = HNSW_EF_CONSTRUCTION, lists: Optional[int] = None) -> str:
+    if kind == "hnsw":
+        params = f"m = {int(m)}, ef_construction = {int(ef_construction)}"
+    elif kind == "ivfflat":
+        params = f"lists = {int(lists or auto_lists(0))}"
+    else:
+        raise ValueError(f"Unknown vector index type: {kind} ({' / '.join(INDEX_TYPES)})")
+    return (
+        f"CREATE INDEX IF NOT EXISTS {index_name(table, column, kind)} "
+        f"ON {table} USING {kind} ({column} {opclass}) WITH ({params})"
+    )
+
+
+def create_index(conn, table: str, column: str = "embedding", kind: str = VECTOR_INDEX_TYPE, **params) -> str:
+    """인덱스 생성 후 이름 반환. IVFFlat 은 lists 미지정(IVFFLAT_LISTS=0) 시 현재 행 수로 계산"""
+    if kind == "ivfflat" and not params.get("lists"):
+        params["lists"] = IVFFLAT_LISTS or auto_lists(
+            conn.execute(text(f"SELECT count(*) FROM {table} WHERE {column} IS NOT NULL")).scalar()
+        )
+    conn.execute(text(create_index_sql(table, column, kind, **params)))
+    return index_name(table, column, kind)
+
+
+def drop_indexes(conn, table: str, column: str = "embedding") -> None:
+    for kind in INDEX_TYPES:
+        conn.execute(text(f"DROP INDEX IF EXISTS {index_name(table, column, kind)}"))
+
+
+def set_search_params(db, ef_search: int = HNSW_EF_SEARCH, probes: int = IVFFLAT_PROBES) -> None:
+    """현재 트랜잭션에만 적용 (왕복 1회). 사용하지 않는 인덱스 종류의 값은 무시됨"""
+    db.execute(
+        text("SELECT set_config('hnsw.ef_search', :ef_search, true), "
+             "set_config('ivfflat.probes', :probes, true)"),
+        {"ef_search": str(int(ef_search)), "probes": str(int(probes))},
+    )
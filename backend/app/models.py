@@ -1,14 +1,24 @@
 from sqlalchemy import (
-    Column, Integer, String, TIMESTAMP, ForeignKey, DateTime, Boolean, Text, Numeric, Date, Enum as SAEnum
+    Column, Integer, String, TIMESTAMP, ForeignKey, DateTime, Boolean, Text, Numeric, Date, Enum as SAEnum,
+    Computed, Index
 )
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from sqlalchemy.dialects.postgresql import JSONB
-from pgvector.sqlalchemy import Vector
+from pgvector.sqlalchemy import Vector, HALFVEC
 import enum
 from app.db.base import Base
 
 
+# --- Compact Embedding ---
+# text-embedding-3 계열(Matryoshka 학습)은 앞쪽 차원만 잘라 재정규화해도 의미가 유지됨
+# → 1536차원 float32(6KB) 대신 256차원 halfvec(512B)을 생성 컬럼으로 함께 저장
+COMPACT_EMBEDDING_DIM = 256
+COMPACT_EMBEDDING_EXPR = (
+    f"l2_normalize(subvector(embedding, 1, {COMPACT_EMBEDDING_DIM}))::halfvec({COMPACT_EMBEDDING_DIM})"
+)
+
+
 # --- Enums (DB Enum Types) ---
 
 class UserProvider(enum.Enum):
@@ -108,6 +118,7 @@ class Product(Base):
     image_url = Column(Text)
     product_info = Column(JSONB)
     embedding = Column(Vector(1536))
+    embedding_compact = Column(HALFVEC(COMPACT_EMBEDDING_DIM), Computed(COMPACT_EMBEDDING_EXPR, persisted=True))
     created_at = Column(DateTime(timezone=True), default=func.now())
 
     # Relationships
@@ -119,6 +130,12 @@ class Product(Base):
 
 class Recipe(Base):
     __tablename__ = "recipe"
+    __table_args__ = (
+        Index(
+            "ix_recipe_embedding_compact_hnsw", "embedding_compact",
+            postgresql_using="hnsw", postgresql_ops={"embedding_compact": "halfvec_cosine_ops"},
+        ),
+    )
 
     recipe_id = Column(Integer, primary_key=True, index=True)
     title = Column(String(255), nullable=False)
@@ -127,6 +144,7 @@ class Recipe(Base):
     image_url = Column(Text)
 
     embedding = Column(Vector(1536))
+    embedding_compact = Column(HALFVEC(COMPACT_EMBEDDING_DIM), Computed(COMPACT_EMBEDDING_EXPR, persisted=True))
     created_at = Column(DateTime(timezone=True), default=func.now())
 
     # Relationships
@@ -2,6 +2,7 @@ from fastapi import APIRouter, HTTPException, Depends
 from pydantic import BaseModel, ConfigDict
 import requests
 import os
+from typing import Optional
 
 # 필요하다면 관리자 인증 의존성(Depends) 추가 가능
 router = APIRouter(
@@ -24,7 +25,8 @@ class TrainRequest(BaseModel):
 @router.post("/train")
 def trigger_training(req: TrainRequest):
     """
-    [Admin] 모델 재학습 요청을 AI 서버(CPU)로 중계합니다.
+    [Admin] 모델 재학습 요청을 AI 서버(CPU) 작업 큐에 등록합니다.
+    - 반환된 job_id로 GET /admin/jobs/{job_id} 에서 진행 상황 확인
     """
     url = f"{AI_SERVER_URL}/train"
     payload = req.model_dump() # Pydantic v2 권장
@@ -36,11 +38,51 @@ def trigger_training(req: TrainRequest):
         resp = requests.post(url, json=payload, timeout=5)
         
         if resp.status_code == 200:
-            return resp.json()
+            data = resp.json()
+            return {
+                "job_id": data.get("job_id"),
+                "status": data.get("status"),
+                "queue_position": data.get("queue_position"),
+                "message": data.get("message"),
+            }
         else:
             raise HTTPException(status_code=resp.status_code, detail=f"AI Server Error: {resp.text}")
             
+    except HTTPException:
+        raise
     except requests.exceptions.ConnectionError:
         raise HTTPException(status_code=503, detail="AI Inference Server is unreachable.")
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+
+def forward_job_request(method, path, params=None):
+    """AI 서버 /jobs API 중계"""
+    try:
+        resp = requests.request(method, f"{AI_SERVER_URL}{path}", params=params, timeout=5)
+    except requests.exceptions.ConnectionError:
+        raise HTTPException(status_code=503, detail="AI Inference Server is unreachable.")
+    if resp.status_code != 200:
+        raise HTTPException(status_code=resp.status_code, detail=f"AI Server Error: {resp.text}")
+    return resp.json()
+
+@router.get("/jobs")
+def list_training_jobs(status: Optional[str] = None, limit: int = 50):
+    """[Admin] 학습 작업 목록"""
+    params = {"limit": limit}
+    if status:
+        params["status"] = status
+    return forward_job_request("GET", "/jobs", params=params)
+
+@router.get("/jobs/{job_id}")
+def get_training_job(job_id: str):
+    """[Admin] 학습 작업 상태 / epoch 진행률"""
+    return forward_job_request("GET", f"/jobs/{job_id}")
+
+@router.post("/jobs/{job_id}/cancel")
+def cancel_training_job(job_id: str):
+    return forward_job_request("POST", f"/jobs/{job_id}/cancel")
+
+@router.post("/jobs/{job_id}/resume")
+def resume_training_job(job_id: str):
+    """[Admin] 중단된 작업을 마지막 체크포인트부터 재개"""
+    return forward_job_request("POST", f"/jobs/{job_id}/resume")
@@ -5,6 +5,8 @@ from ..dependencies import get_current_user
 from sqlalchemy.sql import func 
 import requests
 from app.core.config import settings
+from app.core.redis_client import get_redis
+from app.services.recommendation_cache import RecommendationCache
 from datetime import datetime
 import uuid
 
@@ -277,7 +279,8 @@ def get_cart_session(
 def add_cart_item(
     session_id: int,
     item_req: schemas.CartItemCreate,
-    db: Session = Depends(database.get_db)
+    db: Session = Depends(database.get_db),
+    redis=Depends(get_redis)
 ):
     # 세션 확인 (유저 체크 제거)
     session = db.query(models.CartSession).filter(
@@ -310,6 +313,7 @@ def add_cart_item(
     db.flush()                      
     recalc_expected_weight(session) 
     db.commit()
+    RecommendationCache(redis).invalidate_session(session_id)
     
     return {"message": "장바구니에 상품을 담았습니다."}
 
@@ -318,7 +322,8 @@ def add_cart_item(
 @router.post("/sync-by-device")
 def sync_cart_by_device(
     req: schemas.CartSyncRequest,
-    db: Session = Depends(database.get_db)
+    db: Session = Depends(database.get_db),
+    redis=Depends(get_redis)
 ):
     import time
     start_all = time.time()
@@ -385,6 +390,9 @@ def sync_cart_by_device(
     db.commit()
     t6 = time.time()
     logger.info(f"[SYNC_STEP 5] DB Commit took: {t6-t5:.4f}s")
+
+    # 카트 구성이 바뀌었으므로 추천 캐시 포인터 무효화
+    RecommendationCache(redis).invalidate_session(session.cart_session_id)
     
     total_duration = t6 - start_all
     logger.info(f"[SYNC_FINISHED] Total processing time: {total_duration:.4f}s, Synced: {synced_count} items")
@@ -433,7 +441,8 @@ def recalc_expected_weight(session: models.CartSession):
 @router.delete("/items/{cart_item_id}")
 def delete_cart_item(
     cart_item_id: int,
-    db: Session = Depends(database.get_db)
+    db: Session = Depends(database.get_db),
+    redis=Depends(get_redis)
 ):
     cart_item = (
         db.query(models.CartItem)
@@ -455,6 +464,7 @@ def delete_cart_item(
     recalc_expected_weight(session)
 
     db.commit()
+    RecommendationCache(redis).invalidate_session(session.cart_session_id)
 
     return {
         "message": "상품이 카트에서 제거되었습니다.",
@@ -467,7 +477,8 @@ def delete_cart_item(
 def update_cart_item_quantity(
     cart_item_id: int,
     req: schemas.CartItemUpdate,
-    db: Session = Depends(database.get_db)
+    db: Session = Depends(database.get_db),
+    redis=Depends(get_redis)
 ):
     # 1. 카트 상품 확인 (유저 체크 제거)
     cart_item = (
@@ -495,6 +506,7 @@ def update_cart_item_quantity(
 
     db.commit()
     db.refresh(cart_item)
+    RecommendationCache(redis).invalidate_session(session.cart_session_id)
 
     return {
         "message": "상품 수량이 변경되었습니다.",
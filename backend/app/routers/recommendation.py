@@ -4,6 +4,8 @@ from sqlalchemy.orm import Session
 from typing import List
 
 from app import schemas, database
+from app.core.redis_client import get_redis
+from app.services.recommendation_cache import RecommendationCache
 from app.services.recommendation_service import RecommendationService
 
 router = APIRouter(
@@ -15,16 +17,26 @@ router = APIRouter(
 @router.get("/by-cart/{cart_session_id}", response_model=List[schemas.RecipeRecommendResponse])
 def recommend_recipes_by_cart(
     cart_session_id: int,
-    db: Session = Depends(database.get_db)
+    db: Session = Depends(database.get_db),
+    redis=Depends(get_redis)
 ):
     """
     [장바구니 기반 AI 추천]
     - Service Layer(RecommendationService)로 로직을 위임하여 처리합니다.
     - Fat Controller 문제를 해결하고 비즈니스 로직을 분리했습니다.
+    - 카트 구성이 같으면 Redis 캐시 결과를 반환합니다. (카트 변경 시 cart 라우터에서 무효화)
     """
-    service = RecommendationService(db)
+    service = RecommendationService(db, cache=RecommendationCache(redis))
     return service.recommend_by_cart(cart_session_id)
 
+@router.get("/cache/stats")
+def recommendation_cache_stats(redis=Depends(get_redis)):
+    """
+    [장바구니 추천 캐시 지표]
+    - 적중(세션 포인터 / 카트 구성) / 미스 / 무효화 횟수와 적중률
+    """
+    return RecommendationCache(redis).stats()
+
 @router.get("/by-product/{product_id}", response_model=List[schemas.RecipeRecommendResponse])
 def recommend_recipes_ai(
     product_id: int, 
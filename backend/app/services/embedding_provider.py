@@ -0,0 +1,171 @@
+# app/services/embedding_provider.py
+"""
+[임베딩 Provider]
+- remote: GMS 프록시(OpenAI 호환 /embeddings API). 운영 임베딩 생성용
+- local : 네트워크 없이 동작하는 결정적(deterministic) hashing 임베딩
+          단어 + 문자 3-gram 특징을 해시하여 1536차원에 투영 → 같은 텍스트는 항상 같은 벡터,
+          단어 / 글자를 공유하는 텍스트끼리 코사인 유사도가 높음 (오프라인 인덱스 구축 / 부하 테스트용)
+
+EMBEDDING_PROVIDER 환경변수(remote / local)로 선택하며,
+ai/embedding/generate_embeddings.py 와 백엔드 양쪽에서 get_embedding_provider()로 사용합니다.
+
+※ remote / local 벡터는 서로 다른 공간이므로 DB에 섞어 저장하면 안 됩니다 (provider 변경 시 전체 재생성).
+"""
+import hashlib
+import math
+import os
+import unicodedata
+from typing import List, Optional
+
+import numpy as np
+
+EMBEDDING_PROVIDER = os.getenv("EMBEDDING_PROVIDER", "remote")
+EMBEDDING_DIM = int(os.getenv("EMBEDDING_DIM", "1536"))
+EMBEDDING_MODEL = os.getenv("EMBEDDING_MODEL", "text-embedding-3-small")
+GMS_BASE_URL = os.getenv("GMS_BASE_URL", "https://gms.ssafy.io/gmsapi/api.openai.com/v1")
+GMS_KEY = os.getenv("GMS_KEY")
+EMBEDDING_TIMEOUT = float(os.getenv("EMBEDDING_TIMEOUT", "60"))
+
+
+class EmbeddingProviderError(Exception):
+    """
+    임베딩 요청 실패
+    - retryable: rate limit(429) / 타임아웃 / 연결 오류 / 5xx
+    - retry_after: 서버가 알려준 재시도 대기 시간(초)
+    """
+
+    def __init__(self, message, status: Optional[int] = None, retryable: bool = False,
+                 retry_after: Optional[float] = None):
+        super().__init__(message)
+        self.status = status
+        self.retryable = retryable
+        self.retry_after = retry_after
+
+
+class EmbeddingProvider:
+    name = "base"
+
+    def __init__(self, model: str, dim: int):
+        self.model = model
+        self.dim = dim
+
+    @property
+    def identity(self) -> str:
+        """벡터 공간 식별자 (캐시 키). 같은 모델명이라도 provider / 엔드포인트가 다르면 다른 값"""
+        return f"{self.name}:{self.model}"
+
+    def embed(self, texts: List[str]) -> List[List[float]]:
+        """텍스트 목록 → 같은 순서의 벡터 목록 (배치 분할 / 재시도는 호출하는 쪽에서 처리)"""
+        raise NotImplementedError
+
+    def embed_one(self, text: str) -> List[float]:
+        return self.embed([text])[0]
+
+
+class RemoteEmbeddingProvider(EmbeddingProvider):
+    name = "remote"
+
+    def __init__(self, base_url: str = GMS_BASE_URL, api_key: Optional[str] = GMS_KEY,
+                 model: str = EMBEDDING_MODEL, dim: int = EMBEDDING_DIM, timeout: float = EMBEDDING_TIMEOUT):
+        super().__init__(model, dim)
+        if not api_key:
+            raise ValueError("GMS_KEY is required for the remote embedding provider")
+        import httpx
+
+        self.base_url = base_url.rstrip("/")
+        self._client = httpx.Client(
+            base_url=self.base_url,
+            headers={"Authorization": f"Bearer {api_key}"},
+            timeout=timeout,
+        )
+
+    @property
+    def identity(self) -> str:
+        # 로컬 stub 서버(ai/embedding/stub_server.py)의 무작위 벡터가 실제 모델 캐시와 섞이지 않도록 엔드포인트 포함
+        return f"{self.name}:{self.base_url}:{self.model}"
+
+    def embed(self, texts: List[str]) -> List[List[float]]:
+        import httpx
+
+        try:
+            response = self._client.post("/embeddings", json={"input": texts, "model": self.model})
+        except (httpx.TimeoutException, httpx.TransportError) as e:
+            raise EmbeddingProviderError(f"{type(e).__name__}: {e}", retryable=True) from e
+
+        if response.status_code != 200:
+            retry_after = response.headers.get("retry-after")
+            try:
+                retry_after = float(retry_after) if retry_after else None
+            except ValueError:
+                retry_after = None
+            raise EmbeddingProviderError(
+                f"HTTP {response.status_code}: {response.text[:300]}",
+                status=response.status_code,
+                retryable=response.status_code == 429 or response.status_code >= 500,
+                retry_after=retry_after,
+            )
+
+        # 응답 순서가 입력 순서와 다를 수 있으므로 index 기준 정렬
+        data = sorted(response.json()["data"], key=lambda d: d["index"])
+        return [d["embedding"] for d in data]
+
+
+class LocalHashingProvider(EmbeddingProvider):
+    """
+    결정적 hashing 임베딩 (feature hashing)
+    - 특징: 단어 unigram + 공백 제거 문자 3-gram (한글 상품명은 띄어쓰기가 일정하지 않음)
+    - 가중치: 1 + log(tf), 해시 부호(±1)로 충돌 상쇄, L2 정규화
+    """
+    name = "local"
+    NGRAM = 3
+
+    def __init__(self, dim: int = EMBEDDING_DIM):
+        super().__init__(f"local-hash-{dim}", dim)
+
+    def _features(self, text: str):
+        text = unicodedata.normalize("NFC", text or "").lower()
+        words = text.split()
+        compact = "".join(words)
+        features = {}
+        for feature in [f"w:{w}" for w in words] + [
+            f"c:{compact[i:i + self.NGRAM]}" for i in range(max(0, len(compact) - self.NGRAM + 1))
+        ]:
+            features[feature] = features.get(feature, 0) + 1
+        return features
+
+    def _vector(self, text: str) -> List[float]:
+        vec = np.zeros(self.dim, dtype=np.float32)
+        for feature, tf in self._features(text).items():
+            digest = hashlib.blake2b(feature.encode("utf-8"), digest_size=8).digest()
+            value = int.from_bytes(digest, "little")
+            sign = 1.0 if value & 1 else -1.0
+            vec[(value >> 1) % self.dim] += sign * (1.0 + math.log(tf))
+        norm = float(np.linalg.norm(vec))
+        if norm > 0:
+            vec /= norm
+        return vec.tolist()
+
+    def embed(self, texts: List[str]) -> List[List[float]]:
+        return [self._vector(t) for t in texts]
+
+
+_provider: Optional[EmbeddingProvider] = None
+
+
+def get_embedding_provider(name: Optional[str] = None) -> EmbeddingProvider:
+    """EMBEDDING_PROVIDER(remote / local)에 맞는 provider (이름을 지정하지 않으면 프로세스당 1개 재사용)"""
+    global _provider
+    if name is None and _provider is not None:
+        return _provider
+
+    selected = (name or EMBEDDING_PROVIDER).lower()
+    if selected == "remote":
+        provider = RemoteEmbeddingProvider()
+    elif selected == "local":
+        provider = LocalHashingProvider()
+    else:
+        raise ValueError(f"Unknown EMBEDDING_PROVIDER: {selected} (remote / local)")
+
+    if name is None:
+        _provider = provider
+    return provider
@@ -0,0 +1,151 @@
+# app/services/recommendation_cache.py
+"""
+[장바구니 추천 캐시 (Redis)]
+키오스크는 카트 내용이 그대로여도 /recommendations/by-cart/{id} 를 반복 호출하므로
+추천 결과를 '카트 상품 구성' 기준으로 캐시합니다.
+
+- rec:cart:{version}:{signature}  → 추천 결과 JSON (TTL)
+  signature = 카트 아이템 product_id 목록(중복 포함)을 정렬한 해시 → 구성이 같은 카트끼리 공유
+- rec:cart:session:{session_id}   → 해당 세션의 현재 signature (TTL)
+  조회 시 DB를 거치지 않고 바로 결과를 찾기 위한 포인터. 카트가 바뀌면 삭제(invalidate_session)
+- rec:cart:gen:{session_id}       → 세션의 카트 변경 횟수. 변경 전에 읽은 카트로 계산한 요청이
+  무효화 이후에 포인터를 다시 써서 옛 결과가 TTL 동안 남는 것을 막음 (WATCH 로 확인 후 기록)
+- rec:cart:stats                  → hits_session / hits_signature / misses / invalidations 카운터
+
+Redis 장애 시에는 캐시 없이 동작합니다 (추천 API가 실패하지 않음).
+"""
+import hashlib
+import json
+import logging
+import os
+from typing import Iterable, List, Optional, Tuple
+
+import redis
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+RECOMMENDATION_CACHE_TTL = int(os.getenv("RECOMMENDATION_CACHE_TTL", "300"))  # 0: 캐시 사용 안 함
+
+STATS_KEY = "rec:cart:stats"
+GENERATION_TTL = 24 * 60 * 60
+
+
+def cart_signature(product_ids: Iterable[int]) -> str:
+    """카트 아이템 product_id 목록(순서 무관, 중복 포함) → 고정 길이 키"""
+    canonical = ",".join(str(pid) for pid in sorted(product_ids))
+    return hashlib.sha1(canonical.encode("utf-8")).hexdigest()
+
+
+def _session_key(cart_session_id: int) -> str:
+    return f"rec:cart:session:{cart_session_id}"
+
+
+def _generation_key(cart_session_id: int) -> str:
+    return f"rec:cart:gen:{cart_session_id}"
+
+
+def _result_key(signature: str) -> str:
+    # 검색 설정이 바뀌면 다른 키를 사용 (이전 설정의 결과를 재사용하지 않음)
+    version = f"{settings.RECOMMENDATION_ENGINE}-{settings.RECOMMENDATION_VECTOR_MODE}"
+    return f"rec:cart:{version}:{signature}"
+
+
+class RecommendationCache:
+    def __init__(self, client: redis.Redis, ttl: int = RECOMMENDATION_CACHE_TTL):
+        self.client = client
+        self.ttl = ttl
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl > 0
+
+    def lookup_session(self, cart_session_id: int) -> Tuple[Optional[List[dict]], Optional[str]]:
+        """
+        세션 포인터로 조회 (DB 조회 없이 응답)
+        Returns: (결과 또는 None, 세션 generation) - generation 은 get / set 에 그대로 넘김
+        """
+        if not self.enabled:
+            return None, None
+        try:
+            signature, generation = self.client.mget(
+                _session_key(cart_session_id), _generation_key(cart_session_id)
+            )
+            cached = self.client.get(_result_key(signature)) if signature else None
+            if cached is None:
+                return None, generation
+            self.client.hincrby(STATS_KEY, "hits_session", 1)
+            return json.loads(cached), generation
+        except redis.RedisError as e:
+            logger.warning(f"⚠️ 추천 캐시 조회 실패 (캐시 없이 진행): {e}")
+            return None, None
+
+    def get(self, cart_session_id: int, signature: str, generation: Optional[str]) -> Optional[List[dict]]:
+        """같은 구성의 카트가 만든 결과 조회. 적중 시 세션 포인터도 갱신"""
+        if not self.enabled:
+            return None
+        try:
+            cached = self.client.get(_result_key(signature))
+            self.client.hincrby(STATS_KEY, "misses" if cached is None else "hits_signature", 1)
+            if cached is None:
+                return None
+            self._set_pointer(cart_session_id, signature, generation)
+            return json.loads(cached)
+        except redis.RedisError as e:
+            logger.warning(f"⚠️ 추천 캐시 조회 실패 (캐시 없이 진행): {e}")
+            return None
+
+    def set(self, cart_session_id: int, signature: str, result: List[dict], generation: Optional[str]):
+        if not self.enabled:
+            return
+        try:
+            # 결과는 상품 구성 기준이라 언제 기록해도 올바름 → 포인터만 generation 확인
+            self.client.setex(_result_key(signature), self.ttl, json.dumps(result, ensure_ascii=False))
+            self._set_pointer(cart_session_id, signature, generation)
+        except redis.RedisError as e:
+            logger.warning(f"⚠️ 추천 캐시 저장 실패: {e}")
+
+    def _set_pointer(self, cart_session_id: int, signature: str, generation: Optional[str]):
+        """카트를 읽은 뒤 무효화가 있었다면(generation 변경) 포인터를 쓰지 않음"""
+        generation_key = _generation_key(cart_session_id)
+        with self.client.pipeline() as pipe:
+            try:
+                pipe.watch(generation_key)
+                if pipe.get(generation_key) != generation:
+                    return
+                pipe.multi()
+                pipe.setex(_session_key(cart_session_id), self.ttl, signature)
+                pipe.execute()
+            except redis.WatchError:
+                pass
+
+    def invalidate_session(self, cart_session_id: int):
+        """
+        카트 변경(담기 / 삭제 / 수량 변경 / 동기화) 커밋 후 호출
+        결과 자체는 상품 구성 기준이라 그대로 두고, 세션 포인터만 지움 → 다음 조회 시 새 구성으로 다시 찾음
+        """
+        try:
+            pipe = self.client.pipeline()
+            pipe.incr(_generation_key(cart_session_id))
+            pipe.expire(_generation_key(cart_session_id), GENERATION_TTL)
+            pipe.delete(_session_key(cart_session_id))
+            pipe.hincrby(STATS_KEY, "invalidations", 1)
+            pipe.execute()
+        except redis.RedisError as e:
+            logger.warning(f"⚠️ 추천 캐시 무효화 실패 (Session {cart_session_id}): {e}")
+
+    def stats(self) -> dict:
+        try:
+            counters = {k: int(v) for k, v in self.client.hgetall(STATS_KEY).items()}
+        except redis.RedisError as e:
+            logger.warning(f"⚠️ 추천 캐시 지표 조회 실패: {e}")
+            return {"ttl": self.ttl, "available": False, "error": str(e)}
+        hits = counters.get("hits_session", 0) + counters.get("hits_signature", 0)
+        lookups = hits + counters.get("misses", 0)
+        return {
+            "ttl": self.ttl,
+            "available": True,
+            **counters,
+            "hit_rate": round(hits / lookups, 4) if lookups else None,
+        }
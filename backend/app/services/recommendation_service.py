@@ -1,17 +1,37 @@
 # app/services/recommendation_service.py
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, defer
 from sqlalchemy import desc
-from typing import List
+from typing import List, Optional
 import numpy as np
 import logging
 
 from app import models, schemas
+from app.core.config import settings
+from app.db.vector_index import HNSW_EF_SEARCH, IVFFLAT_PROBES, set_search_params
+from app.services.recommendation_cache import RecommendationCache, cart_signature
+from app.services.vector_search import get_vector_engine
 
 logger = logging.getLogger(__name__)
 
+RECOMMEND_LIMIT = 5
+
+
+def _to_array(value) -> np.ndarray:
+    # Vector → numpy 배열, HALFVEC → HalfVector 객체로 조회됨
+    if hasattr(value, "to_numpy"):
+        value = value.to_numpy()
+    return np.asarray(value, dtype=np.float32)
+
+
 class RecommendationService:
-    def __init__(self, db: Session):
+    def __init__(self, db: Session, ef_search: int = HNSW_EF_SEARCH, probes: int = IVFFLAT_PROBES,
+                 cache: Optional[RecommendationCache] = None):
         self.db = db
+        # 장바구니 추천 결과 캐시 (없으면 매번 계산)
+        self.cache = cache
+        # ANN 인덱스 검색 파라미터 (recall ↔ 지연 시간). 호출마다 현재 트랜잭션에 적용
+        self.ef_search = ef_search
+        self.probes = probes
 
     def recommend_by_cart(self, cart_session_id: int) -> List[dict]:
         """
@@ -20,7 +40,14 @@ class RecommendationService:
         2. 임베딩 벡터 수집 및 평균 계산 (Centroid)
         3. 코사인 유사도 기반 레시피 검색 (Fallback: 재료 포함 여부)
         4. 응답 데이터 조립 (부족한 재료 마킹)
+        (cache 가 있으면 세션 포인터 → 카트 구성 signature 순으로 캐시를 먼저 확인)
         """
+        generation = None
+        if self.cache:
+            cached, generation = self.cache.lookup_session(cart_session_id)
+            if cached is not None:
+                return cached
+
         # 1. 카트 아이템 조회
         cart_items = self.db.query(models.CartItem).filter(
             models.CartItem.cart_session_id == cart_session_id
@@ -30,34 +57,18 @@ class RecommendationService:
             logger.info(f"🛒 장바구니(Session {cart_session_id})가 비어있습니다.")
             return []
 
-        # 2. 벡터 수집
-        vectors = []
+        signature = cart_signature(item.product_id for item in cart_items)
+        if self.cache:
+            cached = self.cache.get(cart_session_id, signature, generation)
+            if cached is not None:
+                return cached
+
+        # 2. 벡터 검색 (임베딩 컬럼만 한 번에 조회 → 아이템마다 Product 전체를 lazy load 하지 않음)
         my_owned_product_ids = {item.product_id for item in cart_items}
-        
-        for item in cart_items:
-            if item.product.embedding is not None:
-                vectors.append(item.product.embedding)
+        recommendations_query = self._search_recipes(my_owned_product_ids)
 
-        recommendations_query = []
-        
         # 3. AI 추천 vs Fallback 분기 처리
-        if vectors:
-            logger.info(f"🚀 [AI 모드] 유효 벡터 {len(vectors)}개로 추천 실행")
-            # 벡터 평균(Centroid) 계산
-            avg_vector_np = np.mean(vectors, axis=0)
-            avg_vector = [float(x) for x in avg_vector_np.tolist()]
-            
-            # 코사인 거리 순 정렬 (Distance가 작을수록 유사함)
-            recommendations_query = (
-                self.db.query(
-                    models.Recipe,
-                    models.Recipe.embedding.cosine_distance(avg_vector).label("distance")
-                )
-                .order_by("distance")
-                .limit(5)
-                .all()
-            )
-        else:
+        if recommendations_query is None:
             logger.warning("⚠️ [Fallback 모드] 벡터 없음. 가격 기준 대체 추천 실행")
             # 가장 비싼 상품 기준
             sorted_items = sorted(cart_items, key=lambda x: x.unit_price, reverse=True)
@@ -68,18 +79,21 @@ class RecommendationService:
                 (r, 0.2) for r in self.db.query(models.Recipe)
                 .join(models.RecipeIngredient)
                 .filter(models.RecipeIngredient.product_id == target_product_id)
-                .limit(5)
+                .limit(RECOMMEND_LIMIT)
                 .all()
             ]
 
         # 4. 응답 데이터 조립
-        return self._format_response(recommendations_query, my_owned_product_ids)
+        result = self._format_response(recommendations_query, my_owned_product_ids)
+        if self.cache:
+            self.cache.set(cart_session_id, signature, result, generation)
+        return result
 
     def recommend_by_product(self, product_id: int, cart_session_id: int = None) -> List[dict]:
         """
         [단일 상품 기반 AI 추천 로직]
         """
-        target_product = self.db.query(models.Product).filter(
+        target_product = self.db.query(models.Product.product_id).filter(
             models.Product.product_id == product_id
         ).first()
         
@@ -87,23 +101,14 @@ class RecommendationService:
             return []
 
         # AI 추천 쿼리
-        if target_product.embedding is not None:
-            recommendations = (
-                self.db.query(
-                    models.Recipe,
-                    models.Recipe.embedding.cosine_distance(target_product.embedding).label("distance")
-                )
-                .order_by("distance")
-                .limit(5)
-                .all()
-            )
-        else:
+        recommendations = self._search_recipes([product_id])
+        if recommendations is None:
             # Fallback
             recommendations_with_dummy_distance = [
                 (r, 0.0) for r in self.db.query(models.Recipe)
                 .join(models.RecipeIngredient)
                 .filter(models.RecipeIngredient.product_id == product_id)
-                .limit(5)
+                .limit(RECOMMEND_LIMIT)
                 .all()
             ]
             recommendations = recommendations_with_dummy_distance
@@ -129,37 +134,149 @@ class RecommendationService:
         
         return self._format_response(query_result, my_owned_product_ids)
 
+    def _search_recipes(self, product_ids) -> Optional[list]:
+        """
+        [Helper] 상품 벡터 평균(Centroid)과 코사인 거리가 가까운 레시피 [(recipe, distance), ...]
+        - full   : Vector(1536) 컬럼으로 검색
+        - compact: halfvec(256) 컬럼으로 후보 검색 → RECOMMENDATION_RERANK_CANDIDATES > 0 이면 full 벡터로 재정렬
+        - RECOMMENDATION_ENGINE=numpy 이면 DB 대신 In-Memory 엔진으로 검색 (full 벡터)
+        유효 벡터가 하나도 없으면 None (Fallback 처리는 호출하는 쪽에서)
+        """
+        if settings.RECOMMENDATION_ENGINE == "numpy":
+            return self._search_numpy(product_ids)
+        if settings.RECOMMENDATION_VECTOR_MODE == "compact":
+            return self._search_compact(product_ids)
+
+        centroid = self._centroid(models.Product.embedding, product_ids)
+        if centroid is None:
+            return None
+        self._apply_search_params(RECOMMEND_LIMIT)
+        # 코사인 거리 순 정렬 (Distance가 작을수록 유사함)
+        return (
+            self.db.query(
+                models.Recipe,
+                models.Recipe.embedding.cosine_distance(centroid).label("distance")
+            )
+            .order_by("distance")
+            .limit(RECOMMEND_LIMIT)
+            .all()
+        )
+
+    def _search_compact(self, product_ids) -> Optional[list]:
+        centroid = self._centroid(models.Product.embedding_compact, product_ids)
+        if centroid is None:
+            return None
+
+        compact_distance = models.Recipe.embedding_compact.cosine_distance(centroid)
+        n_candidates = settings.RECOMMENDATION_RERANK_CANDIDATES
+        self._apply_search_params(max(n_candidates, RECOMMEND_LIMIT))
+        if n_candidates <= RECOMMEND_LIMIT:
+            return (
+                self.db.query(models.Recipe, compact_distance.label("distance"))
+                .filter(models.Recipe.embedding_compact.isnot(None))
+                .order_by("distance")
+                .limit(RECOMMEND_LIMIT)
+                .all()
+            )
+
+        # 1단계: compact 인덱스(HNSW)로 후보 N개
+        candidate_ids = [
+            recipe_id for (recipe_id,) in self.db.query(models.Recipe.recipe_id)
+            .filter(models.Recipe.embedding_compact.isnot(None))
+            .order_by(compact_distance)
+            .limit(n_candidates)
+            .all()
+        ]
+        # 2단계: 후보에 대해서만 full 벡터 거리 계산
+        full_centroid = self._centroid(models.Product.embedding, product_ids)
+        return (
+            self.db.query(
+                models.Recipe,
+                models.Recipe.embedding.cosine_distance(full_centroid).label("distance")
+            )
+            .filter(models.Recipe.recipe_id.in_(candidate_ids))
+            .order_by("distance")
+            .limit(RECOMMEND_LIMIT)
+            .all()
+        )
+
+    def _search_numpy(self, product_ids) -> Optional[list]:
+        centroid = self._centroid(models.Product.embedding, product_ids)
+        if centroid is None:
+            return None
+
+        hits = get_vector_engine().search(self.db, centroid, RECOMMEND_LIMIT)
+        if not hits:
+            return []
+        # 응답에 필요 없는 벡터 컬럼은 읽지 않음
+        recipes = {
+            recipe.recipe_id: recipe for recipe in self.db.query(models.Recipe)
+            .options(defer(models.Recipe.embedding), defer(models.Recipe.embedding_compact))
+            .filter(models.Recipe.recipe_id.in_([recipe_id for recipe_id, _ in hits]))
+            .all()
+        }
+        return [(recipes[recipe_id], distance) for recipe_id, distance in hits if recipe_id in recipes]
+
+    def _apply_search_params(self, limit: int):
+        # HNSW 는 ef_search 개까지만 후보를 반환하므로 LIMIT 이상으로 맞춤
+        set_search_params(self.db, ef_search=max(self.ef_search, limit), probes=self.probes)
+
+    def _centroid(self, column, product_ids) -> Optional[List[float]]:
+        """[Helper] 상품들의 임베딩 평균. column: Product.embedding / Product.embedding_compact"""
+        rows = self.db.query(column).filter(
+            models.Product.product_id.in_(list(product_ids)),
+            column.isnot(None)
+        ).all()
+        if not rows:
+            return None
+
+        logger.info(f"🚀 [AI 모드] 유효 벡터 {len(rows)}개로 추천 실행 ({column.key})")
+        avg_vector_np = np.mean([_to_array(value) for (value,) in rows], axis=0)
+        return [float(x) for x in avg_vector_np.tolist()]
+
     def _format_response(self, query_result, my_owned_ids: set) -> List[dict]:
         """
         [Helper] DB 결과를 API 응답 스키마에 맞게 변환하고 '부족한 재료'를 계산함
+        - 결과 레시피 전체의 재료(상품 id / 이름)를 쿼리 1번으로 조회 (레시피 / 재료마다 조회하지 않음)
         """
+        recipe_ids = [recipe.recipe_id for recipe, _ in query_result]
+        ingredients_by_recipe = {recipe_id: [] for recipe_id in recipe_ids}
+        if recipe_ids:
+            rows = (
+                self.db.query(
+                    models.RecipeIngredient.recipe_id,
+                    models.Product.product_id,
+                    models.Product.name
+                )
+                .join(models.Product, models.Product.product_id == models.RecipeIngredient.product_id)
+                .filter(models.RecipeIngredient.recipe_id.in_(recipe_ids))
+                .all()
+            )
+            for recipe_id, product_id, name in rows:
+                ingredients_by_recipe[recipe_id].append((product_id, name))
+
         results = []
         for recipe, distance in query_result:
             # 유사도 점수 변환 (0~1)
             similarity = max(0, 1 - float(distance or 0.5))
             
-            recipe_ingredients = self.db.query(models.RecipeIngredient).filter(
-                models.RecipeIngredient.recipe_id == recipe.recipe_id
-            ).all()
-            
             all_ingredients = []
             missing_list = []
             
-            for ri in recipe_ingredients:
-                ing_product = ri.product 
-                is_owned = ing_product.product_id in my_owned_ids
+            for product_id, name in ingredients_by_recipe[recipe.recipe_id]:
+                is_owned = product_id in my_owned_ids
                 
                 ing_data = {
-                    "product_id": ing_product.product_id,
-                    "name": ing_product.name,
+                    "product_id": product_id,
+                    "name": name,
                     "is_owned": is_owned
                 }
                 all_ingredients.append(ing_data)
                 
                 if not is_owned:
                     missing_list.append({
-                        "product_id": ing_product.product_id,
-                        "name": ing_product.name,
+                        "product_id": product_id,
+                        "name": name,
                         "is_owned": False
                     })
 
@@ -173,4 +290,4 @@ class RecommendationService:
                 "missing_ingredients": missing_list
             })
             
-        return results
\ No newline at end of file
+        return results
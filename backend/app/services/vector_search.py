@@ -0,0 +1,292 @@
+# app/services/vector_search.py
+"""
+[In-Memory 레시피 벡터 검색 엔진]
+레시피 임베딩 전체를 정규화된 행렬(float32 / float16)로 프로세스 메모리에 올려두고
+top-k 를 행렬-벡터 곱 1번 + argpartition 으로 계산합니다. (DB 벡터 스캔 없음)
+
+- 갱신: VECTOR_ENGINE_REFRESH_SEC 마다 백그라운드 스레드에서 (검색 요청은 기다리지 않고 현재 행렬로 응답)
+        1. pg_stat_user_tables 의 recipe 변경 카운터가 그대로면 종료 (테이블 스캔 없음)
+        2. 바뀌었으면 md5(embedding::text) 목록을 비교하여 추가 / 변경된 레시피의 벡터만 가져오고 삭제된 레시피는 제거
+        invalidate() 는 카운터와 관계없이 다음 갱신에서 전체 비교
+- 스냅샷: VECTOR_ENGINE_SNAPSHOT_DIR 지정 시 행렬을 .npy 로 저장하고 재시작 시 mmap 으로 로드
+          → 워커 여러 개가 같은 페이지 캐시를 공유, 시작 시에는 바뀐 행만 DB에서 가져옴
+          여러 워커가 같은 디렉토리에 기록하므로 manifest 가 가리키는 버전보다 오래되고
+          SNAPSHOT_GC_GRACE_SEC 이 지난 파일만 삭제
+- float16: 메모리 절반. 곱셈은 _SCORE_CHUNK 행씩 float32로 변환하여 계산 (행렬 전체 복사본을 만들지 않음)
+
+RECOMMENDATION_ENGINE=numpy 일 때 RecommendationService 가 사용합니다.
+"""
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from app import models
+
+logger = logging.getLogger(__name__)
+
+VECTOR_ENGINE_DTYPE = os.getenv("VECTOR_ENGINE_DTYPE", "float32")
+VECTOR_ENGINE_SNAPSHOT_DIR = os.getenv("VECTOR_ENGINE_SNAPSHOT_DIR", "")
+VECTOR_ENGINE_REFRESH_SEC = float(os.getenv("VECTOR_ENGINE_REFRESH_SEC", "60"))
+
+MANIFEST_NAME = "manifest.json"
+# 다른 워커가 방금 기록하고 아직 manifest 를 교체하지 않은 파일을 지우지 않도록 하는 유예 시간
+SNAPSHOT_GC_GRACE_SEC = 600
+_FETCH_CHUNK = 1000
+# float16 행렬 점수 계산 시 한 번에 float32로 변환할 행 수 (1536차원 기준 약 25MB)
+_SCORE_CHUNK = 4096
+
+
+def _normalize(matrix: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    return matrix / np.maximum(norms, 1e-12)
+
+
+class VectorSearchEngine:
+    def __init__(self, dtype: str = VECTOR_ENGINE_DTYPE, snapshot_dir: str = VECTOR_ENGINE_SNAPSHOT_DIR,
+                 refresh_sec: float = VECTOR_ENGINE_REFRESH_SEC):
+        if dtype not in ("float32", "float16"):
+            raise ValueError(f"Unknown VECTOR_ENGINE_DTYPE: {dtype} (float32 / float16)")
+        self.dtype = np.dtype(dtype)
+        self.snapshot_dir = snapshot_dir
+        self.refresh_sec = refresh_sec
+        # (ids, matrix) 를 한 번에 교체 → 검색 중 갱신되어도 항상 짝이 맞는 상태를 읽음
+        self._state: Tuple[np.ndarray, Optional[np.ndarray]] = (np.zeros(0, dtype=np.int64), None)
+        self._digests: Dict[int, str] = {}
+        self._lock = threading.RLock()
+        self._loaded = False
+        self._checked_at = 0.0
+        # recipe 테이블 변경 카운터 (마지막 전체 비교 시점). None 이면 다음 갱신에서 전체 비교
+        self._change_marker: Optional[int] = None
+        self._refreshing = False
+
+    @property
+    def size(self) -> int:
+        return len(self._state[0])
+
+    # ------------------------------
+    # Search
+    # ------------------------------
+    def search(self, db: Session, vector, k: int) -> List[Tuple[int, float]]:
+        """Returns: [(recipe_id, cosine distance), ...] 거리 오름차순 (pgvector <=> 와 같은 값)"""
+        self.ensure_fresh(db)
+        ids, matrix = self._state
+        if matrix is None or not len(ids):
+            return []
+
+        query = np.asarray(vector, dtype=np.float32)
+        norm = float(np.linalg.norm(query))
+        if norm == 0:
+            return []
+        scores = self._scores(matrix, query / norm)
+
+        k = min(k, len(ids))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [(int(ids[i]), float(1.0 - scores[i])) for i in top]
+
+    @staticmethod
+    def _scores(matrix: np.ndarray, query: np.ndarray) -> np.ndarray:
+        if matrix.dtype == np.float32:
+            return matrix @ query
+        # float16 @ float32 는 행렬 전체를 float32 임시 배열로 올리므로 고정 크기 청크로 나누어 계산
+        scores = np.empty(len(matrix), dtype=np.float32)
+        for start in range(0, len(matrix), _SCORE_CHUNK):
+            chunk = matrix[start:start + _SCORE_CHUNK]
+            np.dot(chunk.astype(np.float32), query, out=scores[start:start + len(chunk)])
+        return scores
+
+    # ------------------------------
+    # Refresh
+    # ------------------------------
+    def invalidate(self):
+        """다음 검색 때 (백그라운드에서) DB와 전체 비교"""
+        self._change_marker = None
+        self._checked_at = 0.0
+
+    def ensure_fresh(self, db: Session):
+        if not self._loaded:
+            with self._lock:
+                if not self._loaded:
+                    self._load_snapshot()
+                    # 스냅샷이 없으면 검색할 데이터가 없으므로 첫 로드만 요청 안에서 수행
+                    if not self.size:
+                        self.refresh(db)
+                    self._loaded = True
+        if time.monotonic() - self._checked_at >= self.refresh_sec:
+            self._refresh_in_background()
+
+    def _refresh_in_background(self):
+        with self._lock:
+            if self._refreshing:
+                return
+            self._refreshing = True
+            self._checked_at = time.monotonic()
+        threading.Thread(target=self._background_refresh, name="vector-engine-refresh", daemon=True).start()
+
+    def _background_refresh(self):
+        from app.database import SessionLocal
+
+        db = SessionLocal()
+        try:
+            self.refresh(db)
+        except Exception as e:
+            logger.warning(f"⚠️ [VectorEngine] 백그라운드 갱신 실패 (현재 행렬 유지): {e}")
+        finally:
+            db.close()
+            self._refreshing = False
+
+    def _read_change_marker(self, db: Session) -> Optional[int]:
+        # 통계 카운터(insert / update / delete 누적)만 읽으므로 테이블 크기와 무관
+        return db.execute(text(
+            "SELECT n_tup_ins + n_tup_upd + n_tup_del FROM pg_stat_user_tables "
+            "WHERE relid = 'recipe'::regclass"
+        )).scalar()
+
+    def refresh(self, db: Session) -> dict:
+        """DB와 비교하여 추가 / 변경 / 삭제된 레시피만 반영"""
+        with self._lock:
+            marker = self._read_change_marker(db)
+            self._checked_at = time.monotonic()
+            if marker is not None and marker == self._change_marker:
+                return {"changed": 0, "removed": 0, "rows": self.size}
+
+            digests = dict(db.execute(text(
+                "SELECT recipe_id, md5(embedding::text) FROM recipe WHERE embedding IS NOT NULL"
+            )).all())
+            self._change_marker = marker
+
+            changed = [rid for rid, digest in digests.items() if self._digests.get(rid) != digest]
+            removed = set(self._digests) - set(digests)
+            if not changed and not removed:
+                return {"changed": 0, "removed": 0, "rows": self.size}
+
+            fetched = self._fetch(db, changed)
+            ids, matrix = self._state
+            stale = set(changed) | removed
+            keep = [i for i, rid in enumerate(ids.tolist()) if rid not in stale]
+
+            parts = [matrix[keep]] if matrix is not None else []
+            if fetched:
+                parts.append(_normalize(np.stack(list(fetched.values()))).astype(self.dtype))
+            ids = np.concatenate([ids[keep], np.array(list(fetched), dtype=np.int64)])
+            matrix = np.concatenate(parts) if parts else None
+
+            self._state = (ids, matrix)
+            self._digests = {rid: digests[rid] for rid in ids.tolist()}
+            self._save_snapshot()
+
+            logger.info(f"🔄 [VectorEngine] 변경 {len(fetched)}개 / 삭제 {len(removed)}개 반영 → 총 {len(ids)}개")
+            return {"changed": len(fetched), "removed": len(removed), "rows": len(ids)}
+
+    def _fetch(self, db: Session, recipe_ids: List[int]) -> Dict[int, np.ndarray]:
+        vectors = {}
+        for start in range(0, len(recipe_ids), _FETCH_CHUNK):
+            chunk = recipe_ids[start:start + _FETCH_CHUNK]
+            rows = db.query(models.Recipe.recipe_id, models.Recipe.embedding).filter(
+                models.Recipe.recipe_id.in_(chunk),
+                models.Recipe.embedding.isnot(None)
+            ).all()
+            for recipe_id, embedding in rows:
+                vectors[recipe_id] = np.asarray(embedding, dtype=np.float32)
+        return vectors
+
+    # ------------------------------
+    # Snapshot
+    # ------------------------------
+    def _load_snapshot(self):
+        if not self.snapshot_dir:
+            return
+        manifest_path = os.path.join(self.snapshot_dir, MANIFEST_NAME)
+        if not os.path.exists(manifest_path):
+            return
+        try:
+            with open(manifest_path, "r", encoding="utf-8") as f:
+                manifest = json.load(f)
+            if manifest["dtype"] != self.dtype.name:
+                logger.warning(f"⚠️ [VectorEngine] 스냅샷 dtype({manifest['dtype']}) 불일치 → 무시")
+                return
+            version = manifest["version"]
+            ids = np.load(os.path.join(self.snapshot_dir, f"ids-{version}.npy"))
+            matrix = np.load(os.path.join(self.snapshot_dir, f"matrix-{version}.npy"), mmap_mode="r")
+            if len(ids) != manifest["rows"] or matrix.shape[0] != manifest["rows"]:
+                raise ValueError("row count mismatch")
+        except Exception as e:
+            logger.warning(f"⚠️ [VectorEngine] 스냅샷 로드 실패 → DB에서 전체 로드: {e}")
+            return
+
+        self._state = (ids, matrix if len(ids) else None)
+        self._digests = {int(rid): digest for rid, digest in manifest["digests"].items()}
+        logger.info(f"📦 [VectorEngine] 스냅샷 로드 (mmap): {len(ids)}개")
+
+    def _save_snapshot(self):
+        """버전별 파일에 기록한 뒤 manifest.json 을 마지막에 원자적으로 교체"""
+        if not self.snapshot_dir:
+            return
+        ids, matrix = self._state
+        if matrix is None:
+            return
+        try:
+            os.makedirs(self.snapshot_dir, exist_ok=True)
+            # 시간순으로 정렬되는 버전 (정리 시 manifest 버전보다 오래된 파일만 삭제)
+            version = f"{time.time_ns():020d}-{uuid.uuid4().hex[:6]}"
+            np.save(os.path.join(self.snapshot_dir, f"ids-{version}.npy"), ids)
+            np.save(os.path.join(self.snapshot_dir, f"matrix-{version}.npy"), matrix)
+            manifest = {
+                "version": version,
+                "dtype": self.dtype.name,
+                "rows": len(ids),
+                "dim": int(matrix.shape[1]),
+                "digests": {str(rid): digest for rid, digest in self._digests.items()},
+            }
+            manifest_path = os.path.join(self.snapshot_dir, MANIFEST_NAME)
+            tmp_path = f"{manifest_path}.{uuid.uuid4().hex[:6]}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(manifest, f)
+            os.replace(tmp_path, manifest_path)
+            self._collect_old_versions(manifest_path)
+        except (OSError, ValueError, KeyError) as e:
+            logger.warning(f"⚠️ [VectorEngine] 스냅샷 저장 실패: {e}")
+
+    def _collect_old_versions(self, manifest_path: str):
+        """
+        다른 워커가 manifest 를 더 늦게 교체했을 수 있으므로 방금 쓴 버전이 아니라
+        현재 manifest 가 가리키는 버전을 기준으로, 그보다 오래되고 유예 시간이 지난 파일만 삭제
+        """
+        with open(manifest_path, "r", encoding="utf-8") as f:
+            current = json.load(f)["version"]
+        now = time.time()
+        for name in os.listdir(self.snapshot_dir):
+            if not name.endswith(".npy"):
+                continue
+            version = name.split("-", 1)[-1][:-len(".npy")]
+            path = os.path.join(self.snapshot_dir, name)
+            # "-" 가 없는 버전은 시간순 버전 도입 이전 형식 → 오래된 것으로 취급
+            older = "-" not in version or version < current
+            try:
+                if older and now - os.path.getmtime(path) > SNAPSHOT_GC_GRACE_SEC:
+                    # mmap 중인 파일도 unlink 는 안전
+                    os.remove(path)
+            except FileNotFoundError:
+                pass
+
+
+_engine: Optional[VectorSearchEngine] = None
+_engine_lock = threading.Lock()
+
+
+def get_vector_engine() -> VectorSearchEngine:
+    """프로세스당 1개 (첫 검색 시 스냅샷 / DB에서 로드)"""
+    global _engine
+    if _engine is None:
+        with _engine_lock:
+            if _engine is None:
+                _engine = VectorSearchEngine()
+    return _engine